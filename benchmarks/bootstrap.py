@@ -0,0 +1,79 @@
+"""Benchmark starting YouTube chats (getting a video's details and chat
+continuation), using the watch page and using the innertube API.
+
+Requires network access. The watch page of the first video is requested
+first, to get the client context used by the innertube API. Then, each video
+is started with both methods, and the time taken and number of bytes
+received (before decompression) are reported.
+
+Usage:
+    python benchmarks/bootstrap.py VIDEO_ID [VIDEO_ID ...] [--repeat N]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Allow direct execution
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
+
+from chat_downloader.sites.youtube import YouTubeChatDownloader
+
+
+def measure(downloader, function, video_id):
+    responses = []
+
+    def hook(response, **kwargs):
+        responses.append(response)
+
+    hooks = downloader.session.hooks['response']
+    hooks.append(hook)
+    try:
+        start = time.perf_counter()
+        video_info = function(video_id, {'max_attempts': 1})
+        taken = time.perf_counter() - start
+    finally:
+        hooks.remove(hook)
+
+    if video_info is None:
+        raise RuntimeError(f'Unable to get video info of {video_id} with {function.__name__}')
+
+    # Number of bytes read from each connection (streamed responses may be closed early)
+    received = sum(response.raw.tell() for response in responses)
+    return taken, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('video_ids', nargs='+', metavar='VIDEO_ID',
+                        help='IDs of videos which have a chat (or chat replay)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of times each video is started with each method')
+    args = parser.parse_args()
+
+    downloader = YouTubeChatDownloader()
+    downloader._get_html_video_info(args.video_ids[0], {'max_attempts': 1})
+
+    methods = {
+        'watch page': downloader._get_html_video_info,
+        'innertube': downloader._get_innertube_video_info,
+    }
+
+    results = {name: ([], []) for name in methods}
+    for video_id in args.video_ids:
+        for _ in range(args.repeat):
+            for name, function in methods.items():
+                taken, received = measure(downloader, function, video_id)
+                results[name][0].append(taken)
+                results[name][1].append(received)
+
+    for name, (times, sizes) in results.items():
+        print(f'{name:<10}  median {statistics.median(times) * 1000:8.1f} ms  '
+              f'{statistics.mean(sizes) / 1024:8.1f} KiB received on average')
+
+    downloader.close()
+
+
+if __name__ == '__main__':
+    main()
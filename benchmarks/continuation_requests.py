@@ -0,0 +1,132 @@
+"""Benchmark building requests for the next page of a YouTube live chat.
+
+For each request, the JSON body (the client's innertube context and the
+continuation) and the authorization header of a logged-in session are
+created, and the request is prepared by `requests` (without sending it).
+The previous method (encoding the whole body with ``json=``, and hashing the
+SAPISID cookie, read from a dictionary of all cookies, for every request) is
+compared to `ContinuationBodyEncoder` and the cached authorization header.
+
+Usage:
+    python benchmarks/continuation_requests.py [--requests N] [--cookies N] [--rounds N]
+"""
+import gc
+import os
+import sys
+import time
+import hashlib
+import argparse
+
+import requests
+
+# Allow direct execution
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
+
+from chat_downloader.sites.youtube import ContinuationBodyEncoder, YouTubeChatDownloader
+
+URL = 'https://www.youtube.com/youtubei/v1/live_chat/get_live_chat?key=x'
+
+# Similar in size and structure to the context of a logged-in web client
+CONTEXT = {
+    'client': {
+        'hl': 'en', 'gl': 'US', 'remoteHost': '203.0.113.1', 'deviceMake': '', 'deviceModel': '',
+        'visitorData': 'CgtBQUFBQUFBQUFBQSiAgICABjIICgJVUxICGgA%3D',
+        'userAgent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                     'Chrome/120.0.0.0 Safari/537.36,gzip(gfe)',
+        'clientName': 'WEB', 'clientVersion': '2.20240101.00.00', 'osName': 'Windows', 'osVersion': '10.0',
+        'originalUrl': 'https://www.youtube.com/live_chat?continuation=0ofMyANhGlhDaWtxSndvWVZVTlRT',
+        'platform': 'DESKTOP', 'clientFormFactor': 'UNKNOWN_FORM_FACTOR',
+        'configInfo': {'appInstallData': 'CJTw' + 'a1b2c3d4' * 60},
+        'browserName': 'Chrome', 'browserVersion': '120.0.0.0', 'acceptHeader': 'text/html,*/*;q=0.8',
+        'deviceExperimentId': 'ChxOek14TVRZek9EUTROVGN6TWpNNU9UTTFOZz09EJTw',
+        'screenWidthPoints': 1920, 'screenHeightPoints': 1080, 'screenPixelDensity': 1,
+        'screenDensityFloat': 1, 'utcOffsetMinutes': 0, 'userInterfaceTheme': 'USER_INTERFACE_THEME_DARK',
+        'timeZone': 'UTC', 'memoryTotalKbytes': '8000000',
+        'mainAppWebInfo': {'graftUrl': '/live_chat?continuation=0ofMyANhGlhDaWtxSndvWVZVTlRT',
+                           'webDisplayMode': 'WEB_DISPLAY_MODE_BROWSER', 'isWebNativeShareAvailable': True},
+    },
+    'user': {'lockedSafetyMode': False},
+    'request': {'useSsl': True, 'internalExperimentFlags': [], 'consistencyTokenJars': []},
+}
+CONTINUATION = '0ofMyANhGlhDaWtxSndvWVZVTlRTSVZGSzRXMmJPVWtSVDZKTzJ0aGFmemtvRmhCTXpZMGl' * 2
+
+
+def make_downloader(cookie_count):
+    downloader = YouTubeChatDownloader()
+    for i in range(cookie_count):
+        downloader.set_cookie_value('.youtube.com', f'COOKIE{i}', 'x' * 40)
+    downloader.set_cookie_value('.youtube.com', 'SAPISID', 'sapisid/0123456789abcdef', secure=True)
+    downloader.set_cookie_value('.youtube.com', '__Secure-3PAPISID', 'sapisid/0123456789abcdef', secure=True)
+    return downloader
+
+
+def previous_sapisidhash_header(downloader):
+    """Previous implementation of `_generate_sapisidhash_header`"""
+    sapis_id = requests.utils.dict_from_cookiejar(downloader.session.cookies).get('SAPISID')
+    sapisid_cookie = requests.utils.dict_from_cookiejar(
+        downloader.session.cookies).get('__Secure-3PAPISID') or sapis_id
+
+    time_now = round(time.time())
+    sapisidhash = hashlib.sha1(
+        f'{time_now} {sapisid_cookie} {downloader._YT_HOME}'.encode('utf-8')).hexdigest()
+    return f'SAPISIDHASH {time_now}_{sapisidhash}'
+
+
+def build_previous(downloader, encoder, prepare):
+    headers = {'authorization': previous_sapisidhash_header(downloader)}
+    body = {'context': CONTEXT, 'continuation': CONTINUATION}
+    if prepare:
+        return downloader.session.prepare_request(requests.Request('POST', URL, json=body, headers=headers))
+    return requests.models.complexjson.dumps(body).encode()
+
+
+def build_current(downloader, encoder, prepare):
+    headers = {'authorization': downloader._generate_sapisidhash_header(),
+               'content-type': 'application/json'}
+    body = encoder.encode(CONTINUATION)
+    if prepare:
+        return downloader.session.prepare_request(requests.Request('POST', URL, data=body, headers=headers))
+    return body
+
+
+def measure(function, downloader, encoder, count, rounds, prepare):
+    best = float('inf')
+    for _ in range(rounds):
+        # As with timeit, garbage collection is disabled while timing
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for _ in range(count):
+                function(downloader, encoder, prepare)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=5000,
+                        help='Number of requests to build')
+    parser.add_argument('--cookies', type=int, default=30,
+                        help='Number of cookies in the session (other than SAPISID)')
+    parser.add_argument('--rounds', type=int, default=5,
+                        help='Number of rounds (the fastest is reported)')
+    args = parser.parse_args()
+
+    downloader = make_downloader(args.cookies)
+    encoder = ContinuationBodyEncoder(CONTEXT)
+
+    assert build_current(downloader, encoder, True).body == build_previous(downloader, encoder, True).body, \
+        'Request bodies differ'
+
+    for prepare, name in ((False, 'body and header'), (True, 'prepared request')):
+        previous = measure(build_previous, downloader, encoder, args.requests, args.rounds, prepare)
+        current = measure(build_current, downloader, encoder, args.requests, args.rounds, prepare)
+        print(f'{name:<16}  previous {previous * 1e6:7.2f} us  current {current * 1e6:7.2f} us  '
+              f'speedup {previous / current:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark how long it takes to import chat_downloader.
+
+Each measurement imports the package in a fresh interpreter, since this is
+the cost paid by short-lived processes (e.g., one CLI call per job). Site
+modules should only be imported when a URL for that site is resolved.
+
+Usage:
+    python benchmarks/import_time.py [--runs N] [--max SECONDS]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATEMENTS = {
+    'python': 'pass',
+    'package': 'import chat_downloader',
+    'cli': 'import chat_downloader.cli',
+    'zoom': 'from chat_downloader.sites import resolve; resolve("https://zoom.us/rec/play/x")',
+    'all sites': 'from chat_downloader.sites import get_all_sites; get_all_sites()',
+}
+
+# Site modules which must not be imported by `import chat_downloader`
+LAZY_MODULES = ('youtube', 'twitch', 'zoom')
+
+
+def measure(statement, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], cwd=ROOT, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max', type=float,
+                        help='Fail if importing the package takes longer than this (in seconds, excluding interpreter startup)')
+    args = parser.parse_args()
+
+    check = subprocess.run([sys.executable, '-c', 'import sys, chat_downloader; print(*sys.modules)'],
+                           cwd=ROOT, check=True, capture_output=True, text=True)
+    loaded = set(check.stdout.split())
+    eager = [name for name in LAZY_MODULES
+             if f'chat_downloader.sites.{name}' in loaded]
+    if eager:
+        sys.exit(f'Site modules imported eagerly: {", ".join(eager)}')
+
+    results = {}
+    for name, statement in STATEMENTS.items():
+        results[name] = measure(statement, args.runs)
+        extra = results[name] - results['python']
+        print(f'{name:<10} {results[name] * 1000:7.1f}ms (+{extra * 1000:.1f}ms)')
+
+    package_time = results['package'] - results['python']
+    if args.max is not None and package_time > args.max:
+        sys.exit(
+            f'Import took {package_time:.3f}s, which is longer than {args.max}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark extraction of the initial data, ytcfg and player response from a
+YouTube watch page.
+
+A page with the layout of a watch page is generated, and the values are
+extracted (from chunks of the page, as when the page is being downloaded) by
+`ScriptJSONExtractor`, which stops once all values have been found. This is
+compared to searching the whole page with a regular expression for each
+value. The proportion of the page which had to be read is also reported.
+
+Usage:
+    python benchmarks/initial_info.py [--size N] [--repeat N]
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+# Allow direct execution
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
+
+from chat_downloader.sites.youtube import YouTubeChatDownloader
+from chat_downloader.utils.core import ScriptJSONExtractor, try_parse_json
+
+CHUNK_SIZE = YouTubeChatDownloader._YT_INITIAL_INFO_CHUNK_SIZE
+
+# Regular expressions which were previously used to search the whole page
+_BOUNDARY_RE = r'\s*(?:var\s+(?:meta|head)|</script|\n)'
+REGEXES = {
+    'initial_data': r'(?:window\s*\[\s*["\']ytInitialData["\']\s*\]|ytInitialData)\s*=\s*({.+?})\s*;' + _BOUNDARY_RE,
+    'ytcfg': r'ytcfg\.set\s*\(\s*({.+?})\s*\)\s*;',
+    'player_response': r'ytInitialPlayerResponse\s*=\s*({.+?})\s*;' + _BOUNDARY_RE,
+}
+
+
+def make_value(size, name):
+    items = [{'id': f'{name}{i}', 'text': f'Some text for item {i} of {name}', 'values': [i, i + 1, i + 2]}
+             for i in range(size // 80)]
+    return {'items': items}
+
+
+def make_page(size):
+    """Generate a page with the layout of a watch page: ytcfg is set in the
+    head, followed by the player response and initial data (in the body), and
+    other scripts and markup.
+    """
+    ytcfg = make_value(size // 20, 'ytcfg')
+    player_response = make_value(size // 4, 'player')
+    initial_data = make_value(size * 2 // 5, 'data')
+    filler = '<div class="x">' + 'y' * 100 + '</div>\n'
+
+    page = ''.join((
+        '<html><head><script>var a = 1;</script>',
+        f'<script>ytcfg.set({json.dumps(ytcfg)});</script></head><body>',
+        filler * (size // 20 // len(filler)),
+        f'<script>var ytInitialPlayerResponse = {json.dumps(player_response)};var meta = 1;</script>',
+        filler * (size // 20 // len(filler)),
+        f'<script>var ytInitialData = {json.dumps(initial_data)};</script>',
+        '<script>var other = {"a": 1};</script>' * (size // 4 // 40),
+        filler * (size // 20 // len(filler)),
+        '</body></html>'
+    ))
+    return page.encode(), {'initial_data': initial_data, 'ytcfg': ytcfg, 'player_response': player_response}
+
+
+def search_page(page):
+    html = page.decode()
+    return {name: try_parse_json(match.group(1)) for name, match in (
+        (name, re.search(regex, html)) for name, regex in REGEXES.items()) if match}
+
+
+def extract_page(page):
+    extractor = ScriptJSONExtractor(YouTubeChatDownloader._YT_INITIAL_INFO_PATTERNS)
+    read = 0
+    for start in range(0, len(page), CHUNK_SIZE):
+        chunk = page[start:start + CHUNK_SIZE]
+        read += len(chunk)
+        if extractor.feed(chunk.decode()):  # chunks are ASCII
+            break
+    return extractor.close(), read
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=1500000,
+                        help='Approximate size of the page (in bytes)')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='Number of times the values are extracted (the fastest is reported)')
+    args = parser.parse_args()
+
+    page, expected = make_page(args.size)
+
+    values, read = extract_page(page)
+    assert values == expected, 'Extracted values differ'
+    assert search_page(page) == expected, 'Searched values differ'
+
+    best = {}
+    for name, function in (('regex', search_page), ('stream', extract_page)):
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            function(page)
+            best[name] = min(best.get(name, float('inf')), time.perf_counter() - start)
+
+    print(f'page size {len(page):,} bytes, {read:,} bytes read by extractor ({read / len(page):.0%})')
+    for name, taken in best.items():
+        print(f'{name:<7} {taken * 1000:8.2f} ms')
+    print(f"speedup {best['regex'] / best['stream']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark polling a very busy YouTube live chat with multiple sessions.
+
+A chat with a constant message rate is simulated. As with YouTube, each
+response only contains the most recent messages (up to a fixed number), and
+the server suggests a time to wait before the next request. Each session
+chooses when to make its next request with a `LivePollScheduler`, and the
+sessions' first requests are staggered. Messages are merged (and duplicates
+removed) by a `LiveSessionMerger`, and the number of unique messages received
+per minute by each session and by all sessions is reported.
+
+Usage:
+    python benchmarks/live_sessions.py [--rate N] [--capacity N] [--sessions N] [--duration N]
+"""
+import os
+import sys
+import heapq
+import argparse
+
+# Allow direct execution
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
+
+from chat_downloader.sites.youtube import (
+    LivePollScheduler,
+    LiveSessionMerger,
+    YouTubeChatDownloader
+)
+
+SERVER_TIMEOUT = 5  # seconds
+
+
+def simulate(session_count, rate, capacity, duration):
+    """Simulate polling a chat, returning the merger and the number of
+    messages sent"""
+    merger = LiveSessionMerger([LivePollScheduler() for _ in range(session_count)])
+    stagger = YouTubeChatDownloader._get_session_stagger(merger)
+
+    # (time of next request, session index, ID of the newest message received)
+    requests = [(index * stagger, index, -1) for index in range(session_count)]
+    while requests:
+        now, index, newest = heapq.heappop(requests)
+        if now > duration:
+            continue
+
+        # Messages are sent every 1/rate seconds
+        sent = int(now * rate)
+        first = max(newest + 1, sent - capacity)
+        message_ids = range(first, sent)
+
+        for message_id in message_ids:
+            merger.add(index, {'message_id': message_id}, now=0)
+
+        scheduler = merger.sessions[index]['poll_scheduler']
+        interval = scheduler.update(len(message_ids), message_ids, SERVER_TIMEOUT, now,
+                                    timestamps=[message_id / rate for message_id in message_ids])
+        heapq.heappush(requests, (now + interval, index, max(newest, sent - 1)))
+
+    return merger, int(duration * rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rate', type=float, default=300,
+                        help='Number of messages sent per second')
+    parser.add_argument('--capacity', type=int, default=150,
+                        help='Maximum number of messages in a response')
+    parser.add_argument('--sessions', type=int, default=4,
+                        help='Maximum number of sessions')
+    parser.add_argument('--duration', type=float, default=600,
+                        help='Duration of the simulation (in seconds)')
+    args = parser.parse_args()
+
+    for session_count in range(1, args.sessions + 1):
+        merger, sent = simulate(session_count, args.rate, args.capacity, args.duration)
+        coverage = merger.get_coverage(now=args.duration)
+
+        per_session = ', '.join(f"{session['messages_per_minute']:,.0f}" for session in coverage)
+        requests = sum(session['poll_scheduler'].requests for session in merger.sessions)
+        print(f'{session_count} session(s): {merger.messages / args.duration * 60:8,.0f} messages/min '
+              f'({merger.messages / sent:6.1%} of sent), {requests / args.duration:.2f} requests/s, '
+              f'per session: {per_session}')
+
+
+if __name__ == '__main__':
+    main()
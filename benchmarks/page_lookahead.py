@@ -0,0 +1,66 @@
+"""Benchmark pipelined pagination of past broadcasts (`page_lookahead`).
+
+Simulates a Twitch VOD whose comment pages take a fixed time to download,
+and a consumer which spends a fixed time processing each page. Without
+lookahead, these costs add up; with lookahead, they overlap.
+
+Usage:
+    python benchmarks/page_lookahead.py [--pages N] [--latency S] [--work S]
+"""
+import os
+import sys
+import time
+import argparse
+
+# Allow direct execution
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
+
+from chat_downloader.sites.twitch import TwitchChatDownloader
+
+PAGE_SIZE = 50
+
+
+def make_download_gql(num_pages, latency):
+    def download_gql(query):
+        time.sleep(latency)  # Network round trip
+        page = int(query[0]['variables'].get('cursor', 0))
+        edges = [{
+            'cursor': str(page + 1),
+            'node': {'id': f'{page}-{i}', 'contentOffsetSeconds': page}
+        } for i in range(PAGE_SIZE)]
+
+        return [{'data': {'video': {'comments': {
+            'edges': edges,
+            'pageInfo': {'hasNextPage': page + 1 < num_pages}
+        }}}}]
+    return download_gql
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Time taken to download a page (in seconds)')
+    parser.add_argument('--work', type=float, default=0.05,
+                        help='Time taken to process a page (in seconds)')
+    args = parser.parse_args()
+
+    downloader = TwitchChatDownloader()
+    downloader._download_gql = make_download_gql(args.pages, args.latency)
+
+    for page_lookahead in (0, 1, 2):
+        params = {'page_lookahead': page_lookahead,
+                  'message_groups': ['all'], 'max_attempts': 1}
+
+        start = time.perf_counter()
+        count = 0
+        for _ in downloader._get_chat_messages_by_vod_id('1', params, float('inf')):
+            count += 1
+            time.sleep(args.work / PAGE_SIZE)  # Consumer work
+        taken = time.perf_counter() - start
+
+        print(f'page_lookahead={page_lookahead}: {count} messages in {taken:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Benchmark compiled remapping (`Remapper.compile`) against remapping each
+key individually (`Remapper.remap`), using each site's item parser.
+
+YouTube items are taken from tests/youtube_actions.json. Items for other
+sites are representative examples of their APIs' responses. The output of
+both methods is checked to be identical.
+
+Usage:
+    python benchmarks/remapping.py [--repeat N] [--rounds N]
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+# Allow direct execution
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
+
+from chat_downloader.sites.common import Remapper
+from chat_downloader.sites.youtube import YouTubeChatDownloader
+from chat_downloader.sites.twitch import TwitchChatDownloader
+from chat_downloader.sites.zoom import ZoomChatDownloader
+from chat_downloader.sites.facebook import FacebookChatDownloader
+
+ACTIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'tests', 'youtube_actions.json')
+
+IRC_LINE = ('@badge-info=subscriber/8;badges=subscriber/6,premium/1;client-nonce=abc;'
+            'color=#1E90FF;display-name=Viewer;emotes=25:0-4;first-msg=0;flags=;'
+            'id=b34ccfc7-4977-403a-8a94-33c6bac34fb8;mod=0;room-id=12345;subscriber=1;'
+            'tmi-sent-ts=1600000000000;turbo=0;user-id=67890;user-type= '
+            ':viewer!viewer@viewer.tmi.twitch.tv PRIVMSG #channel :Kappa hello there')
+
+VOD_COMMENT = {
+    'id': 'a1b2c3',
+    'createdAt': '2021-01-01T12:00:00.123Z',
+    'commenter': {'id': '67890', 'login': 'viewer', 'displayName': 'Viewer'},
+    'contentOffsetSeconds': 1234,
+    'message': {
+        'userColor': '#1E90FF',
+        'userBadges': [],
+        'fragments': [{'text': 'hello ', 'emote': None}, {'text': 'there', 'emote': None}]
+    }
+}
+
+ZOOM_MESSAGE = {'userName': 'Participant', 'time': '00:12:34', 'content': 'hello there'}
+
+FACEBOOK_NODE = {
+    'id': 'Y29tbWVudDoxMjM0',
+    'created_time': 1600000000,
+    'is_author_banned_by_content_owner': False,
+    'is_author_original_poster': False,
+    'is_author_bot': False,
+    'is_author_non_coworker': True,
+    'upvote_downvote_total': 0,
+    'timestamp_in_video': 754,
+    'author': {
+        'id': '100001',
+        'name': 'Commenter',
+        '__typename': 'User',
+        'url': 'https://www.facebook.com/commenter',
+        'is_verified': False,
+        'gender': 'FEMALE',
+        'short_name': 'Commenter'
+    },
+    'body': {'text': 'hello there'}
+}
+
+
+def interpreted_compile(remapping_dict, keep_unknown_keys=False, replace_char_with_underscores=None):
+    """Previous behaviour: call `Remapper.remap` for each key"""
+    def remap_dictionary(input_dictionary, info=None):
+        if info is None:
+            info = {}
+        for key in input_dictionary:
+            Remapper.remap(info, remapping_dict, key, input_dictionary[key],
+                           keep_unknown_keys, replace_char_with_underscores)
+        return info
+    return remap_dictionary
+
+
+def get_parsers():
+    with open(ACTIONS_PATH) as f:
+        actions = json.load(f)
+
+    youtube = YouTubeChatDownloader()
+    irc_match = re.match(TwitchChatDownloader._MESSAGE_REGEX, IRC_LINE)
+    zoom = ZoomChatDownloader()
+
+    return {
+        'YouTube': (lambda: [youtube._parse_chat_action(action) for action in actions], len(actions)),
+        'Twitch (IRC)': (lambda: TwitchChatDownloader._parse_irc_item(irc_match), 1),
+        'Twitch (VOD)': (lambda: TwitchChatDownloader._parse_item(VOD_COMMENT, 0), 1),
+        'Zoom': (lambda: list(zoom._get_chat_messages([dict(ZOOM_MESSAGE)], {'message_groups': ['all']})), 1),
+        'Facebook': (lambda: FacebookChatDownloader._parse_node(FACEBOOK_NODE), 1),
+    }
+
+
+def measure(parse, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse()
+    return time.perf_counter() - start
+
+
+def set_compile(function):
+    Remapper.compile = staticmethod(function)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20000,
+                        help='Number of items parsed in each round')
+    parser.add_argument('--rounds', type=int, default=5,
+                        help='Number of rounds (the fastest is reported)')
+    args = parser.parse_args()
+
+    compiled_compile = Remapper.compile
+
+    for name, (parse, items_per_run) in get_parsers().items():
+        set_compile(interpreted_compile)
+        expected = parse()
+        set_compile(compiled_compile)
+        if parse() != expected:
+            raise AssertionError(f'Output differs for {name}')
+
+        # Alternate between methods, to reduce the effect of noise
+        repeat = max(args.repeat // items_per_run, 1)
+        interpreted_time = compiled_time = float('inf')
+        for _ in range(args.rounds):
+            set_compile(interpreted_compile)
+            interpreted_time = min(interpreted_time, measure(parse, repeat))
+            set_compile(compiled_compile)
+            compiled_time = min(compiled_time, measure(parse, repeat))
+
+        print(f'{name:<13} remap: {interpreted_time:.3f}s  compiled: {compiled_time:.3f}s  '
+              f'({interpreted_time / compiled_time:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
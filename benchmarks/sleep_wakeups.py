@@ -0,0 +1,93 @@
+"""Benchmark the CPU cost of many chats sleeping at the same time.
+
+Each thread sleeps (as between requests for a live chat) with a cancellation
+token active. `interruptible_sleep`, which makes a single wait that is
+interrupted by cancellation, is compared to the previous implementation,
+which woke up every `POLLING_TIME` seconds to check for timeouts and
+cancellation. The CPU time used by the process, and the time taken to
+notice cancellation, are reported.
+
+Usage:
+    python benchmarks/sleep_wakeups.py [--threads N] [--duration N]
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+# Allow direct execution
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
+
+from chat_downloader.utils.timed_utils import (
+    POLLING_TIME,
+    Cancelled,
+    CancellationToken,
+    check_for_timeout,
+    get_cancellation_tokens,
+    interruptible_sleep
+)
+
+
+def polling_sleep(secs, poll_time=POLLING_TIME):
+    """Previous implementation of `interruptible_sleep`"""
+    end_time = time.monotonic() + secs
+
+    while True:
+        check_for_timeout()
+
+        remaining = end_time - time.monotonic()
+        if remaining <= 0:
+            break
+
+        tokens = get_cancellation_tokens()
+        if tokens:
+            tokens[-1].wait(min(poll_time, remaining))
+        else:
+            time.sleep(min(poll_time, remaining))
+
+
+def run(sleep, thread_count, duration):
+    """Sleep in each thread until the token is cancelled, returning the CPU
+    time used and the time taken for all threads to stop after cancelling"""
+    token = CancellationToken()
+    stopped = threading.Barrier(thread_count + 1)
+
+    def work():
+        with token.activate():
+            try:
+                sleep(duration * 10)
+            except Cancelled:
+                pass
+        stopped.wait()
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(thread_count)]
+    for thread in threads:
+        thread.start()
+
+    start = time.process_time()
+    time.sleep(duration)
+    cpu_time = time.process_time() - start
+
+    cancel_time = time.monotonic()
+    token.cancel()
+    stopped.wait()
+    return cpu_time, time.monotonic() - cancel_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=1000,
+                        help='Number of sleeping threads')
+    parser.add_argument('--duration', type=float, default=5,
+                        help='Number of seconds to measure CPU time for')
+    args = parser.parse_args()
+
+    for name, sleep in (('polling', polling_sleep), ('single wait', interruptible_sleep)):
+        cpu_time, stop_time = run(sleep, args.threads, args.duration)
+        print(f'{name:<11}  {cpu_time / args.duration:6.1%} of a CPU  '
+              f'{stop_time * 1000:7.1f} ms to stop after cancelling')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark parsing chat messages from multiple threads.
+
+Each thread parses the recorded YouTube actions (tests/youtube_actions.json)
+using a single, shared downloader object. With the GIL, throughput stays
+roughly constant as threads are added. On a free-threaded build of Python
+(e.g. ``python3.13t``), throughput should scale with the number of cores.
+
+Run with both interpreters to compare, e.g.:
+    python benchmarks/thread_scaling.py
+    python3.13t -X gil=0 benchmarks/thread_scaling.py
+
+Usage:
+    python benchmarks/thread_scaling.py [--threads 1 2 4 8] [--repeat N]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import sysconfig
+
+# Allow direct execution
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
+
+from chat_downloader.sites.youtube import YouTubeChatDownloader
+
+ACTIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'tests', 'youtube_actions.json')
+
+
+def gil_enabled():
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled() if is_gil_enabled else True
+
+
+def parse_all(downloader, actions, repeat):
+    count = 0
+    for _ in range(repeat):
+        for action in actions:
+            if downloader._parse_chat_action(action) is not None:
+                count += 1
+    return count
+
+
+def run(downloader, actions, num_threads, repeat):
+    counts = [0] * num_threads
+    barrier = threading.Barrier(num_threads + 1)
+
+    def work(index):
+        barrier.wait()
+        counts[index] = parse_all(downloader, actions, repeat)
+
+    threads = [threading.Thread(target=work, args=(i,))
+               for i in range(num_threads)]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return sum(counts), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--repeat', type=int, default=2000,
+                        help='Number of times each thread parses the recorded actions')
+    args = parser.parse_args()
+
+    with open(ACTIONS_PATH) as f:
+        actions = json.load(f)
+
+    free_threaded = bool(sysconfig.get_config_var('Py_GIL_DISABLED'))
+    print(f'Python {sys.version.split()[0]}, free-threaded build: {free_threaded}, '
+          f'GIL enabled: {gil_enabled()}, CPUs: {os.cpu_count()}')
+
+    downloader = YouTubeChatDownloader()
+    baseline = None
+    for num_threads in args.threads:
+        count, taken = run(downloader, actions, num_threads, args.repeat)
+        rate = count / taken
+        baseline = baseline or rate
+        print(f'threads={num_threads}: {count} messages in {taken:.2f}s '
+              f'({rate:,.0f} messages/s, {rate / baseline:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
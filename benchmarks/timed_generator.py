@@ -0,0 +1,73 @@
+"""Benchmark the per-item overhead of timed generators.
+
+Compares the current (deadline-based) TimedGenerator with the previous
+implementation, which restarted a `threading.Timer` after every item.
+
+Usage:
+    python benchmarks/timed_generator.py [--items N]
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import _thread
+
+# Allow direct execution
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
+
+from chat_downloader.utils.timed_utils import TimedGenerator
+
+
+class LegacyTimedGenerator:
+    """Previous implementation (inactivity timer only), kept for reference."""
+
+    def __init__(self, generator, inactivity_timeout):
+        self.generator = generator
+        self.inactivity_timeout = inactivity_timeout
+        self.start_inactivity_timer()
+
+    def start_inactivity_timer(self):
+        self.inactivity_timer = threading.Timer(
+            self.inactivity_timeout, _thread.interrupt_main)
+        self.inactivity_timer.start()
+
+    def reset_inactivity_timer(self):
+        self.inactivity_timer.cancel()
+        self.start_inactivity_timer()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            next_item = next(self.generator)
+            self.reset_inactivity_timer()
+            return next_item
+        except StopIteration:
+            self.inactivity_timer.cancel()
+            raise
+
+
+def run(name, wrap, num_items):
+    start = time.perf_counter()
+    for _ in wrap(iter(range(num_items))):
+        pass
+    taken = time.perf_counter() - start
+    print(f'{name:<10} {num_items} items in {taken:.3f}s '
+          f'({taken / num_items * 1e6:.2f}us per item)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=20000)
+    args = parser.parse_args()
+
+    run('baseline', lambda g: g, args.items)
+    run('legacy', lambda g: LegacyTimedGenerator(g, 60), args.items)
+    run('deadline', lambda g: TimedGenerator(
+        g, timeout=60, inactivity_timeout=60), args.items)
+
+
+if __name__ == '__main__':
+    main()
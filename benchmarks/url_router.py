@@ -0,0 +1,68 @@
+"""Benchmark resolving URLs to the site (and function) which handles them.
+
+Compares the host-indexed router (`chat_downloader.sites.resolve`) with the
+previous approach, which called `re.search` on every site's raw patterns.
+
+Usage:
+    python benchmarks/url_router.py [--urls N]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+# Allow direct execution
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
+
+from chat_downloader.sites import get_all_sites, resolve
+
+
+URLS = [
+    'https://www.youtube.com/watch?v=jfKfPfyJRdk',
+    'https://youtu.be/jfKfPfyJRdk',
+    'https://www.youtube.com/@LofiGirl',
+    'https://www.twitch.tv/videos/123456789',
+    'https://clips.twitch.tv/FaintLightGullWholeWheat',
+    'https://www.twitch.tv/xenova',
+    'https://us02web.zoom.us/rec/play/abc',
+    'https://www.example.com/unsupported',
+]
+
+
+def legacy_resolve(url):
+    for site in get_all_sites():
+        for function_name, regex in site._VALID_URLS.items():
+            if isinstance(regex, str):
+                match = re.search(regex, url)
+                if match:
+                    return site, function_name, match
+    return None
+
+
+def run(name, function, urls):
+    start = time.perf_counter()
+    for url in urls:
+        function(url)
+    taken = time.perf_counter() - start
+    print(f'{name:<8} {len(urls)} urls in {taken:.3f}s '
+          f'({taken / len(urls) * 1e6:.2f}us per url)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--urls', type=int, default=50000)
+    args = parser.parse_args()
+
+    urls = (URLS * (args.urls // len(URLS) + 1))[:args.urls]
+
+    for url in URLS:  # Sanity check
+        legacy, new = legacy_resolve(url), resolve(url)
+        assert (legacy and legacy[:2]) == (new and new[:2]), url
+
+    run('legacy', legacy_resolve, urls)
+    run('router', resolve, urls)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark parsing of YouTube chat actions.
+
+Parses each of the recorded actions in tests/youtube_actions.json many
+times, and reports the throughput for each action type, as well as overall.
+
+Usage:
+    python benchmarks/youtube_actions.py [--repeat N]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from collections import defaultdict
+
+# Allow direct execution
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
+
+from chat_downloader.sites.youtube import YouTubeChatDownloader
+from chat_downloader.utils.core import try_get_first_key
+
+ACTIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'tests', 'youtube_actions.json')
+
+
+def get_action_type(action):
+    replay_chat_item_action = action.get('replayChatItemAction')
+    if replay_chat_item_action:
+        action = replay_chat_item_action['actions'][0]
+    return try_get_first_key({key: None for key in action if key != 'clickTrackingParams'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5000,
+                        help='Number of times each action is parsed')
+    args = parser.parse_args()
+
+    with open(ACTIONS_PATH) as f:
+        actions = json.load(f)
+
+    downloader = YouTubeChatDownloader()
+
+    timings = defaultdict(lambda: [0, 0.0])  # action type -> [count, time]
+    for action in actions:
+        action_type = get_action_type(action)
+        parse = downloader._parse_chat_action
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            parse(action)
+        taken = time.perf_counter() - start
+
+        timings[action_type][0] += args.repeat
+        timings[action_type][1] += taken
+
+    width = max(map(len, timings))
+    total_count = total_time = 0
+    for action_type, (count, taken) in sorted(timings.items(), key=lambda x: x[1][1] / x[1][0], reverse=True):
+        total_count += count
+        total_time += taken
+        print(f'{action_type:<{width}}  {taken / count * 1e6:8.2f} us/action  '
+              f'{count / taken:12,.0f} actions/s')
+
+    print(f"{'all':<{width}}  {total_time / total_count * 1e6:8.2f} us/action  "
+          f'{total_count / total_time:12,.0f} actions/s')
+
+
+if __name__ == '__main__':
+    main()
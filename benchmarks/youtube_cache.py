@@ -0,0 +1,127 @@
+"""Benchmark the per-chat cache of parsed YouTube emotes, badges and images.
+
+Generates text messages, sent by a pool of authors (with member badges), which
+contain custom emotes from a fixed set. The messages are parsed with and
+without a cache, and the throughput and cache hit rate are reported. The
+output of both methods is checked to be identical.
+
+Usage:
+    python benchmarks/youtube_cache.py [--messages N] [--authors N] [--emotes N] [--rounds N]
+"""
+import gc
+import os
+import sys
+import copy
+import time
+import random
+import argparse
+
+# Allow direct execution
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
+
+from chat_downloader.sites.youtube import YouTubeChatDownloader
+from chat_downloader.utils.core import LRUCache
+
+BADGE_TIERS = ['New member', 'Member (1 month)', 'Member (6 months)', 'Member (1 year)']
+
+
+def images(url, *sizes, param='s{0}'):
+    return {'thumbnails': [
+        {'url': f'{url}={param.format(size)}-c-k', 'width': size, 'height': size}
+        for size in sizes
+    ]}
+
+
+def make_emoji(index):
+    name = f':emote{index}:'
+    return {
+        'emojiId': f'UCchannel/emote{index}',
+        'shortcuts': [name],
+        'searchTerms': [name.strip(':')],
+        'image': images(f'https://yt3.ggpht.com/emote{index}', 24, 48, param='w{0}-h{0}'),
+        'isCustomEmoji': True
+    }
+
+
+def make_badge(tier):
+    return {'liveChatAuthorBadgeRenderer': {
+        'customThumbnail': images(f'https://yt3.ggpht.com/badge{tier}', 16, 32),
+        'tooltip': BADGE_TIERS[tier],
+        'accessibility': {'accessibilityData': {'label': BADGE_TIERS[tier]}}
+    }}
+
+
+def make_action(index, author, emojis, rng):
+    runs = [{'text': 'hello '}]
+    for emoji in rng.sample(emojis, min(3, len(emojis))):
+        runs.append({'emoji': emoji})
+        runs.append({'text': ' '})
+
+    renderer = {
+        'message': {'runs': runs},
+        'authorName': {'simpleText': f'Viewer {author}'},
+        'authorPhoto': images(f'https://yt3.ggpht.com/ytc/author{author}', 32, 64),
+        'id': f'message{index}',
+        'timestampUsec': str(1600000000000000 + index * 1000),
+        'authorExternalChannelId': f'UCauthor{author}',
+    }
+    if author % 2 == 0:  # half of the authors are members
+        renderer['authorBadges'] = [make_badge(author % len(BADGE_TIERS))]
+
+    return {'addChatItemAction': {'item': {'liveChatTextMessageRenderer': renderer}}}
+
+
+def parse_all(downloader, actions, cache):
+    # Parsing removes some keys, so parse copies of the actions
+    actions = copy.deepcopy(actions)
+
+    # As with timeit, garbage collection is disabled while timing
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        parsed = [downloader._parse_chat_action(action, cache=cache) for action in actions]
+        return time.perf_counter() - start, parsed
+    finally:
+        gc.enable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=20000,
+                        help='Number of messages to parse')
+    parser.add_argument('--authors', type=int, default=2000,
+                        help='Number of distinct authors')
+    parser.add_argument('--emotes', type=int, default=50,
+                        help='Number of distinct emotes')
+    parser.add_argument('--rounds', type=int, default=5,
+                        help='Number of rounds (the fastest is reported)')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    emojis = [make_emoji(i) for i in range(args.emotes)]
+    actions = [make_action(i, rng.randrange(args.authors), emojis, rng)
+               for i in range(args.messages)]
+
+    downloader = YouTubeChatDownloader()
+
+    best = {'no cache': float('inf'), 'cache': float('inf')}
+    for _ in range(args.rounds):
+        taken, uncached = parse_all(downloader, actions, None)
+        best['no cache'] = min(best['no cache'], taken)
+
+        cache = LRUCache(YouTubeChatDownloader._PARSE_CACHE_SIZE)
+        taken, cached = parse_all(downloader, actions, cache)
+        best['cache'] = min(best['cache'], taken)
+
+        assert cached == uncached, 'Output differs when using the cache'
+
+    for method, taken in best.items():
+        print(f'{method:<8}  {taken / args.messages * 1e6:8.2f} us/message  '
+              f'{args.messages / taken:12,.0f} messages/s')
+    print(f"speedup   {best['no cache'] / best['cache']:.2f}x")
+    print(cache)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,3 +4,11 @@ from .chat_downloader import (
     ChatDownloader,
     run
 )
+
+
+def __getattr__(name):
+    # Avoid importing asyncio (and aiohttp) unless needed
+    if name == 'AsyncChatDownloader':
+        from .async_chat_downloader import AsyncChatDownloader
+        return AsyncChatDownloader
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,403 @@
+"""asyncio interface for retrieving chat messages.
+
+Requires the optional `aiohttp` dependency (``pip install chat-downloader[async]``).
+"""
+import asyncio
+import codecs
+import functools
+import threading
+import concurrent.futures
+
+try:
+    import aiohttp
+except ImportError:  # Optional dependency
+    aiohttp = None
+
+from .chat_downloader import ChatDownloader
+from .sites.common import (
+    BaseChatDownloader,
+    Projection
+)
+from .utils.core import attempts
+from .utils.timed_utils import (
+    POLLING_TIME,
+    CancellationToken,
+    CancellableGenerator
+)
+from .debugging import log
+from .errors import RetriesExceeded
+
+
+class AsyncConnection:
+    """Line-based TCP connection (e.g. to an IRC server), used by `AsyncClient`."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def send_raw(self, string):
+        self.writer.write((string + '\r\n').encode('utf-8'))
+        await self.writer.drain()
+
+    async def recv(self, buffer_size, timeout=None):
+        """Receive data from the connection
+
+        :param buffer_size: Maximum number of bytes to receive
+        :type buffer_size: int
+        :param timeout: Number of seconds to wait for data, defaults to None
+        :type timeout: float, optional
+        :return: The data received, an empty string if the connection
+            was closed, or None if no data was received in time
+        :rtype: str
+        """
+        try:
+            data = await asyncio.wait_for(self.reader.read(buffer_size), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return data.decode('utf-8', 'ignore')
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncClient:
+    """Class used by sites to make non-blocking requests and connections.
+
+    Uses the headers, cookies and proxy of a site's (synchronous) session.
+    """
+
+    _RETRY_ERRORS = (ValueError, asyncio.TimeoutError) + \
+        ((aiohttp.ClientError,) if aiohttp else ())
+
+    def __init__(self, site):
+        """Create an AsyncClient object
+
+        :param site: The site whose session should be used
+        :type site: BaseChatDownloader
+        """
+        session = site.session
+        self._proxy = session.proxies.get('https') or session.proxies.get('http')
+        self.session = aiohttp.ClientSession(
+            headers=dict(session.headers),
+            cookies=site._get_cookies_dict(),
+        )
+
+    async def retry(self, attempt_number, params, error=None, text=None):
+        """Asynchronous version of `BaseChatDownloader.retry`. Never waits for user input.
+
+        :raises RetriesExceeded: if the maximum number of retries has been exceeded
+        """
+        max_attempts = params.get('max_attempts') or 1
+        if attempt_number >= max_attempts:
+            raise RetriesExceeded(
+                f'Maximum number of retries has been reached ({max_attempts}).')
+
+        time_to_sleep = BaseChatDownloader._get_retry_time(
+            attempt_number, params.get('retry_timeout'))
+        if time_to_sleep < 0:  # Cannot wait for user input
+            time_to_sleep = BaseChatDownloader._get_retry_time(attempt_number)
+
+        retry_text = f'Retry #{attempt_number} (sleep for {time_to_sleep}s).'
+        if isinstance(error, Exception):
+            retry_text += f' {error} ({error.__class__.__name__})'
+
+        log('warning', ([text] if text else []) + [retry_text])
+        await self.sleep(time_to_sleep)
+
+    async def _request(self, method, url, params, parse, **kwargs):
+        for attempt_number in attempts((params or {}).get('max_attempts') or 1):
+            try:
+                async with self.session.request(method, url, proxy=self._proxy, **kwargs) as response:
+                    if response.status // 100 == 5:  # Server error, retry
+                        await self.retry(attempt_number, params or {}, text=f'Server error ({response.status})')
+                        continue
+                    return await parse(response)
+
+            except self._RETRY_ERRORS as e:
+                await self.retry(attempt_number, params or {}, error=e)
+
+    async def get_text(self, url, params=None, headers=None):
+        """Make a GET request and return the text of the response"""
+        return await self._request('GET', url, params, lambda response: response.text(), headers=headers)
+
+    async def feed_text(self, url, feed, params=None, headers=None, chunk_size=65536):
+        """Make a GET request and pass the text of the response to `feed` as
+        it is received. Once `feed` returns True, the rest of the response is
+        not read.
+        """
+        async def parse(response):
+            decoder = codecs.getincrementaldecoder(
+                response.charset or 'utf-8')(errors='replace')
+            async for chunk in response.content.iter_chunked(chunk_size):
+                if feed(decoder.decode(chunk)):
+                    return
+            feed(decoder.decode(b'', final=True))
+
+        return await self._request('GET', url, params, parse, headers=headers)
+
+    async def post_json(self, url, params=None, json=None, headers=None, data=None):
+        """Make a POST request (with a JSON body) and return the parsed JSON
+        response. An already encoded body may be passed as `data`."""
+        return await self._request('POST', url, params, lambda response: response.json(content_type=None), json=json, headers=headers, data=data)
+
+    async def open_connection(self, host, port):
+        """Open a TCP connection
+
+        :return: The connection
+        :rtype: AsyncConnection
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        return AsyncConnection(reader, writer)
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+    async def close(self):
+        await self.session.close()
+
+
+class AsyncChat:
+    """Asynchronous version of `Chat`, which is iterated with ``async for``.
+
+    Other attributes (e.g. `title`, `id` and `format`) are those of the
+    underlying `Chat` object.
+    """
+
+    def __init__(self, chat, messages, max_messages=None, timeout=None, inactivity_timeout=None, projection=None):
+        """Create an AsyncChat object
+
+        :param chat: The (synchronous) chat object, which contains the chat's
+            information and output writer
+        :type chat: Chat
+        :param messages: Asynchronous generator which yields chat messages
+        :type messages: async_generator
+        :param max_messages: Maximum number of messages to retrieve, defaults
+            to None (unlimited)
+        :type max_messages: int, optional
+        :param timeout: Stop retrieving chat after a certain duration
+            (in seconds), defaults to None
+        :type timeout: float, optional
+        :param inactivity_timeout: Stop getting messages after not receiving
+            anything for a certain duration (in seconds), defaults to None
+        :type inactivity_timeout: float, optional
+        :param projection: Fields to include in each message, defaults to
+            None (all fields)
+        :type projection: Projection, optional
+        """
+        self._chat = chat
+        self._messages = messages
+        self.max_messages = max_messages
+        self.inactivity_timeout = inactivity_timeout
+        self.projection = projection
+
+        loop = asyncio.get_running_loop()
+        self._deadline = None if timeout is None else loop.time() + timeout
+        self._message_count = 0
+        self._finished = False
+
+    def __getattr__(self, name):
+        return getattr(self._chat, name)
+
+    def __aiter__(self):
+        return self
+
+    def _get_wait_time(self):
+        wait_times = []
+        if self._deadline is not None:
+            wait_times.append(max(self._deadline - asyncio.get_running_loop().time(), 0))
+        if self.inactivity_timeout is not None:
+            wait_times.append(self.inactivity_timeout)
+        return min(wait_times) if wait_times else None
+
+    async def __anext__(self):
+        if self._finished:
+            raise StopAsyncIteration
+
+        if self.max_messages is not None and self._message_count >= self.max_messages:
+            await self._finish()
+
+        try:
+            item = await asyncio.wait_for(self._messages.__anext__(), self._get_wait_time())
+        except asyncio.TimeoutError:
+            log('debug', 'Timeout occurred.')
+            await self._finish()
+        except StopAsyncIteration:
+            await self._finish()
+
+        if self.projection is not None:
+            item = self.projection.project(item)
+
+        self._message_count += 1
+        self._chat._on_item(item)
+        return item
+
+    async def _finish(self):
+        await self.aclose()
+        raise StopAsyncIteration
+
+    async def aclose(self):
+        """Stop retrieving chat messages"""
+        if self._finished:
+            return
+        self._finished = True
+        await self._messages.aclose()
+        self._chat._on_finish()
+
+
+class AsyncChatDownloader:
+    """asyncio version of `ChatDownloader`. A single event loop can be used to
+    retrieve many chats at the same time, e.g.::
+
+        async with AsyncChatDownloader() as downloader:
+            chat = await downloader.get_chat(url)
+            async for message in chat:
+                chat.print_formatted(message)
+
+    Messages are retrieved with non-blocking requests (and sockets), for sites
+    which support it (YouTube videos and clips, and Twitch streams, past
+    broadcasts and clips). Other chats are retrieved in a thread pool, with
+    one thread per chat.
+
+    Retrieving a chat's initial information (i.e., `get_chat`) makes blocking
+    requests in a thread pool.
+    """
+
+    _ITEM, _ERROR, _DONE = range(3)
+
+    def __init__(self, max_threads=32, **kwargs):
+        """Create an AsyncChatDownloader object. Other arguments are the
+        same as those of `ChatDownloader`.
+
+        :param max_threads: Maximum number of chats, from sites which do not
+            support non-blocking requests, to retrieve at the same time. Each
+            of these chats is retrieved in its own thread, and other chats
+            wait until a thread is available. Defaults to 32
+        :type max_threads: int, optional
+        :raises ImportError: if `aiohttp` is not installed
+        """
+        if aiohttp is None:
+            raise ImportError(
+                'AsyncChatDownloader requires aiohttp. Install it with: pip install chat-downloader[async]')
+
+        self._downloader = ChatDownloader(**kwargs)
+        self._clients = {}
+
+        self.max_threads = max_threads
+        self._executor = None
+
+    def _get_client(self, site):
+        name = site.__class__.__name__
+        if name not in self._clients:
+            self._clients[name] = AsyncClient(site)
+        return self._clients[name]
+
+    async def get_chat(self, url=None, **kwargs):
+        """Get chat messages from a livestream, video, clip or past broadcast.
+        Arguments are the same as those of `ChatDownloader.get_chat`, except
+        that `prefetch`, `page_lookahead` and `replay_workers` are ignored by
+        sites which support non-blocking requests.
+
+        :return: The chat, which can be iterated with ``async for``
+        :rtype: AsyncChat
+        """
+        loop = asyncio.get_running_loop()
+        chat = await loop.run_in_executor(None, functools.partial(
+            self._downloader.get_chat, url, **kwargs))
+
+        projection = None
+        if chat.async_chat is not None:
+            messages = chat.async_chat(self._get_client(chat.site))
+            chat.close()  # Synchronous generator is not used
+
+            if kwargs.get('fields'):
+                projection = Projection(kwargs['fields'])
+        else:
+            # Messages have already been projected
+            messages = self._iterate_in_thread(chat.chat)
+
+        return AsyncChat(
+            chat,
+            messages,
+            max_messages=kwargs.get('max_messages'),
+            timeout=kwargs.get('timeout'),
+            inactivity_timeout=kwargs.get('inactivity_timeout'),
+            projection=projection
+        )
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                self.max_threads, thread_name_prefix='AsyncChatDownloader')
+        return self._executor
+
+    @classmethod
+    def _produce(cls, generator, token, loop, entries, space):
+        """Retrieve all items from a generator (in a producer thread), and
+        add them to the event loop's queue"""
+        def put(entry):
+            while not token.cancelled:
+                if space.acquire(timeout=POLLING_TIME):
+                    try:
+                        loop.call_soon_threadsafe(entries.put_nowait, entry)
+                        return True
+                    except RuntimeError:  # Event loop is closed
+                        return False
+            return False
+
+        generator = CancellableGenerator(generator, token)
+        try:
+            for item in generator:
+                if not put((cls._ITEM, item)):
+                    break
+            else:
+                put((cls._DONE, None))
+
+        except BaseException as e:
+            put((cls._ERROR, e))
+
+        finally:
+            # The generator is closed by the thread which runs it
+            generator.close()
+
+    async def _iterate_in_thread(self, generator, max_size=16):
+        """Retrieve items from a (blocking) generator in a producer thread.
+        Closing this asynchronous generator cancels the producer, which then
+        closes the generator.
+        """
+        loop = asyncio.get_running_loop()
+        token = CancellationToken()
+        entries = asyncio.Queue()
+        space = threading.Semaphore(max_size)
+
+        loop.run_in_executor(self._get_executor(), self._produce,
+                             generator, token, loop, entries, space)
+        try:
+            while True:
+                entry_type, value = await entries.get()
+                space.release()
+
+                if entry_type == self._ITEM:
+                    yield value
+                elif entry_type == self._ERROR:
+                    raise value
+                else:
+                    break
+        finally:
+            token.cancel()
+
+    async def close(self):
+        """Close all sessions associated with the object"""
+        for client in self._clients.values():
+            await client.close()
+        self._clients = {}
+        self._downloader.close()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
@@ -3,6 +3,9 @@ import sys
 import itertools
 import time
 import json
+import re
+import queue
+import threading
 
 from urllib.parse import urlparse
 
@@ -10,9 +13,10 @@ from .metadata import __version__
 
 from .sites.common import (
     SiteDefault,
-    BaseChatDownloader
+    BaseChatDownloader,
+    Projection
 )
-from .sites import get_all_sites
+from .sites import resolve
 
 from .formatting.format import ItemFormatter
 from .utils.core import (
@@ -21,7 +25,14 @@ from .utils.core import (
     update_dict_without_overwrite
 )
 
-from .utils.timed_utils import TimedGenerator
+from .utils.timed_utils import (
+    POLLING_TIME,
+    TimedGenerator,
+    CancellationToken,
+    CancellableGenerator,
+    Cancelled
+)
+from .utils.threaded_utils import wait_for_entry
 
 from .debugging import (
     log,
@@ -42,6 +53,7 @@ from .errors import (
     URLNotProvided,
     SiteNotSupported,
     InvalidURL,
+    InvalidParameter,
     ChatDownloaderError,
     ChatGeneratorError,
     ParsingError
@@ -55,6 +67,7 @@ class ChatDownloader():
                  headers=None,
                  cookies=None,
                  proxy=None,
+                 cache_dir=None,
                  ):
         """Initialise a new session for making requests. Parameters are saved
         and are sent to the relevant constructor when creating a new session.
@@ -68,6 +81,11 @@ class ChatDownloader():
             Pass in an empty string (--proxy "") for direct connection. Defaults
             to None
         :type proxy: str, optional
+        :param cache_dir: Directory in which to store information between
+            sessions (e.g. the client context used to start YouTube chats),
+            so that new sessions can start chats sooner. Defaults to None
+            (do not store)
+        :type cache_dir: str, optional
         """
 
         self.init_params = locals()
@@ -79,6 +97,7 @@ class ChatDownloader():
 
         # Track sessions using a dictionary (allows for reusing)
         self.sessions = {}
+        self._sessions_lock = threading.Lock()
 
     def get_chat(self, url=None,
                  start_time=None,
@@ -89,9 +108,19 @@ class ChatDownloader():
                  timeout=None,
                  inactivity_timeout=None,
                  max_messages=None,
+                 cancellation_token=None,
+
+                 # Performance
+                 prefetch=0,
+                 page_lookahead=0,
+                 replay_workers=1,
+                 replay_shard_duration=600,
+                 poll_fill_target=0.5,
+                 poll_sessions=1,
 
                  message_groups=SiteDefault('message_groups'),
                  message_types=None,
+                 fields=None,
 
                  # Output
                  output=None,
@@ -141,11 +170,48 @@ class ChatDownloader():
         :param max_messages: Maximum number of messages to retrieve, defaults
             to None (unlimited)
         :type max_messages: int, optional
+        :param cancellation_token: Token which can be used to stop retrieving
+            the chat (and any other chats which share the token) from another
+            thread, defaults to None (a new token is created, see `Chat.cancel`)
+        :type cancellation_token: CancellationToken, optional
+        :param prefetch: Number of messages to retrieve in a background thread,
+            ahead of processing (e.g., printing or writing) them. This allows
+            network requests to overlap with processing. Defaults to 0 (disabled)
+        :type prefetch: int, optional
+        :param page_lookahead: When downloading a past broadcast, the number
+            of pages to request ahead (i.e., while parsing the current page),
+            defaults to 0 (disabled). A value of 1 or 2 is recommended.
+        :type page_lookahead: int, optional
+        :param replay_workers: When downloading a past broadcast, split it into
+            time-based shards and download this many shards at the same time.
+            Messages are still returned in order. Defaults to 1 (download
+            serially)
+        :type replay_workers: int, optional
+        :param replay_shard_duration: Duration (in seconds) of each shard when
+            downloading a past broadcast with multiple workers, defaults to 600
+        :type replay_shard_duration: float, optional
+        :param poll_fill_target: When downloading a YouTube livestream, how
+            full (as a fraction of the number of messages a response can hold)
+            responses should be before the next request is made. The time
+            between requests adapts to the chat's message rate. Lower values
+            make more requests, but are less likely to miss messages in busy
+            chats. Defaults to 0.5
+        :type poll_fill_target: float, optional
+        :param poll_sessions: Number of independent sessions which poll a
+            YouTube livestream's chat, with staggered requests. Their messages
+            are merged, and duplicates removed. For very busy chats, multiple
+            sessions receive messages that a single session would miss.
+            Defaults to 1
+        :type poll_sessions: int, optional
         :param message_groups: List of messages groups (a predefined,
             site-specific collection of message types) to include
         :type message_groups: SiteDefault, optional
         :param message_types: List of messages types to include, defaults to None
         :type message_types: list, optional
+        :param fields: List of fields to include in each message, where fields
+            of nested objects are separated by dots (e.g., author.id), defaults
+            to None (all fields). Fields which are not included are not parsed.
+        :type fields: list, optional
         :param output: Path of the output file, defaults to None (print to
             standard output)
         :type output: str, optional
@@ -195,86 +261,98 @@ class ChatDownloader():
         original_params = locals()
         original_params.pop('self')
 
-        # loop through all websites and
-        # get corresponding website parser
-        # based on matching url with predefined regex
-        for site in get_all_sites():
-            match_info = site.matches(url)
-            if match_info:  # match found
+        # get corresponding website parser, based on matching
+        # url with predefined regex (see `resolve`)
+        match_info = resolve(url)
+        if match_info:  # match found
 
-                function_name, match = match_info
+            site, function_name, match = match_info
 
-                # Create new session
-                self.create_session(site)
-                site_object = self.sessions[site.__name__]
+            # Create new session (or reuse an existing one)
+            site_object = self.create_session(site)
 
-                # Parse site-defaults
-                params = {}
-                for k, v in original_params.items():
-                    params[k] = site_object.get_site_value(v)
+            # Parse site-defaults
+            params = {}
+            for k, v in original_params.items():
+                params[k] = site_object.get_site_value(v)
 
-                log('info', f'Site: {site_object._NAME}')
-                log('debug', f'Program parameters: {params}')
+            log('info', f'Site: {site_object._NAME}')
+            log('debug', f'Program parameters: {params}')
 
-                get_chat = getattr(site_object, function_name, None)
-                if not get_chat:
-                    raise NotImplementedError(
-                        f'{function_name} has not been implemented in {site.__name__}.')
+            projection = Projection(params['fields']) if params['fields'] else None
 
+            get_chat = getattr(site_object, function_name, None)
+            if not get_chat:
+                raise NotImplementedError(
+                    f'{function_name} has not been implemented in {site.__name__}.')
+
+            # Requests made while retrieving the chat's information can
+            # also be cancelled
+            cancellation_token = params['cancellation_token'] or CancellationToken()
+            with cancellation_token.activate():
                 chat = get_chat(match, params)
-                log('debug',
-                    f'Match found: "{match}". Running "{function_name}" function in "{site.__name__}".')
-
-                if chat is None:
-                    raise ChatGeneratorError(
-                        f'No valid generator found in {site.__name__} for url "{url}"')
-
-                if isinstance(params['max_messages'], int):
-                    chat.chat = itertools.islice(
-                        chat.chat, params['max_messages'])
-                else:
-                    pass  # TODO throw error
-
-                if params['timeout'] is not None or params['inactivity_timeout'] is not None:
-                    # Generator requires timing functionality
-
-                    chat.chat = TimedGenerator(
-                        chat.chat, params['timeout'], params['inactivity_timeout'])
-
-                    if isinstance(params['timeout'], (float, int)):
-                        start = time.time()
-
-                        def log_on_timeout():
-                            log('debug',
-                                f'Timeout occurred after {time.time() - start} seconds.')
-                        setattr(chat.chat, 'on_timeout', log_on_timeout)
-
-                    if isinstance(params['inactivity_timeout'], (float, int)):
-                        def log_on_inactivity_timeout():
-                            log('debug',
-                                f"Inactivity timeout occurred after {params['inactivity_timeout']} seconds.")
-                        setattr(chat.chat, 'on_inactivity_timeout',
-                                log_on_inactivity_timeout)
-
-                formatter = ItemFormatter(params['format_file'])
-                chat.format = lambda x: formatter.format(
-                    x, format_name=params['format'])
-
-                if params['output']:
-                    chat.attach_writer(ContinuousWriter(
-                        params['output'],
-                        indent=params['indent'],
-                        sort_keys=params['sort_keys'],
-                        overwrite=params['overwrite'],
-                        lazy_initialise=True
-                    ))
-
-                chat.site = site_object
-
-                log('debug', f'Chat information: {chat.__dict__}')
-                log('info', f'Retrieving chat for "{chat.title}".')
+            log('debug',
+                f'Match found: "{match}". Running "{function_name}" function in "{site.__name__}".')
 
-                return chat
+            if chat is None:
+                raise ChatGeneratorError(
+                    f'No valid generator found in {site.__name__} for url "{url}"')
+
+            chat.cancellation_token = cancellation_token
+            chat.chat = CancellableGenerator(chat.chat, cancellation_token)
+
+            if projection is not None:
+                chat.chat = map(projection.project, chat.chat)
+
+            if isinstance(params['max_messages'], int):
+                chat.chat = itertools.islice(
+                    chat.chat, params['max_messages'])
+            else:
+                pass  # TODO throw error
+
+            if params['prefetch']:
+                chat.enable_prefetch(params['prefetch'])
+
+            if params['timeout'] is not None or params['inactivity_timeout'] is not None:
+                # Generator requires timing functionality
+
+                chat.chat = TimedGenerator(
+                    chat.chat, params['timeout'], params['inactivity_timeout'])
+
+                if isinstance(params['timeout'], (float, int)):
+                    start = time.time()
+
+                    def log_on_timeout():
+                        log('debug',
+                            f'Timeout occurred after {time.time() - start} seconds.')
+                    setattr(chat.chat, 'on_timeout', log_on_timeout)
+
+                if isinstance(params['inactivity_timeout'], (float, int)):
+                    def log_on_inactivity_timeout():
+                        log('debug',
+                            f"Inactivity timeout occurred after {params['inactivity_timeout']} seconds.")
+                    setattr(chat.chat, 'on_inactivity_timeout',
+                            log_on_inactivity_timeout)
+
+            formatter = ItemFormatter(params['format_file'])
+            chat.format = lambda x: formatter.format(
+                x, format_name=params['format'])
+
+            if params['output']:
+                chat.attach_writer(ContinuousWriter(
+                    params['output'],
+                    indent=params['indent'],
+                    sort_keys=params['sort_keys'],
+                    overwrite=params['overwrite'],
+                    lazy_initialise=True
+                ))
+
+            chat.site = site_object
+
+            log('debug', f'Chat information: {chat.__dict__}')
+            log('info', f'Retrieving chat for "{chat.title}".')
+
+            return chat
 
         parsed = urlparse(url)
         log('debug', str(parsed))
@@ -289,6 +367,153 @@ class ChatDownloader():
         else:
             raise InvalidURL(f'Invalid URL: "{url}"')
 
+    def get_chats(self, urls, workers=4, callback=None, on_error=None, **kwargs):
+        """Get chat messages from multiple livestreams, videos, clips or past
+        broadcasts at the same time, using a bounded pool of worker threads.
+
+        Sessions are reused between chats of the same site. All other keyword
+        arguments are passed to `get_chat` for each URL. When downloading more
+        than one chat to a file, the output path must contain ``{id}`` or
+        ``{title}``, so that each chat is written to its own file.
+
+        :param urls: The URLs of the livestreams, videos, clips or past broadcasts
+        :type urls: list
+        :param workers: Maximum number of chats to retrieve at the same time,
+            defaults to 4
+        :type workers: int, optional
+        :param callback: Function which is called with the chat and item, for
+            each item that is received. This is called from the worker thread
+            which retrieved the item. Defaults to None (return a generator
+            which yields all items)
+        :type callback: function, optional
+        :param on_error: Function which is called with the URL and error, if
+            a chat could not be retrieved. Defaults to None (log the error)
+        :type on_error: function, optional
+        :raises InvalidParameter: if multiple chats would be written to the
+            same output file
+        :return: If no callback is specified, a generator which yields
+            (chat, item) tuples from all chats, in the order they are received.
+            Otherwise, None is returned once all chats have finished.
+        :rtype: Union[generator, None]
+        """
+
+        urls = list(urls)
+        kwargs.pop('url', None)
+
+        output = kwargs.get('output')
+        if output and len(urls) > 1 and not re.search(r'{(?:id|title)}', output):
+            raise InvalidParameter(
+                'Output path must contain {id} or {title} when retrieving multiple chats.')
+
+        if on_error is None:
+            def on_error(url, error):
+                log('error', f'Unable to retrieve chat for "{url}": {error}')
+
+        # Used to stop all chats (e.g. if the merged generator is closed),
+        # without cancelling the caller's token
+        cancellation_token = CancellationToken()
+        parent_token = kwargs.pop('cancellation_token', None)
+        if parent_token is not None:
+            parent_token.add_callback(cancellation_token.cancel)
+
+        def unlink():
+            if parent_token is not None:
+                parent_token.remove_callback(cancellation_token.cancel)
+
+        if callback is None:
+            return self._get_merged_chats(urls, workers, on_error, cancellation_token, unlink, **kwargs)
+
+        try:
+            self._run_chat_workers(urls, workers, callback, on_error, cancellation_token, **kwargs)
+        finally:
+            unlink()
+
+    def _run_chat_workers(self, urls, workers, callback, on_error, cancellation_token, **kwargs):
+        """Retrieve the chats using worker threads, and wait for them to finish."""
+
+        url_queue = queue.Queue()
+        for url in urls:
+            url_queue.put(url)
+
+        def work():
+            while not cancellation_token.cancelled:
+                try:
+                    url = url_queue.get_nowait()
+                except queue.Empty:
+                    return
+
+                try:
+                    chat = self.get_chat(
+                        url, cancellation_token=cancellation_token, **kwargs)
+                    for item in chat:
+                        callback(chat, item)
+
+                except Cancelled:
+                    return  # Cancelled while retrieving the chat's information
+
+                except Exception as e:
+                    on_error(url, e)
+
+        # Use daemon threads, so that live chats do not prevent exiting
+        threads = [
+            threading.Thread(target=work, daemon=True)
+            for _ in range(max(min(workers or 1, len(urls)), 1))
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(1)  # Allows for keyboard interrupts
+        except BaseException:
+            cancellation_token.cancel()
+            raise
+
+    def _get_merged_chats(self, urls, workers, on_error, cancellation_token, on_finish, **kwargs):
+        """Retrieve the chats in the background and yield items from all of them."""
+        finished = object()  # Sentinel value
+
+        # Bounded, so that workers cannot get too far ahead of the consumer
+        items = queue.Queue(maxsize=max(workers or 1, 1) * 100)
+
+        def put(value):
+            while not cancellation_token.cancelled:
+                try:
+                    items.put(value, timeout=POLLING_TIME)
+                    return
+                except queue.Full:
+                    pass
+
+        def run_workers():
+            try:
+                self._run_chat_workers(
+                    urls, workers, lambda chat, item: put((chat, item)),
+                    on_error, cancellation_token, **kwargs)
+            finally:
+                put(finished)
+
+        threading.Thread(target=run_workers, daemon=True).start()
+
+        try:
+            while True:
+                # Wait until an item is received, a timeout occurs, or the
+                # chats are cancelled (in which case the workers stop)
+                try:
+                    with cancellation_token.activate():
+                        value = wait_for_entry(items)
+                except Cancelled as e:
+                    if e.token is not cancellation_token:
+                        raise
+                    break
+
+                if value is finished:
+                    break
+                yield value
+        finally:
+            cancellation_token.cancel()
+            on_finish()
+
     def create_session(self, chat_downloader_class, overwrite=False):
         if not issubclass(chat_downloader_class, BaseChatDownloader):
             raise TypeError(
@@ -298,23 +523,29 @@ class ChatDownloader():
                 'Unable to create session, class may not be BaseChatDownloader.')
 
         session_name = chat_downloader_class.__name__
-        log('debug', f'Created {session_name} session.')
 
-        if session_name not in self.sessions or overwrite:
-            self.sessions[session_name] = chat_downloader_class(
-                **self.init_params)
+        # Sessions may be created from multiple threads (see `get_chats`).
+        # Each site object is thread-safe, so is shared by all threads.
+        with self._sessions_lock:
+            if session_name not in self.sessions or overwrite:
+                log('debug', f'Created {session_name} session.')
+                self.sessions[session_name] = chat_downloader_class(
+                    **self.init_params)
 
-        return self.sessions[session_name]
+            return self.sessions[session_name]
 
     def get_session(self, chat_downloader_class):
-        return self.sessions.get(chat_downloader_class.__name__)
+        with self._sessions_lock:
+            return self.sessions.get(chat_downloader_class.__name__)
 
     def close(self):
         """Close all sessions associated with the object"""
-        for session in self.sessions.values():
-            session.close()
+        with self._sessions_lock:
+            sessions = list(self.sessions.values())
+            self.sessions = {}
 
-        self.sessions = {}
+        for session in sessions:
+            session.close()
 
 
 def run(propagate_interrupt=False, **kwargs):
@@ -348,17 +579,22 @@ def run(propagate_interrupt=False, **kwargs):
     downloader = ChatDownloader(**init_params)
 
     try:
-        chat = downloader.get_chat(**chat_params)
-
         if kwargs.get('quiet'):  # Only check if quiet once
-            def callback(item):
+            def callback(chat, item):
                 pass
         else:
-            def callback(item):
+            def callback(chat, item):
                 chat.print_formatted(item)
 
-        for message in chat:
-            callback(message)
+        urls = kwargs.get('urls')
+        if urls:  # Batch mode
+            for chat, message in downloader.get_chats(urls, kwargs.get('workers'), **chat_params):
+                callback(chat, message)
+
+        else:
+            chat = downloader.get_chat(**chat_params)
+            for message in chat:
+                callback(chat, message)
 
         log('info', 'Finished retrieving chat messages.')
 
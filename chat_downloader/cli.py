@@ -1,6 +1,7 @@
 """Console script for chat_downloader."""
 import argparse
 import re
+import sys
 from docstring_parser import parse as doc_parse
 
 
@@ -81,7 +82,7 @@ def main(cli_args=None):
     def add_init_param(group, *keys, **kwargs):
         add_param('init', group, *keys, **kwargs)
 
-    add_chat_param(parser, 'url')
+    add_chat_param(parser, 'url', nargs='?')
 
     time_group = parser.add_argument_group('Timing Arguments')
 
@@ -108,6 +109,14 @@ def main(cli_args=None):
         termination_group, '--inactivity_timeout', type=float)
     add_chat_param(termination_group, '--timeout', type=float)
 
+    performance_group = parser.add_argument_group('Performance Arguments')
+    add_chat_param(performance_group, '--prefetch', type=int)
+    add_chat_param(performance_group, '--page_lookahead', type=int)
+    add_chat_param(performance_group, '--replay_workers', type=int)
+    add_chat_param(performance_group, '--replay_shard_duration', type=float)
+    add_chat_param(performance_group, '--poll_fill_target', type=float)
+    add_chat_param(performance_group, '--poll_sessions', type=int)
+
     # TODO request_timeout
     # specify how long to spend on any single http request
 
@@ -120,6 +129,7 @@ def main(cli_args=None):
     # format_group.add_argument('--print_json', action='store_true', help='Print out json ', default=None)
     add_chat_param(format_group, '--format')
     add_chat_param(format_group, '--format_file')
+    add_chat_param(format_group, '--fields', type=splitter)
 
     # info = get_site_info(YouTubeChatDownloader)
     youtube_group = parser.add_argument_group(
@@ -165,10 +175,17 @@ def main(cli_args=None):
     debug_options.add_argument('--quiet', '-q', action='store_true',
                                help='Activate quiet mode (hide all output), defaults to False')
 
+    batch_group = parser.add_argument_group('Batch Arguments')
+    batch_group.add_argument('--batch', '-b',
+                             help='Path of a file containing URLs (one per line) to retrieve chats from at the same time. Use - to read URLs from standard input. Defaults to None')
+    batch_group.add_argument('--workers', type=int, default=4,
+                             help='Maximum number of chats to retrieve at the same time in batch mode, defaults to 4')
+
     # INIT PARAMS
     init_group = parser.add_argument_group('Initialisation Arguments')
     add_init_param(init_group, '--cookies', '-c')
     add_init_param(init_group, '--proxy', '-p')
+    add_init_param(init_group, '--cache_dir')
 
     # TODO add headers (user agent) as arg
 
@@ -177,6 +194,20 @@ def main(cli_args=None):
 
     args = parser.parse_args(args=cli_args)
 
+    if args.batch:
+        if args.batch == '-':
+            lines = sys.stdin.readlines()
+        else:
+            with open(args.batch) as batch_file:
+                lines = batch_file.readlines()
+
+        args.urls = [line.strip() for line in lines if line.strip()]
+        if args.url:
+            args.urls.insert(0, args.url)
+
+    elif not args.url:
+        parser.error('the following arguments are required: url (or --batch)')
+
     # Modify debugging args:
     if args.testing:  # (only for CLI)
         args.logging = 'debug'
@@ -1,22 +1,148 @@
-"""Lists the sites that are supported"""
+"""Lists the sites that are supported
+
+Site modules are only imported when they are first needed (e.g., when a URL
+for that site is resolved), which keeps ``import chat_downloader`` fast.
+"""
+
+import importlib
+from urllib.parse import urlparse
 
-from .youtube import YouTubeChatDownloader
-from .twitch import TwitchChatDownloader
-from .zoom import ZoomChatDownloader
 from .common import BaseChatDownloader
 
 
+# Registry of supported sites, in order of priority.
+# Maps class names to the module which defines the class and the
+# hostnames handled by the site (subdomains are also matched).
+_SITES = {
+    'YouTubeChatDownloader': ('youtube', (
+        'youtube.com', 'youtu.be', 'youtube-nocookie.com',
+        'youtubekids.com', 'youtube.googleapis.com'
+    )),
+    'TwitchChatDownloader': ('twitch', ('twitch.tv',)),
+    'ZoomChatDownloader': ('zoom', ('zoom.us',)),
+}
+
+
+def _load_site(class_name):
+    """Import the module which defines a site, and return the site's class."""
+    site = globals().get(class_name)
+    if site is None:
+        module_name = _SITES[class_name][0]
+        module = importlib.import_module(f'.{module_name}', __name__)
+        site = getattr(module, class_name)
+        globals()[class_name] = site
+    return site
+
+
+def __getattr__(name):
+    # Allows `from chat_downloader.sites import YouTubeChatDownloader`
+    if name in _SITES:
+        return _load_site(name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SITES))
+
+
 def get_all_sites(include_parent=False):
-    """Get all supported sites.
+    """Get all supported sites. This imports every site module.
 
     :param include_parent: Whether to include the BaseChatDownloader, defaults to False
     :type include_parent: bool, optional
     :return: A list of all supported ChatDownloader classes
     :rtype: list
     """
-    return [
-        value
-        for value in globals().values()
-        # not the base class
-        if isinstance(value, type) and issubclass(value, BaseChatDownloader) and (include_parent or value != BaseChatDownloader)
-    ]
+    sites = [_load_site(class_name) for class_name in _SITES]
+    if include_parent:
+        sites.append(BaseChatDownloader)
+    return sites
+
+
+class SiteRouter:
+    """Class used to find the site (and function) which handles a URL.
+
+    URLs are first matched against the sites which handle the URL's
+    hostname. Other sites are only tried if none of these match. Sites are
+    loaded (and their regular expressions compiled) when first tried.
+    """
+
+    def __init__(self, site_hosts):
+        """Create a SiteRouter object
+
+        :param site_hosts: Dictionary mapping class names of sites to the
+            hostnames they handle, in order of priority
+        :type site_hosts: dict
+        """
+        self.site_names = list(site_hosts)
+
+        self._sites_by_host = {}
+        for class_name, hosts in site_hosts.items():
+            for host in hosts:
+                self._sites_by_host.setdefault(host, []).append(class_name)
+
+    def _get_candidates(self, url):
+        try:
+            hostname = urlparse(url).hostname
+        except ValueError:
+            hostname = None
+
+        candidates = []
+        if hostname:
+            # Check the hostname and all its parent domains,
+            # e.g. www.youtube.com -> youtube.com -> com
+            parts = hostname.split('.')
+            for index in range(len(parts)):
+                for class_name in self._sites_by_host.get('.'.join(parts[index:]), ()):
+                    if class_name not in candidates:
+                        candidates.append(class_name)
+
+        return candidates
+
+    def resolve(self, url):
+        """Find the site which handles a URL
+
+        :param url: The URL
+        :type url: str
+        :return: If a match is found, the site's class, the function name
+            and the match object are returned, otherwise None.
+        :rtype: (type, str, re.Match)
+        """
+        candidates = self._get_candidates(url)
+        others = [name for name in self.site_names if name not in candidates]
+
+        for class_name in candidates + others:
+            site = _load_site(class_name)
+            match_info = site.matches(url)
+            if match_info:
+                return (site, *match_info)
+
+        return None
+
+
+_router = None
+
+
+def get_router():
+    """Get the router for all supported sites (which is only created once).
+
+    :return: The router
+    :rtype: SiteRouter
+    """
+    global _router
+    if _router is None:
+        _router = SiteRouter(
+            {name: hosts for name, (_, hosts) in _SITES.items()})
+    return _router
+
+
+def resolve(url):
+    """Find the site which handles a URL, without creating a session.
+
+    :param url: The URL of the livestream, video, clip or past broadcast
+    :type url: str
+    :return: If a match is found, the site's class, the function name
+        and the match object are returned, otherwise None.
+    :rtype: (type, str, re.Match)
+    """
+    return get_router().resolve(url)
@@ -1,8 +1,12 @@
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import (HTTPConnectionPool, HTTPSConnectionPool)
 from http.cookiejar import (MozillaCookieJar, Cookie)
 import os
 import re
+import socket
+import threading
 from json import JSONDecodeError
 
 from ..errors import (
@@ -19,16 +23,66 @@ from ..utils.core import (
     get_title_of_webpage,
     pause,
     safe_print,
-    safe_path
+    safe_path,
+    ensure_seconds,
+    replace_with_underscores,
+    LRUCache
 )
 
 from ..utils.timed_utils import (
     timed_input,
-    interruptible_sleep
+    interruptible_sleep,
+    check_for_cancellation,
+    on_cancel
+)
+from ..utils.threaded_utils import (
+    PrefetchGenerator,
+    ordered_parallel_generator
 )
 from ..debugging import log
 
 
+def _shutdown_connection(connection):
+    """Interrupt a blocking request, by shutting down its socket"""
+    sock = getattr(connection, 'sock', None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # Already closed
+
+
+def _make_interruptible(pool_class):
+    class InterruptiblePool(pool_class):
+        def _make_request(self, conn, *args, **kwargs):
+            check_for_cancellation()
+            with on_cancel(lambda: _shutdown_connection(conn)):
+                return super()._make_request(conn, *args, **kwargs)
+
+    InterruptiblePool.__name__ = f'Interruptible{pool_class.__name__}'
+    return InterruptiblePool
+
+
+_INTERRUPTIBLE_POOL_CLASSES = {
+    'http': _make_interruptible(HTTPConnectionPool),
+    'https': _make_interruptible(HTTPSConnectionPool)
+}
+
+
+class _InterruptibleHTTPAdapter(HTTPAdapter):
+    """Transport adapter whose requests are interrupted when the chat
+    making them is cancelled (see `CancellationToken`)."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _INTERRUPTIBLE_POOL_CLASSES
+
+    def proxy_manager_for(self, *args, **kwargs):
+        manager = super().proxy_manager_for(*args, **kwargs)
+        manager.pool_classes_by_scheme = _INTERRUPTIBLE_POOL_CLASSES
+        return manager
+
+
 class Image():
     def __init__(self, url, width=None, height=None, image_id=None):
         """Create an Image object
@@ -147,12 +201,12 @@ class Remapper():
 
         elif keep_unknown_keys:
             if replace_char_with_underscores:
-                remap_key = remap_key.replace(
-                    replace_char_with_underscores, '_')
+                remap_key = replace_with_underscores(
+                    remap_key, replace_char_with_underscores)
             info[remap_key] = remap_input
 
     @staticmethod
-    def remap_dict(input_dictionary, remapping_dict, keep_unknown_keys=False, replace_char_with_underscores=None):
+    def remap_dict(input_dictionary, remapping_dict, keep_unknown_keys=False, replace_char_with_underscores=None, projection=None):
         """Given an input dictionary and a remapping dictionary, return the remapped dictionary
 
         :param input_dictionary: Input dictionary
@@ -165,18 +219,225 @@ class Remapper():
         :param replace_char_with_underscores: If no remapping is found,
             replace a character in the key with underscores. Defaults to None
         :type replace_char_with_underscores: str, optional
+        :param projection: Only output keys selected by this projection,
+            defaults to None (all keys)
+        :type projection: Projection, optional
         :return: Remapped dictionary
         :rtype: dict
         """
+        return Remapper.compile(remapping_dict, keep_unknown_keys, replace_char_with_underscores, projection)(input_dictionary)
 
-        info = {}
-        for key in input_dictionary:
-            Remapper.remap(
-                info, remapping_dict, key, input_dictionary[key],
-                keep_unknown_keys=keep_unknown_keys,
-                replace_char_with_underscores=replace_char_with_underscores
-            )
-        return info
+    # Compiled remapping functions, by the ID of the remapping dictionary
+    # (and options). The dictionary is kept, so that its ID is not reused
+    # while it is cached. Each projection (i.e., set of requested fields)
+    # has its own functions, so the least recently used are discarded.
+    _COMPILED = LRUCache(1024)
+    _COMPILED_LOCK = threading.Lock()
+
+    @staticmethod
+    def compile(remapping_dict, keep_unknown_keys=False, replace_char_with_underscores=None, projection=None):
+        """Convert a remapping dictionary into a function which remaps an
+        input dictionary. This is equivalent to calling `remap` for each key of
+        the input dictionary, but avoids checking the type of each remapping
+        for every key. Functions are created once, when first requested.
+
+        :param remapping_dict: Dictionary of remappings
+        :type remapping_dict: dict
+        :param keep_unknown_keys: If no remapping is found, keep the data
+            with its original key and value. Defaults to False
+        :type keep_unknown_keys: bool, optional
+        :param replace_char_with_underscores: If no remapping is found,
+            replace a character in the key with underscores. Defaults to None
+        :type replace_char_with_underscores: str, optional
+        :param projection: Only output keys selected by this projection.
+            Remappings to other keys are skipped entirely, so their remap
+            functions are not called. Defaults to None (all keys)
+        :type projection: Projection, optional
+        :raises ValueError: if an unknown remapping is specified
+        :return: Function which accepts the input dictionary and (optionally)
+            the output dictionary to add to, and returns the output dictionary
+        :rtype: function
+        """
+        cache_key = (id(remapping_dict), keep_unknown_keys,
+                     replace_char_with_underscores, projection)
+        with Remapper._COMPILED_LOCK:
+            compiled = Remapper._COMPILED.get(cache_key)
+        if compiled is not None:
+            return compiled[1]
+
+        # Split the remappings by kind, so that each key only needs the
+        # checks relevant to it.
+        renames = {}  # input key -> new key
+        functions = {}  # input key -> (new key, remap function)
+        unpacks = {}  # input key -> remap function (or None)
+        skipped = set()  # input keys whose output is not selected
+        for key, remap in remapping_dict.items():
+            if not remap:
+                continue  # Treated as unknown
+            elif isinstance(remap, str):
+                new_key = remap
+            elif not isinstance(remap, Remapper):
+                raise ValueError('Unknown remapping specified.')
+            elif remap.to_unpack:
+                unpacks[key] = remap.remap_function
+                continue
+            else:
+                new_key = remap.new_key
+
+            if projection is not None and new_key not in projection:
+                skipped.add(key)
+            elif isinstance(remap, Remapper) and remap.remap_function:
+                functions[key] = (new_key, remap.remap_function)
+            else:
+                renames[key] = new_key
+
+        get_rename = renames.get
+        get_function = functions.get
+
+        def remap_dictionary(input_dictionary, info=None):
+            if info is None:
+                info = {}
+
+            for key, value in input_dictionary.items():
+                new_key = get_rename(key, renames)
+                if new_key is not renames:
+                    info[new_key] = value
+                    continue
+
+                function = get_function(key)
+                if function is not None:
+                    info[function[0]] = function[1](value)
+
+                elif key in unpacks:
+                    remap_function = unpacks[key]
+                    if remap_function:
+                        value = remap_function(value)
+                    if not isinstance(value, dict):
+                        raise ValueError(
+                            'Unable to unpack item which is not a dictionary.')
+                    info.update(value)
+
+                elif keep_unknown_keys and key not in skipped:
+                    if replace_char_with_underscores:
+                        key = replace_with_underscores(
+                            key, replace_char_with_underscores)
+                    if projection is None or key in projection:
+                        info[key] = value
+
+            return info
+
+        with Remapper._COMPILED_LOCK:
+            Remapper._COMPILED.set(cache_key, (remapping_dict, remap_dictionary))
+        return remap_dictionary
+
+
+class Projection:
+    """Selection of the fields of chat items to output. Fields are specified
+    by name, and fields of nested dictionaries are separated by dots, e.g.
+    ``['timestamp', 'author.id', 'message']``.
+
+    While parsing, a projection is used to skip building fields which will
+    not be output. At this stage, nested fields have not yet been moved to
+    their dictionaries (see `BaseChatDownloader._move_to_dict`), so the
+    key ``author_id`` is selected by both ``author`` and ``author.id``.
+    Cheap fields which are needed internally (e.g., for filtering by time)
+    are always selected.
+    """
+
+    _ALWAYS_SELECTED = ('message_id', 'message_type', 'action_type',
+                        'timestamp', 'time_in_seconds', 'time_text')
+
+    def __init__(self, fields, dependencies=None):
+        """Create a Projection object
+
+        :param fields: The fields to output, either as a list, or a
+            comma-separated string
+        :type fields: Union[list, str]
+        :param dependencies: Mapping of keys to the keys required to build
+            them, defaults to None
+        :type dependencies: dict, optional
+        :raises InvalidParameter: if no fields are specified
+        """
+        if isinstance(fields, str):
+            fields = fields.split(',')
+
+        self.fields = frozenset(filter(None, (f.strip() for f in fields)))
+        if not self.fields:
+            raise InvalidParameter('No fields specified.')
+
+        # Nested dictionary of selected fields.
+        # A value of None means that the whole field is selected.
+        self.tree = {}
+        for field in sorted(self.fields, key=lambda x: x.count('.')):
+            node = self.tree
+            *parents, name = field.split('.')
+            for parent in parents:
+                if parent in node and node[parent] is None:
+                    break  # Parent is already selected
+                node = node.setdefault(parent, {})
+            else:
+                node[name] = None
+
+        # e.g. 'in_reply_to.author.name' selects the keys 'in_reply_to',
+        # 'in_reply_to_author' and 'in_reply_to_author_name', as well as all
+        # keys which start with 'in_reply_to_author_name_'
+        self._keys = set(self._ALWAYS_SELECTED)
+        prefixes = []
+        for field in self.fields:
+            parts = field.split('.')
+            self._keys.update('_'.join(parts[:i + 1])
+                              for i in range(len(parts)))
+            prefixes.append('_'.join(parts) + '_')
+        self._prefixes = tuple(sorted(prefixes))
+
+        for key, required_keys in (dependencies or {}).items():
+            if key in self:
+                self._keys.update(required_keys)
+        self._keys = frozenset(self._keys)
+
+    def __contains__(self, key):
+        """Whether a key must be parsed"""
+        return key in self._keys or key.startswith(self._prefixes)
+
+    # Projections which select the same keys are equal, which allows
+    # them to be used as cache keys (e.g., by `Remapper.compile`)
+    def __eq__(self, other):
+        return isinstance(other, Projection) and (self._keys, self._prefixes) == (other._keys, other._prefixes)
+
+    def __hash__(self):
+        return hash((self._keys, self._prefixes))
+
+    def __repr__(self):
+        return f'Projection({sorted(self.fields)})'
+
+    def project(self, item):
+        """Remove all fields which are not selected from a (parsed) item
+
+        :param item: The item
+        :type item: dict
+        :return: A new item, with only the selected fields
+        :rtype: dict
+        """
+        return self._project(item, self.tree)
+
+    @staticmethod
+    def _project(item, tree):
+        if isinstance(item, list):
+            return [Projection._project(x, tree) for x in item]
+        elif not isinstance(item, dict):
+            return item
+
+        projected = {}
+        for key, value in item.items():
+            if key not in tree:
+                continue
+            children = tree[key]
+            if children is not None:
+                value = Projection._project(value, children)
+                if value == {}:
+                    continue  # None of the selected fields are present
+            projected[key] = value
+        return projected
 
 
 class SiteDefault:
@@ -201,7 +462,7 @@ class Chat():
     next value is yielded from the object's `chat` generator method.
     """
 
-    def __init__(self, chat=None, title=None, duration=None, status=None, video_type=None, start_time=None, id=None, **kwargs):
+    def __init__(self, chat=None, title=None, duration=None, status=None, video_type=None, start_time=None, id=None, async_chat=None, **kwargs):
         """Create a Chat object
 
         :param chat: Generator method for retrieving chat messages, defaults to None
@@ -219,9 +480,15 @@ class Chat():
         :param start_time: Start time of the stream (or upload date of video)
             in UNIX microseconds, defaults to None
         :type start_time: float, optional
+        :param async_chat: Function which, given an `AsyncClient`, returns an
+            asynchronous generator for retrieving chat messages. This is used
+            by `AsyncChatDownloader` instead of `chat`, if provided. Defaults
+            to None
+        :type async_chat: function, optional
         """
 
         self.chat = chat
+        self.async_chat = async_chat
 
         self.title = title
         self.duration = duration
@@ -238,6 +505,10 @@ class Chat():
         self._output_writer = None
         self._output_callback = None
 
+        self._prefetcher = None
+
+        self.cancellation_token = None  # Set by `ChatDownloader.get_chat`
+
     def __iter__(self):
         """Allows the object to be iterable
 
@@ -273,6 +544,33 @@ class Chat():
         # writer is a ContinuousWriter
         self._output_writer = writer
 
+    def enable_prefetch(self, max_size=16):
+        """Retrieve chat items in a background thread, so that network
+        requests overlap with the processing of items by the consumer.
+        Retrieved items are stored in a bounded queue until they are consumed.
+
+        :param max_size: Maximum number of items to retrieve ahead of the
+            consumer, defaults to 16
+        :type max_size: int, optional
+        """
+        if self._prefetcher is not None:
+            return  # Already enabled
+
+        self._prefetcher = PrefetchGenerator(
+            self.chat, max_size, name=f'prefetch-{self.id}')
+        self.chat = self._prefetcher
+
+    def get_prefetch_stats(self):
+        """Get statistics about the prefetch queue (see `enable_prefetch`)
+
+        :return: The queue's statistics (see `PrefetchGenerator.get_stats`),
+            or None if prefetching is not enabled
+        :rtype: dict
+        """
+        if self._prefetcher is None:
+            return None
+        return self._prefetcher.get_stats()
+
     def __next__(self):
         """Get the next chat message from the generator
 
@@ -281,20 +579,40 @@ class Chat():
         """
         try:
             item = next(self.chat)
-
-            if self._output_writer is not None:  # writer has been attached
-                self._init_writer()
-
-            if self._output_callback is not None:  # output callback
-                self._output_callback(item)
-
+            self._on_item(item)
             return item
         except StopIteration as e:
-            # Safely close output file when done
-            if self._output_writer is not None:
-                self._output_writer.close()
+            self._on_finish()
             raise e
 
+    def _on_item(self, item):
+        if self._output_writer is not None:  # writer has been attached
+            self._init_writer()
+
+        if self._output_callback is not None:  # output callback
+            self._output_callback(item)
+
+    def _on_finish(self):
+        # Safely close output file when done
+        if self._output_writer is not None:
+            self._output_writer.close()
+
+    def close(self):
+        """Stop retrieving chat messages. This also stops the background
+        thread, if prefetching is enabled."""
+        close = getattr(self.chat, 'close', None)
+        if callable(close):
+            close()
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+
+    def cancel(self):
+        """Stop retrieving chat messages from any thread. Unlike `close`, this
+        also interrupts requests (and connections) which are in progress, so
+        the thread which is iterating the chat stops almost immediately."""
+        if self.cancellation_token is not None:
+            self.cancellation_token.cancel()
+
     def print_formatted(self, item, flush=True):
         """Safely print the formatted message
 
@@ -394,25 +712,59 @@ class BaseChatDownloader:
         }
     ]
 
+    # Keys which must be parsed in order to build another key
+    # (see `Projection`). Subclasses may redefine this.
+    _FIELD_DEPENDENCIES = {}
+
+    @classmethod
+    def _get_projection(cls, params):
+        """Get the projection to use while parsing, based on the `fields` parameter
+
+        :param params: Parameters of the chat
+        :type params: dict
+        :return: The projection, or None if all fields should be parsed
+        :rtype: Projection
+        """
+        fields = params.get('fields')
+        if not fields:
+            return None
+        return Projection(fields, cls._FIELD_DEPENDENCIES)
+
     @staticmethod
-    def _must_add_item(item, message_groups_dict, messages_groups_to_add, messages_types_to_add):
+    def _get_message_filter(message_groups_dict, messages_groups_to_add, messages_types_to_add):
+        """Get the set of message types which should be added. This is
+        computed once per chat, so that checking a message only requires
+        a single set lookup, i.e., `item.get('message_type') in message_filter`.
+
+        :param message_groups_dict: Mapping of message groups to message types
+        :type message_groups_dict: dict
+        :param messages_groups_to_add: Message groups to add
+        :type messages_groups_to_add: list
+        :param messages_types_to_add: Message types to add. If specified,
+            `messages_groups_to_add` is ignored
+        :type messages_types_to_add: list
+        :return: Set of valid message types, or None if all messages
+            should be added
+        :rtype: frozenset
+        """
 
         # Force mutual exclusion
         if messages_types_to_add:
             # messages_types is set
             messages_groups_to_add = []
 
-        if 'all' in messages_groups_to_add or 'all' in messages_types_to_add:  # user wants everything
-            return True
+        messages_groups_to_add = messages_groups_to_add or []
+        messages_types_to_add = messages_types_to_add or []
 
-        valid_message_types = []
-        for message_group in messages_groups_to_add or []:
-            valid_message_types += message_groups_dict.get(message_group, [])
+        if 'all' in messages_groups_to_add or 'all' in messages_types_to_add:  # user wants everything
+            return None
 
-        for message_type in messages_types_to_add or []:
-            valid_message_types.append(message_type)
+        valid_message_types = set(messages_types_to_add)
+        for message_group in messages_groups_to_add:
+            valid_message_types.update(
+                message_groups_dict.get(message_group, []))
 
-        return item.get('message_type') in valid_message_types
+        return frozenset(valid_message_types)
 
     def __init__(self,
                  **kwargs
@@ -422,18 +774,16 @@ class BaseChatDownloader:
         :raises CookieError: if unable to read or parse the cookie file
         """
 
-        # Start a new session
-        self.session = requests.Session()
-
         headers = kwargs.get('headers')
         if headers is None:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/86.0.4240.111 Safari/537.36',
                 'Accept-Language': 'en-US, en, *'  # 'de-CH'#'fr-CH'#
             }
-        self.session.headers = headers
+        self._session_headers = dict(headers)
 
         # Set proxies if present
+        self._session_proxies = {}
         proxy = kwargs.get('proxy')
         if proxy is not None:
             if proxy == '':
@@ -441,7 +791,7 @@ class BaseChatDownloader:
             else:
                 proxies = {'http': proxy, 'https': proxy}
 
-            self.session.proxies.update(proxies)
+            self._session_proxies.update(proxies)
 
         # Set cookies if present
         cookies = kwargs.get('cookies')
@@ -454,13 +804,63 @@ class BaseChatDownloader:
             else:
                 raise CookieError(
                     f'The file "{cookies}" could not be found.')
-        self.session.cookies = cj
+
+        # Cookie jars are thread-safe, so all sessions share the same one
+        self._cookies = cj
+
+        # Each thread uses its own session (requests.Session is not thread-safe)
+        self._thread_data = threading.local()
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The session used by the current thread. Sessions share headers,
+        proxies and cookies, and are created when a thread first makes a request.
+
+        :return: The current thread's session
+        :rtype: requests.Session
+        """
+        session = getattr(self._thread_data, 'session', None)
+        if session is None:
+            session = self._create_thread_session()
+        return session
+
+    def _create_thread_session(self):
+        session = requests.Session()
+        session.cookies = self._cookies
+        for prefix in ('http://', 'https://'):
+            session.mount(prefix, _InterruptibleHTTPAdapter())
+
+        with self._sessions_lock:
+            session.headers = dict(self._session_headers)
+            session.proxies.update(self._session_proxies)
+
+            # Close sessions of threads which have finished
+            for thread in [t for t in self._sessions if not t.is_alive()]:
+                self._sessions.pop(thread).close()
+
+            self._sessions[threading.current_thread()] = session
+
+        self._thread_data.session = session
+        return session
 
     def get_session_headers(self, key):
         return self.session.headers.get(key)
 
     def update_session_headers(self, new_headers):
-        self.session.headers.update(new_headers)
+        """Update the headers of all sessions. Headers which only apply to
+        a single chat should rather be passed to each request.
+
+        :param new_headers: The headers to add or overwrite
+        :type new_headers: dict
+        """
+        with self._sessions_lock:
+            self._session_headers.update(new_headers)
+
+            # Copy-on-write, since other threads may be making requests
+            for session in self._sessions.values():
+                session.headers = {**session.headers, **new_headers}
 
     def clear_cookies(self):
         """Clear the session's cookies."""
@@ -492,11 +892,22 @@ class BaseChatDownloader:
         :return: The cookie value, or default
         :rtype: Union[str, object, None]
         """
-        return self._get_cookies_dict().get(name, default)
+        # As with `_get_cookies_dict`, the last cookie with the name is used
+        value = default
+        for cookie in self.session.cookies:
+            if cookie.name == name:
+                value = cookie.value
+        return value
 
     def close(self):
-        """Close the session. Once this has been called, no more requests can be made."""
-        self.session.close()
+        """Close all sessions. Once this has been called, no more requests can be made."""
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            self._sessions = {}
+        self._thread_data = threading.local()
+
+        for session in sessions:
+            session.close()
         log('debug', 'Session closed.')
 
     def _session_post(self, url, **kwargs):
@@ -539,15 +950,32 @@ class BaseChatDownloader:
             match object is returned, otherwise None.
         :rtype: (str, re.Match)
         """
-        for function_name, regex in cls._VALID_URLS.items():
-
-            if isinstance(regex, str):
-                match = re.search(regex, url)
-                if match:
-                    return function_name, match
+        for function_name, regex in cls._get_compiled_urls():
+            match = regex.search(url)
+            if match:
+                return function_name, match
 
         return None
 
+    @classmethod
+    def _get_compiled_urls(cls):
+        """Get the compiled regular expressions of the class' `_VALID_URLS`
+        dictionary. These are only compiled once per class.
+
+        :return: List of (function name, compiled regex) pairs
+        :rtype: list
+        """
+        compiled_urls = cls.__dict__.get('_COMPILED_URLS')
+        if compiled_urls is None:
+            compiled_urls = [
+                (function_name, re.compile(regex))
+                for function_name, regex in cls._VALID_URLS.items()
+                if isinstance(regex, str)
+            ]
+            cls._COMPILED_URLS = compiled_urls
+
+        return compiled_urls
+
     def generate_urls(self, **kwargs):
         """This method should be implemented in a subclass and should return
         a generator which yields URLs for testing.
@@ -584,6 +1012,28 @@ class BaseChatDownloader:
 
         return new_dict
 
+    @staticmethod
+    def _get_retry_time(attempt_number, retry_timeout=None):
+        """Get the number of seconds to wait before retrying
+
+        :param attempt_number: The current attempt number
+        :type attempt_number: int
+        :param retry_timeout: Number of seconds to wait before retrying, defaults
+            to None (use exponential backoff, i.e. immediate, 1s, 2s, 4s, 8s, ...)
+        :type retry_timeout: float, optional
+        :return: The number of seconds, or -1 if the user should be asked
+        :rtype: float
+        """
+        if retry_timeout is None:  # use exponential backoff
+            if attempt_number > 1:
+                return 2**(attempt_number - 2)
+            return 0
+
+        elif isinstance(retry_timeout, (int, float)):  # valid timeout value
+            return retry_timeout
+
+        return -1  # wait for user input
+
     @staticmethod
     def retry(attempt_number, max_attempts=1, error=None, retry_timeout=None, text=None, interruptible_retry=True, **kwargs):
         """Retry to occur after an error occurs
@@ -600,7 +1050,11 @@ class BaseChatDownloader:
         :param text: Items to display on retry, defaults to None
         :type text: object, optional
         :raises RetriesExceeded: if the maximum number of retries has been exceeded
+        :raises Cancelled: if the chat has been cancelled
         """
+        # Do not retry if the chat has been cancelled
+        check_for_cancellation()
+
         if attempt_number >= max_attempts:
             raise RetriesExceeded(
                 f'Maximum number of retries has been reached ({max_attempts}).')
@@ -610,16 +1064,8 @@ class BaseChatDownloader:
         elif not isinstance(text, (tuple, list)):
             text = [text]
 
-        if retry_timeout is None:  # use exponential backoff
-            if attempt_number > 1:
-                time_to_sleep = 2**(attempt_number - 2)
-            else:
-                time_to_sleep = 0
-
-        elif isinstance(retry_timeout, (int, float)):  # valid timeout value
-            time_to_sleep = retry_timeout
-        else:
-            time_to_sleep = -1  # wait for user input
+        time_to_sleep = BaseChatDownloader._get_retry_time(
+            attempt_number, retry_timeout)
 
         must_sleep = time_to_sleep >= 0
         if must_sleep:
@@ -651,6 +1097,110 @@ class BaseChatDownloader:
         else:
             pause()
 
+    def _prefetch_pages(self, pages, params):
+        """Pipeline a paginated API, so that the next page is requested as
+        soon as its cursor is known (i.e., while the current page is still
+        being parsed). Only used if the `page_lookahead` parameter is set.
+
+        :param pages: Generator which requests and yields each page
+        :type pages: generator
+        :param params: Parameters passed to `get_chat`
+        :type params: dict
+        :return: Generator which yields the same pages
+        :rtype: generator
+        """
+        page_lookahead = params.get('page_lookahead')
+        if not page_lookahead:
+            return pages
+
+        log('debug', f'Requesting up to {page_lookahead} page(s) ahead.')
+        return PrefetchGenerator(pages, page_lookahead, name=f'{self._NAME} pages')
+
+    def _get_sharded_replay(self, get_shard, start_time, end_time, duration, params):
+        """Download a past broadcast's chat in time-based shards, at the same
+        time. Only used if the `replay_workers` parameter is greater than 1.
+
+        ``[start_time, end_time]`` is split into half-open intervals of
+        `replay_shard_duration` seconds (the last shard also includes
+        `end_time`). Messages outside of their shard's interval are ignored
+        and duplicate messages (i.e., with the same ID) are removed, so that
+        messages are yielded in time order, as if downloaded serially.
+
+        :param get_shard: Function which returns a generator of messages
+            (in time order) from a given start time to a given end time
+        :type get_shard: function
+        :param start_time: Start time in seconds or hh:mm:ss, or None (as
+            early as possible)
+        :type start_time: float
+        :param end_time: End time in seconds or hh:mm:ss, or None (until
+            the end)
+        :type end_time: float
+        :param duration: Duration of the video in seconds, used to split
+            the video if no end time is given
+        :type duration: float
+        :param params: Parameters passed to `get_chat`
+        :type params: dict
+        :return: Generator which yields the messages
+        :rtype: generator
+        """
+        workers = params.get('replay_workers') or 1
+        shard_duration = params.get('replay_shard_duration') or 0
+
+        first_time = ensure_seconds(start_time, 0)
+        last_time = ensure_seconds(end_time, duration)
+
+        if workers <= 1 or shard_duration <= 0 or not last_time or last_time == float('inf') or last_time - first_time <= shard_duration:
+            return get_shard(start_time, end_time)
+
+        shards = []
+        shard_start = first_time
+        while shard_start < last_time:
+            shard_end = min(shard_start + shard_duration, last_time)
+            shards.append((shard_start, shard_end))
+            shard_start = shard_end
+
+        # The last shard ends at the original end time (None means the end)
+        shards[-1] = (shards[-1][0], ensure_seconds(end_time))
+
+        log('debug',
+            f'Downloading {len(shards)} shards using {workers} workers.')
+
+        def create_factory(shard_start, shard_end, is_first, is_last):
+            def get_shard_messages():
+                # The first shard starts at the original start time, since
+                # messages may be sent before the stream starts (negative times)
+                for message in get_shard(start_time if is_first else shard_start, shard_end):
+                    time_in_seconds = message.get('time_in_seconds')
+                    if time_in_seconds is not None:
+                        if not is_first and time_in_seconds < shard_start:
+                            continue
+                        if shard_end is not None and (time_in_seconds > shard_end or (time_in_seconds == shard_end and not is_last)):
+                            break  # Belongs to the next shard
+                    yield message
+            return get_shard_messages
+
+        factories = [
+            create_factory(shard_start, shard_end, index == 0, index == len(shards) - 1)
+            for index, (shard_start, shard_end) in enumerate(shards)
+        ]
+
+        return self._remove_duplicates(
+            ordered_parallel_generator(factories, workers))
+
+    @staticmethod
+    def _remove_duplicates(messages, max_remembered=10000):
+        # Only recent message IDs need to be remembered (for shard boundaries)
+        seen = {}
+        for message in messages:
+            message_id = message.get('message_id')
+            if message_id is not None:
+                if message_id in seen:
+                    continue
+                seen[message_id] = None
+                if len(seen) > max_remembered:
+                    del seen[next(iter(seen))]
+            yield message
+
     @staticmethod
     def check_for_invalid_types(messages_types_to_add, allowed_message_types):
         """Used to check for invalid message types
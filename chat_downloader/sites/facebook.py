@@ -14,7 +14,10 @@ from ..utils.core import (
     regex_search,
     base64_encode,
 )
-from ..utils.timed_utils import interruptible_sleep
+from ..utils.timed_utils import (
+    interruptible_sleep,
+    check_for_timeout
+)
 
 from ..errors import (
     SiteError,
@@ -496,6 +499,12 @@ class FacebookChatDownloader(BaseChatDownloader):
         'Event'
     ]
 
+    _MESSAGE_GROUPS = {
+        'messages': [
+            'text_message'
+        ]
+    }
+
     _REMAPPING = {
         'id': 'message_id',
         'community_moderation_state': 'community_moderation_state',
@@ -551,9 +560,17 @@ class FacebookChatDownloader(BaseChatDownloader):
         'short_name': 'short_name'
     }
 
+    _FIELD_DEPENDENCIES = {
+        'in_reply_to': ('comment_parent',),
+        'time_in_seconds': ('timestamp_in_video',),
+        # Comments are text messages if they have a message
+        'message_type': ('message',),
+    }
+
     @ staticmethod
-    def _parse_node(node, parse_time=False, start_time=None):
-        info = r.remap_dict(node, FacebookChatDownloader._REMAPPING)
+    def _parse_node(node, parse_time=False, start_time=None, projection=None):
+        info = r.remap_dict(
+            node, FacebookChatDownloader._REMAPPING, projection=projection)
 
         author_info = info.pop('author', {})
         BaseChatDownloader._move_to_dict(
@@ -562,7 +579,7 @@ class FacebookChatDownloader(BaseChatDownloader):
         info['author'] = r.remap_dict(
             author_info, FacebookChatDownloader._AUTHOR_REMAPPING)
 
-        if 'profile_picture_depth_0' in author_info:
+        if 'profile_picture_depth_0' in author_info and (projection is None or 'author_images' in projection):
             info['author']['images'] = []
             for size in ((0, 32), (1, 24)):
                 url = multi_get(
@@ -607,6 +624,7 @@ class FacebookChatDownloader(BaseChatDownloader):
 
     def _get_live_chat_messages_by_video_id(self, video_id, params):
         buffer_size = 25  # max num comments returned by api call
+        projection = self._get_projection(params)
         # cursor = ''
         variables = {
             'videoID': video_id
@@ -620,8 +638,12 @@ class FacebookChatDownloader(BaseChatDownloader):
 
         first_try = True
 
+        message_filter = self._get_message_filter(
+            self._MESSAGE_GROUPS, params.get('message_groups'), params.get('message_types'))
+
         last_ids = []
         while True:
+            check_for_timeout()
 
             json_data = self._graphql_request(params, data=data)
 
@@ -651,7 +673,8 @@ class FacebookChatDownloader(BaseChatDownloader):
                 if not node:
                     log('debug', f'No node found in edge: {edge}')
                     continue
-                parsed_items.append(FacebookChatDownloader._parse_node(node))
+                parsed_items.append(
+                    FacebookChatDownloader._parse_node(node, projection=projection))
 
             # Sort items
             parsed_items.sort(key=lambda x: x['timestamp'])
@@ -672,7 +695,8 @@ class FacebookChatDownloader(BaseChatDownloader):
                 last_ids.append(comment_id)
                 last_ids = last_ids[-buffer_size:]  # force x items
 
-                # TODO determine whether to add or not (message types/groups)
+                if message_filter is not None and item.get('message_type') not in message_filter:
+                    continue
 
                 num_to_add += 1
                 yield item
@@ -697,6 +721,7 @@ class FacebookChatDownloader(BaseChatDownloader):
     def _get_chat_from_vod(self, feedback_id, stream_start_time, end_time, params):
         # method 1 - only works for vods. Guaranteed to get all, but can't choose start time
         # ordered by timestamp
+        projection = self._get_projection(params)
 
         data = {
             'fb_api_req_friendly_name': 'CometUFICommentsProviderPaginationQuery',
@@ -717,21 +742,33 @@ class FacebookChatDownloader(BaseChatDownloader):
             'viewOption': ordering
         }
 
-        before = None
-        while True:
-            variables['before'] = before
-            variables['isPaginating'] = before is not None
+        def get_pages():
+            """Request each page of comments, as soon as its cursor is known"""
+            before = None
+            while True:
+                check_for_timeout()
+                variables['before'] = before
+                variables['isPaginating'] = before is not None
 
-            data['variables'] = json.dumps(variables)
+                data['variables'] = json.dumps(variables)
 
-            json_data = self._graphql_request(params, retry_on_error=False, data=data)
+                json_data = self._graphql_request(params, retry_on_error=False, data=data)
 
-            info = multi_get(json_data, 'data', 'feedback')
-            if not info:
-                log('debug', f'No feedback: {json_data}')
-                break
+                info = multi_get(json_data, 'data', 'feedback')
+                if not info:
+                    log('debug', f'No feedback: {json_data}')
+                    break
+
+                display_comments = info.get('display_comments')
+                yield display_comments
+
+                page_info = display_comments.get('page_info') or {}
+                if not page_info.get('has_previous_page'):
+                    break
 
-            display_comments = info.get('display_comments')
+                before = page_info.get('start_cursor')
+
+        for display_comments in self._prefetch_pages(get_pages(), params):
             edges = display_comments.get('edges') or []
 
             parsed_items = []
@@ -742,7 +779,7 @@ class FacebookChatDownloader(BaseChatDownloader):
                     continue
 
                 parsed = FacebookChatDownloader._parse_node(
-                    node, True, stream_start_time)
+                    node, True, stream_start_time, projection)
 
                 time_in_seconds = parsed.get('time_in_seconds')
                 if time_in_seconds is None:
@@ -754,16 +791,11 @@ class FacebookChatDownloader(BaseChatDownloader):
             parsed_items.sort(key=lambda x: x['timestamp'])
             yield from parsed_items
 
-            page_info = display_comments.get('page_info') or {}
-            if not page_info.get('has_previous_page'):
-                break
-
-            before = page_info.get('start_cursor')
-
     def _get_chat_from_video(self, feedback_id, start_time, end_time, params):
         # method 2 - works for all videos, but sometimes misses comments
         # max messages is 30 per minute
         # ordered by time_in_seconds
+        projection = self._get_projection(params)
         log('debug', 'Running method 2')
 
         data = {
@@ -781,6 +813,7 @@ class FacebookChatDownloader(BaseChatDownloader):
         }
 
         while True:
+            check_for_timeout()
             next_end_time = min(next_start_time + time_increment, end_time)
 
             variables['afterTime'] = next_start_time
@@ -798,7 +831,7 @@ class FacebookChatDownloader(BaseChatDownloader):
                 if not node:
                     log('debug', f'No node found in edge: {edge}')
                     continue
-                yield FacebookChatDownloader._parse_node(node, True)
+                yield FacebookChatDownloader._parse_node(node, True, projection=projection)
 
             if next_end_time >= end_time:
                 return
@@ -813,6 +846,9 @@ class FacebookChatDownloader(BaseChatDownloader):
         end_time = min(ensure_seconds(params.get(
             'end_time'), float('inf')), max_duration)
 
+        message_filter = self._get_message_filter(
+            self._MESSAGE_GROUPS, params.get('message_groups'), params.get('message_types'))
+
         success = False
 
         if broadcast_status == 'VOD_READY' and params.get('start_time') is None:
@@ -823,14 +859,21 @@ class FacebookChatDownloader(BaseChatDownloader):
                     time_in_seconds = i.get('time_in_seconds')
                     if time_in_seconds is not None:
                         start_time = max(start_time, time_in_seconds)
-                    yield i
+                    if message_filter is None or i.get('message_type') in message_filter:
+                        yield i
                 success = True
 
             except RateLimitError as e:
                 pass
 
         if not success:  # Fallback
-            yield from self._get_chat_from_video(feedback_id, start_time, end_time, params)
+            # Time windows are independent, so these may be downloaded in parallel
+            for i in self._get_sharded_replay(
+                    lambda start, end: self._get_chat_from_video(
+                        feedback_id, start, end, params),
+                    start_time, end_time, max_duration, params):
+                if message_filter is None or i.get('message_type') in message_filter:
+                    yield i
 
     def _get_chat_by_video_id(self, match, params):
         return self.get_chat_by_video_id(match.group('id'), params)
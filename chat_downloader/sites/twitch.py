@@ -24,6 +24,11 @@ from ..utils.core import (
     attempts
 )
 
+from ..utils.timed_utils import (
+    check_for_timeout,
+    on_cancel
+)
+
 from ..debugging import (
     log,
     debug_log
@@ -33,6 +38,7 @@ import re
 import json
 import time
 import socket
+import threading
 import base64
 import math
 from requests.exceptions import RequestException
@@ -48,25 +54,30 @@ class TwitchError(SiteError):
 
 
 class TwitchChatIRC():
+    _HOST = 'irc.chat.twitch.tv'
+    _PORT = 6667
+
+    # https://dev.twitch.tv/docs/irc/tags
+    # https://dev.twitch.tv/docs/irc/membership
+    # https://dev.twitch.tv/docs/irc/commands
+    _LOGIN_COMMANDS = (
+        'CAP REQ :twitch.tv/tags twitch.tv/commands twitch.tv/membership',
+        'PASS SCHMOOPIIE',
+        'NICK justinfan67420'
+    )
 
     def __init__(self):
         # create new socket
         self.socket = socket.socket()
 
         # start connection
-        self.socket.connect(('irc.chat.twitch.tv', 6667))
+        self.socket.connect((self._HOST, self._PORT))
         # print('Connected to', self._HOST, 'on port', self._PORT)
 
         self.current_channel = None
-        # https://dev.twitch.tv/docs/irc/tags
-        # https://dev.twitch.tv/docs/irc/membership
-        # https://dev.twitch.tv/docs/irc/commands
 
-        # twitch.tv/membership
-        self.send_raw(
-            'CAP REQ :twitch.tv/tags twitch.tv/commands twitch.tv/membership')
-        self.send_raw('PASS SCHMOOPIIE')
-        self.send_raw('NICK justinfan67420')
+        for command in self._LOGIN_COMMANDS:
+            self.send_raw(command)
 
     def send_raw(self, string):
         self.socket.send((string + '\r\n').encode('utf-8'))
@@ -84,13 +95,23 @@ class TwitchChatIRC():
     def set_timeout(self, message_receive_timeout):
         self.socket.settimeout(message_receive_timeout)
 
+    def interrupt(self):
+        """Interrupt a blocking `recv` (from another thread)"""
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # Not connected
+
     def close_connection(self):
         self.socket.close()
 
 
 class TwitchChatDownloader(BaseChatDownloader):
+    # Badge caches are shared by all threads. They are replaced (never
+    # mutated) while holding the lock, so may be read without locking.
     _BADGE_INFO = {}
     _SUBSCRIBER_BADGE_INFO = {}  # local cache for subscriber badge info
+    _BADGE_INFO_LOCK = threading.Lock()
 
     _NAME = 'twitch.tv'
 
@@ -205,6 +226,9 @@ class TwitchChatDownloader(BaseChatDownloader):
     _PING_TEXT = 'PING :tmi.twitch.tv'
     _PONG_TEXT = 'PONG :tmi.twitch.tv'
 
+    # How often (in seconds) to ping the IRC server, to keep the connection alive
+    _PING_INTERVAL = 60
+
     _SUBSCRIPTION_TYPES = {
         'Prime': 'Prime',
         '1000': 'Tier 1',
@@ -230,7 +254,7 @@ class TwitchChatDownloader(BaseChatDownloader):
         ]
 
     @staticmethod
-    def _parse_message_info(message):
+    def _parse_message_info(message, parse_emotes=True):
         message_info = {
             'author_colour': message.get('userColor'),
             'author_badges': message.get('userBadges') or [],
@@ -244,7 +268,7 @@ class TwitchChatDownloader(BaseChatDownloader):
             message_text += fragment['text']
 
             emote = fragment.get('emote')
-            if emote:
+            if emote and parse_emotes:
                 emote_id = emote['emoteID']
                 _, *positions = emote['id'].split(';')
 
@@ -270,6 +294,10 @@ class TwitchChatDownloader(BaseChatDownloader):
 
         return message_info
 
+    @staticmethod
+    def _parse_message_info_without_emotes(message):
+        return TwitchChatDownloader._parse_message_info(message, parse_emotes=False)
+
     @staticmethod
     def _decode_pseudo_BNF(text):
         """
@@ -351,6 +379,12 @@ class TwitchChatDownloader(BaseChatDownloader):
         'message': r(None, _parse_message_info, True)
     }
 
+    # Used when emotes are not selected by the projection
+    _COMMENT_REMAPPING_WITHOUT_EMOTES = {
+        **_COMMENT_REMAPPING,
+        'message': r(None, _parse_message_info_without_emotes, True)
+    }
+
     _MESSAGE_PARAM_REMAPPING = {
         'msg-id': 'message_type',
 
@@ -562,6 +596,16 @@ class TwitchChatDownloader(BaseChatDownloader):
     }
     _KNOWN_IRC_KEYS.update(BaseChatDownloader.get_mapped_keys(_IRC_REMAPPING))
 
+    _FIELD_DEPENDENCIES = {
+        # Badges of IRC messages need the channel's (custom) badges and
+        # subscription information
+        'author_badges': ('author_badge_metadata', 'channel_id'),
+        'author_name': ('author_display_name',),
+        'ban_type': ('ban_duration',),
+        'minutes_to_follow_before_chatting': ('follower_only',),
+        'seconds_to_wait': ('slow_mode',),
+    }
+
     _ACTION_TYPE_REMAPPING = {
         # tags
         'CLEARCHAT': 'clear_chat',
@@ -792,33 +836,47 @@ class TwitchChatDownloader(BaseChatDownloader):
 
         badges = data.get('badges') or []
         user = multi_get(data, 'user', 'broadcastBadges') or []
+
+        new_badge_info = {}
+        new_subscriber_badge_info = {}
         for badge in badges + user:
             setID, version, channelID = base64.b64decode(
                 badge['id']).decode().strip().split(';')
 
             if channelID:
-                if channelID not in self._SUBSCRIBER_BADGE_INFO:
-                    self._SUBSCRIBER_BADGE_INFO[channelID] = {}
+                if channelID not in new_subscriber_badge_info:
+                    new_subscriber_badge_info[channelID] = {}
 
-                self._SUBSCRIBER_BADGE_INFO[channelID][(
+                new_subscriber_badge_info[channelID][(
                     setID, version)] = badge
             else:
-                self._BADGE_INFO[(setID, version)] = badge
+                new_badge_info[(setID, version)] = badge
 
-    @staticmethod
-    def _parse_item(item, offset, channel_id=None):
-        info = {}
+        cls = TwitchChatDownloader
+        with cls._BADGE_INFO_LOCK:
+            subscriber_badge_info = dict(cls._SUBSCRIBER_BADGE_INFO)
+            for channelID, channel_badges in new_subscriber_badge_info.items():
+                subscriber_badge_info[channelID] = {
+                    **subscriber_badge_info.get(channelID, {}), **channel_badges}
+
+            cls._SUBSCRIBER_BADGE_INFO = subscriber_badge_info
+            cls._BADGE_INFO = {**cls._BADGE_INFO, **new_badge_info}
 
-        for key in item:
-            r.remap(info, TwitchChatDownloader._COMMENT_REMAPPING,
-                    key, item[key])
+    @staticmethod
+    def _parse_item(item, offset, channel_id=None, projection=None):
+        if projection is None:
+            info = r.compile(TwitchChatDownloader._COMMENT_REMAPPING)(item)
+        else:
+            remapping = TwitchChatDownloader._COMMENT_REMAPPING if 'emotes' in projection \
+                else TwitchChatDownloader._COMMENT_REMAPPING_WITHOUT_EMOTES
+            info = r.compile(remapping, projection=projection)(item)
 
         if 'time_in_seconds' in info:
             info['time_in_seconds'] -= offset
             info['time_text'] = seconds_to_time(int(info['time_in_seconds']))
 
         badges = info.pop('author_badges', None)
-        if badges:
+        if badges and (projection is None or 'author_badges' in projection):
             info['author']['badges'] = [
                 TwitchChatDownloader._parse_badge_info(
                     x.get('setID'), x.get('version'), channel_id)
@@ -857,21 +915,42 @@ class TwitchChatDownloader(BaseChatDownloader):
         # 'VideoPreviewOverlay': '3006e77e51b128d838fa4e835723ca4dc9a05c5efd4466c1085215c6e437e65c',
     }
 
-    def _download_base_gql(self, ops):
-        return self._session_post(self._GQL_API_URL, json=ops, headers={
-            'Content-Type': 'text/plain;charset=UTF-8',
-            'Client-ID': self._CLIENT_ID
-        }).json()
+    def _get_gql_request(self, ops, persisted=True):
+        """Get the URL, JSON body and headers of a GraphQL request
 
-    def _download_gql(self, ops):
-        for op in ops:
-            op['extensions'] = {
-                'persistedQuery': {
-                    'version': 1,
-                    'sha256Hash': self._OPERATION_HASHES[op['operationName']],
+        :param ops: The operations to perform
+        :type ops: Union[list, dict]
+        :param persisted: Whether the operations are persisted queries (identified
+            by their `operationName`), defaults to True
+        :type persisted: bool, optional
+        :return: Keyword arguments for making the request
+        :rtype: dict
+        """
+        if persisted:
+            for op in ops:
+                op['extensions'] = {
+                    'persistedQuery': {
+                        'version': 1,
+                        'sha256Hash': self._OPERATION_HASHES[op['operationName']],
+                    }
                 }
+
+        return {
+            'url': self._GQL_API_URL,
+            'json': ops,
+            'headers': {
+                'Content-Type': 'text/plain;charset=UTF-8',
+                'Client-ID': self._CLIENT_ID
             }
-        return self._download_base_gql(ops)
+        }
+
+    def _download_base_gql(self, ops):
+        request = self._get_gql_request(ops, persisted=False)
+        return self._session_post(request.pop('url'), **request).json()
+
+    def _download_gql(self, ops):
+        request = self._get_gql_request(ops)
+        return self._session_post(request.pop('url'), **request).json()
 
     _GAME_REMAPPING = {
         'id': 'id',
@@ -1118,8 +1197,14 @@ class TwitchChatDownloader(BaseChatDownloader):
 
     # offset and max_duration are used by clips
 
-    def _get_chat_messages_by_vod_id(self, vod_id, params, max_duration, offset=None):
+    @staticmethod
+    def _get_vod_time_range(params, max_duration, offset=None):
+        """Get the range of times (in seconds) to retrieve messages for
 
+        :return: The start time, end time, offset, and the content offset
+            from which to start requesting messages
+        :rtype: (float, float, float, float)
+        """
         # twitch does not provide messages before the stream starts,
         # so we default to a start time of 0
         start_time = ensure_seconds(
@@ -1136,94 +1221,170 @@ class TwitchChatDownloader(BaseChatDownloader):
             end_time = ensure_seconds(e_time, max_duration)
             content_offset_seconds = (start_time or 0) + offset
 
-        max_attempts = params.get('max_attempts')
+        return start_time, end_time, offset, content_offset_seconds
+
+    @staticmethod
+    def _get_vod_comments_query(vod_id, cursor, content_offset_seconds):
+        variables = {
+            'videoID': vod_id,
+        }
 
-        messages_groups_to_add = params.get('message_groups') or []
-        messages_types_to_add = params.get('message_types') or []
+        if cursor:
+            variables['cursor'] = cursor
+        else:
+            variables['contentOffsetSeconds'] = content_offset_seconds
+
+        return [{
+            'operationName': 'VideoCommentsByOffsetOrCursor',
+            'variables': variables
+        }]
+
+    @staticmethod
+    def _get_next_vod_cursor(comments):
+        """Get the cursor of the next page of comments, or None if this is the last page"""
+        if not comments['pageInfo']['hasNextPage']:
+            return None
+
+        edges = comments.get('edges') or []
+        return edges[-1].get('cursor') if edges else None
+
+    def _parse_vod_comments(self, info, offset, start_time, end_time, message_filter, projection=None):
+        """Parse a page of comments
+
+        :return: The messages to add, and whether the end time has been reached
+        :rtype: (list, bool)
+        """
+        # Used for custom badge retrieval
+        creator_channel_id = multi_get(info, 'creator', 'channel', 'id')
+
+        edges = info['comments'].get('edges') or []
+
+        messages = []
+        for edge in edges:
+            node = edge.get('node')
+            if not node:
+                continue
+
+            data = self._parse_item(
+                node, offset, creator_channel_id, projection)
+
+            # test for missing keys
+            missing_keys = data.keys() - TwitchChatDownloader._KNOWN_COMMENT_KEYS
+
+            if missing_keys:
+                debug_log(
+                    f'Missing keys found: {missing_keys}',
+                    f'Original data: {node}',
+                    f'Parsed data: {data}',
+                    node.keys(),
+                    TwitchChatDownloader._KNOWN_COMMENT_KEYS
+                )
+
+            time_in_seconds = data.get('time_in_seconds', 0)
+
+            before_start = start_time is not None and time_in_seconds < start_time
+            after_end = end_time is not None and time_in_seconds > end_time
+
+            if before_start:  # still getting to messages
+                continue
+            elif after_end:  # after end
+                return messages, True  # while actually searching, if time is invalid
+
+            if message_filter is not None and data.get('message_type') not in message_filter:
+                continue
+
+            messages.append(data)
+
+        return messages, False
+
+    def _get_chat_messages_by_vod_id(self, vod_id, params, max_duration, offset=None):
+
+        start_time, end_time, offset, content_offset_seconds = self._get_vod_time_range(
+            params, max_duration, offset)
+
+        max_attempts = params.get('max_attempts')
 
         # api_url = self._API_TEMPLATE.format(vod_id, self._CLIENT_ID)
 
         message_count = 0
         # do not need inactivity timeout (not live)
 
-        cursor = ''
-        while True:
-            variables = {
-                'videoID': vod_id,
-            }
+        message_filter = self._get_message_filter(
+            self._MESSAGE_GROUPS, params.get('message_groups'), params.get('message_types'))
+        projection = self._get_projection(params)
 
-            if cursor:
-                variables['cursor'] = cursor
-            else:
-                variables['contentOffsetSeconds'] = content_offset_seconds
+        def get_pages():
+            """Request each page of comments, as soon as its cursor is known"""
+            cursor = ''
+            while True:
+                check_for_timeout()
+                query = self._get_vod_comments_query(
+                    vod_id, cursor, content_offset_seconds)
+
+                for attempt_number in attempts(max_attempts):
+                    try:
+                        info = self._download_gql(query)[0]['data']['video']
+                        break
+                    except (JSONDecodeError, RequestException) as e:
+                        self.retry(attempt_number, error=e, **params)
+
+                comments = info.get('comments')
+                if not comments:
+                    break
 
-            query = [{
-                'operationName': 'VideoCommentsByOffsetOrCursor',
-                'variables': variables
-            }]
+                yield info
 
-            for attempt_number in attempts(max_attempts):
-                try:
-                    info = self._download_gql(query)[0]['data']['video']
+                cursor = self._get_next_vod_cursor(comments)
+                if cursor is None:
                     break
-                except (JSONDecodeError, RequestException) as e:
-                    self.retry(attempt_number, error=e, **params)
 
-            comments = info.get('comments')
-            if not comments:
-                break
-
-            # Used for custom badge retrieval
-            creator_channel_id = multi_get(info, 'creator', 'channel', 'id')
+        for info in self._prefetch_pages(get_pages(), params):
+            messages, reached_end = self._parse_vod_comments(
+                info, offset, start_time, end_time, message_filter, projection)
 
-            edges = comments.get('edges') or []
+            for data in messages:
+                message_count += 1
+                yield data
 
-            for edge in edges:
-                cursor = edge.get('cursor')
-                node = edge.get('node')
-                if not node:
-                    continue
+            if reached_end:
+                return
 
-                data = self._parse_item(node, offset, creator_channel_id)
+            log('debug', f'Total number of messages: {message_count}')
 
-                # test for missing keys
-                missing_keys = data.keys() - TwitchChatDownloader._KNOWN_COMMENT_KEYS
+    async def _get_chat_messages_by_vod_id_async(self, vod_id, params, max_duration, client, offset=None):
+        """Asynchronous version of `_get_chat_messages_by_vod_id`, which uses
+        an `AsyncClient` for making requests.
+        """
+        start_time, end_time, offset, content_offset_seconds = self._get_vod_time_range(
+            params, max_duration, offset)
 
-                if missing_keys:
-                    debug_log(
-                        f'Missing keys found: {missing_keys}',
-                        f'Original data: {node}',
-                        f'Parsed data: {data}',
-                        node.keys(),
-                        TwitchChatDownloader._KNOWN_COMMENT_KEYS
-                    )
+        message_filter = self._get_message_filter(
+            self._MESSAGE_GROUPS, params.get('message_groups'), params.get('message_types'))
+        projection = self._get_projection(params)
 
-                time_in_seconds = data.get('time_in_seconds', 0)
+        cursor = ''
+        while True:
+            query = self._get_vod_comments_query(
+                vod_id, cursor, content_offset_seconds)
 
-                before_start = start_time is not None and time_in_seconds < start_time
-                after_end = end_time is not None and time_in_seconds > end_time
+            response = await client.post_json(**self._get_gql_request(query), params=params)
+            info = multi_get(response, 0, 'data', 'video') or {}
 
-                if before_start:  # still getting to messages
-                    continue
-                elif after_end:  # after end
-                    return  # while actually searching, if time is invalid
-
-                to_add = self._must_add_item(
-                    data,
-                    self._MESSAGE_GROUPS,
-                    messages_groups_to_add,
-                    messages_types_to_add
-                )
+            comments = info.get('comments')
+            if not comments:
+                break
 
-                if not to_add:
-                    continue
+            messages, reached_end = self._parse_vod_comments(
+                info, offset, start_time, end_time, message_filter, projection)
 
-                message_count += 1
+            for data in messages:
                 yield data
 
-            log('debug', f'Total number of messages: {message_count}')
+            if reached_end:
+                return
 
-            if not comments['pageInfo']['hasNextPage']:
+            cursor = self._get_next_vod_cursor(comments)
+            if cursor is None:
                 break
 
     def _get_chat_by_vod_id(self, match, params):
@@ -1256,9 +1417,15 @@ class TwitchChatDownloader(BaseChatDownloader):
         channel_name = multi_get(video, 'owner', 'login')
         self._update_badge_info(channel_name)
 
+        def get_shard(start_time, end_time):
+            return self._get_chat_messages_by_vod_id(
+                vod_id, {**params, 'start_time': start_time, 'end_time': end_time}, duration)
+
         return Chat(
-            self._get_chat_messages_by_vod_id(
-                vod_id, params, duration),
+            self._get_sharded_replay(get_shard, params.get('start_time'),
+                                     params.get('end_time'), duration, params),
+            async_chat=lambda client: self._get_chat_messages_by_vod_id_async(
+                vod_id, params, duration, client),
             title=title,
             duration=duration,
             status='past',
@@ -1301,6 +1468,8 @@ class TwitchChatDownloader(BaseChatDownloader):
         return Chat(
             self._get_chat_messages_by_vod_id(
                 vod_id, params, duration, offset),
+            async_chat=lambda client: self._get_chat_messages_by_vod_id_async(
+                vod_id, params, duration, client, offset),
             title=title,
             duration=duration,
             status='past',
@@ -1373,6 +1542,9 @@ class TwitchChatDownloader(BaseChatDownloader):
         if new_message_type:
             info['message_type'] = new_message_type
         else:
+            # Use the same naming convention as known message types
+            info['message_type'] = replace_with_underscores(
+                original_message_type)
             debug_log(
                 f'Unknown message type: {original_message_type}',
                 f'Parsed data: {info}'
@@ -1392,9 +1564,55 @@ class TwitchChatDownloader(BaseChatDownloader):
                 )
                 continue
 
+    _MESSAGE_ID_REGEX = re.compile(r'(?:^|;)msg-id=([^;]*)')
+
     @staticmethod
-    def _parse_irc_item(match):
-        info = {}
+    def _get_irc_message_type(match):
+        """Get the message type of an IRC message, without parsing it.
+        This gives the same result as `_parse_irc_item(match)['message_type']`.
+
+        :param match: Match of `_MESSAGE_REGEX`
+        :type match: re.Match
+        :return: The message type
+        :rtype: str
+        """
+        original_action_type = match.group(2)
+
+        if original_action_type == 'CLEARCHAT' and match.group(3):
+            return 'ban_user'
+
+        message_id = TwitchChatDownloader._MESSAGE_ID_REGEX.search(
+            match.group(1))
+        if message_id and message_id.group(1):
+            original_message_type = message_id.group(1)
+            return TwitchChatDownloader._MESSAGE_TYPE_REMAPPING.get(
+                original_message_type) or replace_with_underscores(original_message_type)
+
+        return TwitchChatDownloader._ACTION_TYPE_REMAPPING.get(
+            original_action_type) or original_action_type
+
+    @staticmethod
+    def _parse_irc_item(match, message_filter=None, projection=None):
+        """Parse a message received from the IRC server
+
+        :param match: Match of `_MESSAGE_REGEX`
+        :type match: re.Match
+        :param message_filter: Message types to parse (see
+            `_get_message_filter`). Defaults to None (parse all messages)
+        :type message_filter: frozenset, optional
+        :param projection: Fields to parse, defaults to None (all fields).
+            Other fields may also be included
+        :type projection: Projection, optional
+        :return: The parsed item, or None if its type is not in `message_filter`
+        :rtype: dict
+        """
+        if message_filter is not None:
+            # Skip parsing messages which will not be added
+            message_type = TwitchChatDownloader._get_irc_message_type(match)
+            if message_type not in message_filter:
+                return None
+
+        tags = {}
 
         split_info = match.group(1).split(';')
 
@@ -1413,8 +1631,10 @@ class TwitchChatDownloader(BaseChatDownloader):
                 )
                 continue
 
-            r.remap(info, TwitchChatDownloader._IRC_REMAPPING,
-                    keys[0], keys[1], keep_unknown_keys=True, replace_char_with_underscores='-')
+            tags[keys[0]] = keys[1]
+
+        info = r.compile(TwitchChatDownloader._IRC_REMAPPING, keep_unknown_keys=True,
+                         replace_char_with_underscores='-', projection=projection)(tags)
 
         message_match = match.group(3)
         if message_match:
@@ -1503,6 +1723,96 @@ class TwitchChatDownloader(BaseChatDownloader):
         # :tmi.twitch.tv HOSTTARGET #gothamchess :anna_chess 6612
         return info
 
+    @classmethod
+    def _split_irc_buffer(cls, readbuffer):
+        """Find all complete IRC messages in a buffer of received data
+
+        :param readbuffer: The data received so far
+        :type readbuffer: str
+        :return: The matches of the complete messages, and the remaining
+            (incomplete) data, which should be prepended to the next data
+        :rtype: (list, str)
+        """
+        matches = list(cls._MESSAGE_REGEX.finditer(readbuffer))
+        full_readbuffer = readbuffer.endswith('\r\n')
+        if matches:
+            if not full_readbuffer:
+                # sometimes a buffer does not contain a full message
+                # last one is incomplete
+
+                span = matches[-1].span()
+
+                pass_on = readbuffer[span[0]:]
+
+                # check whether message was cut off
+                if '\r\n' in pass_on:  # last message not matched
+                    # only pass on incomplete message
+
+                    # readbuffer[span[1]:]
+                    pass_on = pass_on[span[1] - span[0]:]
+
+                # actual message cut off (matched, but not complete)
+                else:
+                    # remove the last match from being processed (as it is incomplete)
+                    matches.pop()
+
+                # pass remaining information to next attempt
+                readbuffer = pass_on
+
+            else:
+                # the whole readbuffer was read correctly.
+                # reset the readbuffer
+                readbuffer = ''
+
+        elif full_readbuffer:
+            # No matches, but data has been read successfully.
+            # This means that we can safely reset the readbuffer.
+            # This is used to periodically reset the readbuffer,
+            # to avoid a massive buffer from forming.
+
+            # never pause
+            log('debug',
+                f'No matches found in "\n{readbuffer.strip()}\n"')
+            readbuffer = ''
+
+        return matches, readbuffer
+
+    def _process_irc_buffer(self, readbuffer, message_filter, projection):
+        """Parse all complete IRC messages in a buffer of received data
+
+        :return: The parsed messages, the remaining (incomplete) data, and
+            whether the server sent a PING (which must be answered with a PONG)
+        :rtype: (list, str, bool)
+        """
+        ping_received = self._PING_TEXT in readbuffer
+
+        matches, readbuffer = self._split_irc_buffer(readbuffer)
+
+        messages = []
+        for match in matches:
+            data = self._parse_irc_item(match, message_filter, projection)
+            if data is None:
+                continue
+
+            # test for missing keys
+            missing_keys = data.keys() - TwitchChatDownloader._KNOWN_IRC_KEYS
+
+            if missing_keys:
+                debug_log(
+                    f'Missing keys found: {missing_keys}',
+                    f'Original data: {match.groups()}',
+                    f'Parsed data: {data}'
+                )
+
+            messages.append(data)
+
+        return messages, readbuffer, ping_received
+
+    @classmethod
+    def _get_time_until_ping(cls, last_ping_time):
+        """Get the number of seconds until the server should next be pinged"""
+        return max(last_ping_time + cls._PING_INTERVAL - time.monotonic(), 0)
+
     def _get_chat_messages_by_stream_id(self, stream_id, params):
         max_attempts = params.get('max_attempts')
 
@@ -1510,8 +1820,9 @@ class TwitchChatDownloader(BaseChatDownloader):
 
         buffer_size = params.get('buffer_size')
 
-        messages_groups_to_add = params.get('message_groups') or []
-        messages_types_to_add = params.get('message_types') or []
+        message_filter = self._get_message_filter(
+            self._MESSAGE_GROUPS, params.get('message_groups'), params.get('message_types'))
+        projection = self._get_projection(params)
 
         def create_connection():
             for attempt_number in attempts(max_attempts):
@@ -1525,122 +1836,126 @@ class TwitchChatDownloader(BaseChatDownloader):
 
         twitch_chat_irc = create_connection()
 
-        last_ping_time = time.time()
-
-        # TODO make this a param
-        ping_every = 60  # how often to ping the server
+        last_ping_time = time.monotonic()
 
         readbuffer = ''
 
         message_count = 0
 
-        try:
-            while True:
-
-                try:
-                    new_info = twitch_chat_irc.recv(buffer_size)
-
-                    if not new_info:
-                        raise ConnectionError('Lost connection, reconnecting.')
+        # Cancelling the chat interrupts the current connection
+        def interrupt():
+            twitch_chat_irc.interrupt()
 
-                    readbuffer += new_info
-
-                    if self._PING_TEXT in readbuffer:
-                        twitch_chat_irc.send_raw(self._PONG_TEXT)
-
-                    matches = list(self._MESSAGE_REGEX.finditer(readbuffer))
-                    full_readbuffer = readbuffer.endswith('\r\n')
-                    if matches:
-                        if not full_readbuffer:
-                            # sometimes a buffer does not contain a full message
-                            # last one is incomplete
+        try:
+            with on_cancel(interrupt):
+                while True:
 
-                            span = matches[-1].span()
+                    try:
+                        if not self._get_time_until_ping(last_ping_time):
+                            twitch_chat_irc.send_raw('PING')
+                            last_ping_time = time.monotonic()
 
-                            pass_on = readbuffer[span[0]:]
+                        new_info = twitch_chat_irc.recv(buffer_size)
 
-                            # check whether message was cut off
-                            if '\r\n' in pass_on:  # last message not matched
-                                # only pass on incomplete message
+                        if not new_info:
+                            raise ConnectionError('Lost connection, reconnecting.')
 
-                                # readbuffer[span[1]:]
-                                pass_on = pass_on[span[1] - span[0]:]
+                        messages, readbuffer, ping_received = self._process_irc_buffer(
+                            readbuffer + new_info, message_filter, projection)
 
-                            # actual message cut off (matched, but not complete)
-                            else:
-                                # remove the last match from being processed (as it is incomplete)
-                                matches.pop()
+                        if ping_received:
+                            twitch_chat_irc.send_raw(self._PONG_TEXT)
 
-                            # pass remaining information to next attempt
-                            readbuffer = pass_on
+                        for data in messages:
+                            message_count += 1
+                            yield data
 
-                        else:
-                            # the whole readbuffer was read correctly.
-                            # reset the readbuffer
-                            readbuffer = ''
+                        if messages:
+                            log('debug',
+                                f'Total number of messages: {message_count}')
 
-                        for match in matches:
+                    except socket.timeout:
+                        # Allows for keyboard interrupts and timeouts
+                        check_for_timeout()
 
-                            data = self._parse_irc_item(match)
+                    except ConnectionError:
+                        # Close old connection
+                        twitch_chat_irc.close_connection()
 
-                            # test for missing keys
-                            missing_keys = data.keys() - TwitchChatDownloader._KNOWN_IRC_KEYS
+                        # Do not reconnect if the chat has been cancelled
+                        check_for_timeout()
 
-                            if missing_keys:
-                                debug_log(
-                                    f'Missing keys found: {missing_keys}',
-                                    f'Original data: {match.groups()}',
-                                    f'Parsed data: {data}'
-                                )
-                            # check whether to skip this message or not, based on its type
+                        # Create a new connection
+                        twitch_chat_irc = create_connection()
 
-                            to_add = self._must_add_item(
-                                data,
-                                self._MESSAGE_GROUPS,
-                                messages_groups_to_add,
-                                messages_types_to_add
-                            )
+        finally:
+            twitch_chat_irc.close_connection()
 
-                            if not to_add:
-                                continue
+    async def _get_chat_messages_by_stream_id_async(self, stream_id, params, client):
+        """Asynchronous version of `_get_chat_messages_by_stream_id`, which
+        uses an `AsyncClient` to connect to the IRC server.
+        """
+        max_attempts = params.get('max_attempts')
+        buffer_size = params.get('buffer_size')
 
-                            message_count += 1
-                            yield data
+        message_filter = self._get_message_filter(
+            self._MESSAGE_GROUPS, params.get('message_groups'), params.get('message_types'))
+        projection = self._get_projection(params)
 
-                        log('debug',
-                            f'Total number of messages: {message_count}')
+        async def create_connection():
+            for attempt_number in attempts(max_attempts):
+                try:
+                    connection = await client.open_connection(
+                        TwitchChatIRC._HOST, TwitchChatIRC._PORT)
+                    for command in TwitchChatIRC._LOGIN_COMMANDS:
+                        await connection.send_raw(command)
+                    await connection.send_raw(f'JOIN #{stream_id.lower()}')
+                    return connection
+                except OSError as e:
+                    await client.retry(attempt_number, params, error=e)
+
+        irc = await create_connection()
+        last_ping_time = time.monotonic()
+        readbuffer = ''
+        message_count = 0
 
-                    elif full_readbuffer:
-                        # No matches, but data has been read successfully.
-                        # This means that we can safely reset the readbuffer.
-                        # This is used to periodically reset the readbuffer,
-                        # to avoid a massive buffer from forming.
+        try:
+            while True:
+                try:
+                    if not self._get_time_until_ping(last_ping_time):
+                        await irc.send_raw('PING')
+                        last_ping_time = time.monotonic()
 
-                        # never pause
-                        log('debug',
-                            f'No matches found in "\n{readbuffer.strip()}\n"')
-                        readbuffer = ''
+                    # Wait no longer than the time until the next ping
+                    new_info = await irc.recv(
+                        buffer_size, timeout=self._get_time_until_ping(last_ping_time))
+                    if new_info is None:  # No data received
+                        continue
 
-                    current_time = time.time()
+                    if not new_info:
+                        raise ConnectionError('Lost connection, reconnecting.')
 
-                    time_since_last_ping = current_time - last_ping_time
+                except ConnectionError:
+                    irc.close()
+                    irc = await create_connection()
+                    continue
 
-                    if time_since_last_ping > ping_every:
-                        twitch_chat_irc.send_raw('PING')
-                        last_ping_time = current_time
+                messages, readbuffer, ping_received = self._process_irc_buffer(
+                    readbuffer + new_info, message_filter, projection)
 
-                except socket.timeout:
-                    pass  # Allows for keyboard interrupts
+                if ping_received:
+                    await irc.send_raw(self._PONG_TEXT)
 
-                except ConnectionError:
-                    # Close old connection
-                    twitch_chat_irc.close_connection()
+                for data in messages:
+                    message_count += 1
+                    yield data
 
-                    # Create a new connection
-                    twitch_chat_irc = create_connection()
+                if messages:
+                    log('debug',
+                        f'Total number of messages: {message_count}')
 
         finally:
-            twitch_chat_irc.close_connection()
+            irc.close()
 
     def _get_chat_by_stream_id(self, match, params):
         return self.get_chat_by_stream_id(match.group('id'), params)
@@ -1674,6 +1989,8 @@ class TwitchChatDownloader(BaseChatDownloader):
         return Chat(
             self._get_chat_messages_by_stream_id(
                 stream_id, params),
+            async_chat=lambda client: self._get_chat_messages_by_stream_id_async(
+                stream_id, params, client),
             title=title,
             duration=None,
             status='live' if is_live else 'upcoming',  # Always live or upcoming
@@ -18,9 +18,14 @@ from ..errors import (
     InvalidParameter,
     UserNotFound,
     VideoNotFound,
-    NoVideos
+    NoVideos,
+    RetriesExceeded
 )
-from ..utils.timed_utils import interruptible_sleep
+from ..utils.timed_utils import (
+    interruptible_sleep,
+    check_for_timeout
+)
+from ..utils.threaded_utils import merged_parallel_generator
 
 from ..utils.core import (
     multi_get,
@@ -32,33 +37,342 @@ from ..utils.core import (
     rgba_to_hex,
     try_get_first_key,
     try_get_first_value,
-    remove_prefixes,
-    remove_suffixes,
-    camel_case_split,
+    get_snake_case_name,
     ensure_seconds,
     attempts,
-    try_parse_json,
-    regex_search,
     parse_iso8601,
-    get_title_of_webpage
+    get_title_of_webpage,
+    LRUCache,
+    ScriptJSONExtractor
 )
 
 from ..debugging import (log, debug_log)
 
 from itertools import islice
+import asyncio
+import os
+import json
 import time
 import random
 import re
 import hashlib
+import codecs
+import tempfile
+import threading
 from requests.exceptions import RequestException
 from json.decoder import JSONDecodeError
 from urllib import parse
 
 
+class LivePollScheduler():
+    """Chooses how long to wait before requesting the next page of a live
+    chat, based on how busy the chat is.
+
+    Each response only contains a limited number of recent messages, so
+    waiting too long during busy periods means that messages are missed.
+    The wait is chosen so that responses are filled to a target fraction of
+    this capacity (at the observed message rate), and is shortened further
+    whenever a response is (close to) full without overlapping the previous
+    one. When a chat is idle, the wait is increased.
+
+    The request rate and an estimate of the duration of chat which has been
+    missed (from the timestamps either side of responses which do not overlap)
+    are available as `request_rate` and `estimated_gap`.
+    """
+
+    # Bounds (in seconds) of the time to wait between requests. Responses
+    # only go back around 10 seconds, so never wait longer than 8 seconds.
+    MIN_INTERVAL = 1
+    MAX_INTERVAL = 8
+
+    CAPACITY = 100  # Minimum assumed number of actions in a full response
+    FULL_FRACTION = 0.9  # Responses with this fraction of capacity are considered full
+    IDLE_BACKOFF = 1.5
+    RATE_SMOOTHING = 0.3  # Weight of the latest message rate
+
+    def __init__(self, fill_target=0.5):
+        """Create a LivePollScheduler object
+
+        :param fill_target: The fraction of a response's capacity which
+            should be filled before making the next request, defaults to 0.5.
+            Lower values make more requests, but are less likely to miss messages
+        :type fill_target: float, optional
+        """
+        if not 0 < fill_target <= 1:
+            raise InvalidParameter(
+                f'Invalid fill target: {fill_target}. Must be between 0 and 1')
+        self.fill_target = fill_target
+
+        self.interval = self.MIN_INTERVAL
+        self.message_rate = None  # actions per second
+        self.capacity = self.CAPACITY
+
+        self.requests = 0
+        self.estimated_gap = 0  # seconds of chat which have likely been missed
+
+        self._start_time = None
+        self._last_time = None
+        self._last_ids = frozenset()
+        self._newest_timestamp = None
+
+    @property
+    def request_rate(self):
+        """The average number of requests per second (0 before the second request)
+
+        :rtype: float
+        """
+        if self._last_time is None or self._last_time <= self._start_time:
+            return 0
+        return (self.requests - 1) / (self._last_time - self._start_time)
+
+    def update(self, action_count, message_ids=(), server_timeout=None, now=None, timestamps=()):
+        """Record a response, and choose how long to wait before the next request
+
+        :param action_count: The number of actions in the response
+        :type action_count: int
+        :param message_ids: IDs of the messages in the response, used to
+            check for overlap with the previous response, defaults to ()
+        :type message_ids: iterable, optional
+        :param server_timeout: The time to wait (in seconds) suggested by the
+            server, defaults to None
+        :type server_timeout: float, optional
+        :param now: The (monotonic) time of the response, defaults to None (now)
+        :type now: float, optional
+        :param timestamps: Times (in seconds) the messages in the response
+            were sent, used to estimate how much chat was missed, defaults to ()
+        :type timestamps: iterable, optional
+        :return: The number of seconds to wait before the next request
+        :rtype: float
+        """
+        if now is None:
+            now = time.monotonic()
+
+        message_ids = frozenset(message_ids)
+        overlaps = not self._last_ids.isdisjoint(message_ids)
+        self._last_ids = message_ids
+
+        self.capacity = max(self.capacity, action_count)
+        full = action_count >= self.FULL_FRACTION * self.capacity
+
+        timestamps = list(timestamps)
+        if timestamps:
+            if full and not overlaps and self._newest_timestamp is not None:
+                # Messages sent between the two responses did not fit in this one
+                spacing = 1 / self.message_rate if self.message_rate else 0
+                self.estimated_gap += max(min(timestamps) - self._newest_timestamp - spacing, 0)
+            self._newest_timestamp = max(timestamps)
+
+        if self._last_time is not None:
+            elapsed = now - self._last_time
+            if elapsed > 0:
+                rate = action_count / elapsed
+                if self.message_rate is None:
+                    self.message_rate = rate
+                else:
+                    self.message_rate += self.RATE_SMOOTHING * (rate - self.message_rate)
+        else:
+            self._start_time = now
+
+        self._last_time = now
+        self.requests += 1
+
+        if action_count == 0:  # Idle
+            interval = self.interval * self.IDLE_BACKOFF
+        else:
+            interval = server_timeout
+            if self.message_rate:
+                rate_interval = self.fill_target * self.capacity / self.message_rate
+                interval = min(interval or rate_interval, rate_interval)
+            if not interval:
+                # The server did not suggest a time, and the message rate is
+                # not known yet, so request the next page soon
+                interval = self.MIN_INTERVAL
+            if full and not overlaps:
+                interval = min(interval, self.interval / 2)
+
+        # Never wait longer than the server asks to, if it asks for less than the minimum
+        min_interval = min(self.MIN_INTERVAL, server_timeout or self.MIN_INTERVAL)
+        self.interval = min(max(interval, min_interval), self.MAX_INTERVAL)
+        return self.interval
+
+    def __repr__(self):
+        rate = f'{self.message_rate:.1f}' if self.message_rate is not None else '?'
+        return (f'LivePollScheduler(interval={self.interval:.2f}s, message_rate={rate}/s, '
+                f'request_rate={self.request_rate:.2f}/s, estimated_gap={self.estimated_gap:.1f}s)')
+
+
+class ContinuationBodyEncoder():
+    """Encodes the (JSON) bodies of requests for the next page of a chat.
+
+    Most of each body is the client's innertube context, which is the same
+    for every request of a chat. This is encoded once, and only the
+    continuation (and any other values which change between requests) are
+    encoded for each request.
+    """
+
+    def __init__(self, context):
+        """Create a ContinuationBodyEncoder object
+
+        :param context: The innertube context (`INNERTUBE_CONTEXT`)
+        :type context: dict
+        """
+        # Click tracking keeps its position in the context (or is added to
+        # the end), so the context is split into the keys before and after it
+        keys = list(context)
+        index = keys.index('clickTracking') if 'clickTracking' in context else len(keys)
+        before = {key: context[key] for key in keys[:index]}
+        after = {key: context[key] for key in keys[index + 1:]}
+
+        self._click_tracking = json.dumps(context['clickTracking']).encode() \
+            if 'clickTracking' in context else None
+
+        # Everything up to (but not including) the click tracking
+        self._prefix = b'{"context": ' + json.dumps(before)[:-1].encode()
+        self._separator = b', ' if before else b''
+
+        # Everything after the click tracking, including the end of the context
+        self._suffix = (b', ' + json.dumps(after)[1:].encode()) if after else b'}'
+
+    def encode(self, continuation, click_tracking_params=None, player_offset_ms=None):
+        """Encode the body of a request
+
+        :param continuation: The continuation
+        :type continuation: str
+        :param click_tracking_params: Click tracking parameters of the
+            previous response, defaults to None
+        :type click_tracking_params: str, optional
+        :param player_offset_ms: Time in the video (in milliseconds) to get
+            messages from (for chat replays), defaults to None
+        :type player_offset_ms: int, optional
+        :return: The encoded body
+        :rtype: bytes
+        """
+        click_tracking = json.dumps({'clickTrackingParams': click_tracking_params}).encode() \
+            if click_tracking_params else self._click_tracking
+
+        parts = [self._prefix]
+        if click_tracking is not None:
+            parts += (self._separator, b'"clickTracking": ', click_tracking)
+        parts += (self._suffix, b', "continuation": ', json.dumps(continuation).encode())
+        if player_offset_ms is not None:
+            parts += (b', "currentPlayerState": {"playerOffsetMs": ', json.dumps(player_offset_ms).encode(), b'}')
+        parts.append(b'}')
+        return b''.join(parts)
+
+
+class LiveSessionMerger():
+    """Merges the messages of several sessions which poll the same live chat
+    into a single stream, removing duplicates, and keeps track of how many
+    of the chat's messages each session received.
+
+    Messages are identified by their ID or, if they do not have one, by
+    their timestamp, author and text.
+    """
+
+    def __init__(self, poll_schedulers, max_remembered=10000):
+        """Create a LiveSessionMerger object
+
+        :param poll_schedulers: The scheduler of each session
+        :type poll_schedulers: list
+        :param max_remembered: Maximum number of recent messages remembered
+            for removing duplicates, defaults to 10000
+        :type max_remembered: int, optional
+        """
+        self.sessions = [{
+            'poll_scheduler': poll_scheduler,
+            'messages': 0,  # unique messages received by this session
+            'first_received': 0,  # messages received by no other session before
+        } for poll_scheduler in poll_schedulers]
+        self.messages = 0
+        self.max_remembered = max_remembered
+
+        self._seen = {}
+        self._start_time = None
+
+    @staticmethod
+    def _get_key(message):
+        message_id = message.get('message_id')
+        if message_id is not None:
+            return message_id
+        return (message.get('timestamp'), multi_get(message, 'author', 'id'), message.get('message'))
+
+    def add(self, index, message, now=None):
+        """Record a message received by a session
+
+        :param index: Index of the session which received the message
+        :type index: int
+        :param message: The message
+        :type message: dict
+        :param now: The (monotonic) time the message was received, defaults
+            to None (now)
+        :type now: float, optional
+        :return: True if the message had not already been received by
+            another session, otherwise False
+        :rtype: bool
+        """
+        if self._start_time is None:
+            self._start_time = time.monotonic() if now is None else now
+
+        session = self.sessions[index]
+        session['messages'] += 1
+
+        key = self._get_key(message)
+        if key in self._seen:
+            return False
+
+        self._seen[key] = None
+        if len(self._seen) > self.max_remembered:
+            del self._seen[next(iter(self._seen))]
+
+        session['first_received'] += 1
+        self.messages += 1
+        return True
+
+    def get_coverage(self, now=None):
+        """Get the number of unique messages per minute received by each
+        session, and the fraction of all (merged) messages this represents
+
+        :param now: The (monotonic) time, defaults to None (now)
+        :type now: float, optional
+        :return: List containing a dictionary for each session
+        :rtype: list
+        """
+        if now is None:
+            now = time.monotonic()
+        minutes = (now - self._start_time) / 60 if self._start_time is not None else 0
+
+        return [{
+            'messages': session['messages'],
+            'first_received': session['first_received'],
+            'messages_per_minute': session['messages'] / minutes if minutes > 0 else 0,
+            'coverage': session['messages'] / self.messages if self.messages else 0,
+            'request_rate': session['poll_scheduler'].request_rate,
+        } for session in self.sessions]
+
+    def __repr__(self):
+        sessions = ', '.join(
+            f"{session['messages_per_minute']:.0f}/min ({session['coverage']:.0%})"
+            for session in self.get_coverage())
+        return f'LiveSessionMerger(messages={self.messages}, sessions=[{sessions}])'
+
+
 class YouTubeChatDownloader(BaseChatDownloader):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+
+        # ytcfg of the last watch page (or of a previous session), used to
+        # start other chats with the innertube API (see `_get_innertube_video_info`)
+        self._client_ytcfg = None
+
+        # (timestamp, header) of the last authorization header
+        self._sapisidhash_header = None
+
+        self._client_cache_path = self._get_client_cache_path(
+            kwargs.get('cache_dir'), kwargs.get('cookies'))
+        self._anonymous = not kwargs.get('cookies')
+        self._load_client_cache()
+
         self._initialize_consent()
 
     _NAME = 'youtube.com'
@@ -440,12 +754,14 @@ class YouTubeChatDownloader(BaseChatDownloader):
         }
     ]
 
-    _YT_INITIAL_BOUNDARY_RE = r'\s*(?:var\s+(?:meta|head)|</script|\n)'
-    _YT_INITIAL_DATA_RE = r'(?:window\s*\[\s*["\']ytInitialData["\']\s*\]|ytInitialData)\s*=\s*({.+?})\s*;' + \
-        _YT_INITIAL_BOUNDARY_RE
-    _YT_INITIAL_PLAYER_RESPONSE_RE = r'ytInitialPlayerResponse\s*=\s*({.+?})\s*;' + \
-        _YT_INITIAL_BOUNDARY_RE
-    _YT_CFG_RE = r'ytcfg\.set\s*\(\s*({.+?})\s*\)\s*;'
+    # Regular expressions which match the text before each JSON value that
+    # is extracted from a page (see `ScriptJSONExtractor`)
+    _YT_INITIAL_INFO_PATTERNS = {
+        'initial_data': r'(?:window\s*\[\s*["\']ytInitialData["\']\s*\]|ytInitialData)\s*=\s*(?=\{)',
+        'ytcfg': r'ytcfg\.set\s*\(\s*(?=\{)',
+        'player_response': r'ytInitialPlayerResponse\s*=\s*(?=\{)',
+    }
+    _YT_INITIAL_INFO_CHUNK_SIZE = 65536
 
     _YT_HOME = 'https://www.youtube.com'
     _YT_VIDEO_TEMPLATE = _YT_HOME + '/watch?v={}'
@@ -454,6 +770,8 @@ class YouTubeChatDownloader(BaseChatDownloader):
     _YOUTUBE_INIT_API_TEMPLATE = _YT_HOME + '/{}?continuation={}'
     _YOUTUBE_CHAT_API_TEMPLATE = _YT_HOME + '/youtubei/v1/live_chat/get_{}?key={}'
     _YOUTUBE_BROWSE_API_TEMPLATE = _YT_HOME + '/youtubei/v1/browse?key={}'
+    _YOUTUBE_NEXT_API_TEMPLATE = _YT_HOME + '/youtubei/v1/next?key={}'
+    _YOUTUBE_PLAYER_API_TEMPLATE = _YT_HOME + '/youtubei/v1/player?key={}'
 
     _MESSAGE_GROUPS = {
         'messages': [
@@ -596,31 +914,30 @@ class YouTubeChatDownloader(BaseChatDownloader):
         return YouTubeChatDownloader._parse_runs(info)['message'] or YouTubeChatDownloader._get_simple_text(info)
 
     @staticmethod
-    def _parse_runs(run_info, parse_links=True):
+    def _parse_runs(run_info, parse_links=True, parse_emotes=True):
         """ Reads and parses YouTube formatted messages (i.e. runs). """
 
         # TODO separate _parse_runs logic?
 
-        message_info = {
-            'message': ''
-        }
-
         if not isinstance(run_info, dict):
-            return message_info
+            return {'message': ''}
 
+        message = []
         message_emotes = {}
 
+        cache = YouTubeChatDownloader._get_parse_cache()
+
         runs = run_info.get('runs') or []
         for run in runs:
             if 'text' in run:
                 if parse_links and 'navigationEndpoint' in run:  # is a link and must parse
 
                     # if something fails, use default text
-                    message_info['message'] += YouTubeChatDownloader._parse_navigation_endpoint(
-                        run['navigationEndpoint'], run['text'])
+                    message.append(YouTubeChatDownloader._parse_navigation_endpoint(
+                        run['navigationEndpoint'], run['text']))
 
                 else:  # is a normal message
-                    message_info['message'] += run['text']
+                    message.append(run['text'])
 
             elif 'emoji' in run:
                 emoji = run['emoji']
@@ -628,23 +945,20 @@ class YouTubeChatDownloader(BaseChatDownloader):
 
                 name = multi_get(emoji, 'shortcuts', 0) or emoji_id
 
-                if emoji_id and emoji_id not in message_emotes:
-
-                    # TODO change to remapping?
-                    message_emotes[emoji_id] = {
-                        'id': emoji_id,
-                        'name': name,
-                        'shortcuts': emoji.get('shortcuts'),
-                        'search_terms': emoji.get('searchTerms'),
-                        'images': YouTubeChatDownloader._parse_thumbnails(emoji.get('image', {})),
-                        'is_custom_emoji': emoji.get('isCustomEmoji', False)
-                    }
+                if parse_emotes and emoji_id and emoji_id not in message_emotes:
+                    message_emotes[emoji_id] = YouTubeChatDownloader._get_cached(
+                        cache, ('emote', emoji_id), YouTubeChatDownloader._copy_emote,
+                        YouTubeChatDownloader._parse_emote, emoji, emoji_id, name)
 
-                message_info['message'] += name
+                message.append(name)
 
             else:
                 # unknown run
-                message_info['message'] += str(run)
+                message.append(str(run))
+
+        message_info = {
+            'message': ''.join(message)
+        }
 
         if message_emotes:
             message_info['emotes'] = list(message_emotes.values())
@@ -652,7 +966,23 @@ class YouTubeChatDownloader(BaseChatDownloader):
         return message_info
 
     @staticmethod
-    def _parse_item(item, info=None, offset=0):
+    def _parse_emote(emoji, emoji_id, name):
+        # TODO change to remapping?
+        return {
+            'id': emoji_id,
+            'name': name,
+            'shortcuts': emoji.get('shortcuts'),
+            'search_terms': emoji.get('searchTerms'),
+            'images': YouTubeChatDownloader._parse_thumbnails(emoji.get('image', {})),
+            'is_custom_emoji': emoji.get('isCustomEmoji', False)
+        }
+
+    @staticmethod
+    def _parse_runs_without_emotes(run_info):
+        return YouTubeChatDownloader._parse_runs(run_info, parse_emotes=False)
+
+    @staticmethod
+    def _parse_item(item, info=None, offset=0, projection=None):
         if info is None:
             info = {}
         # info is starting point
@@ -662,18 +992,22 @@ class YouTubeChatDownloader(BaseChatDownloader):
         if not item_info:
             return info
 
-        for key in item_info:
-            r.remap(info, YouTubeChatDownloader._REMAPPING,
-                    key, item_info[key])
+        if projection is None:
+            r.compile(YouTubeChatDownloader._REMAPPING)(item_info, info)
+        else:
+            remapping = YouTubeChatDownloader._REMAPPING if 'emotes' in projection \
+                else YouTubeChatDownloader._REMAPPING_WITHOUT_EMOTES
+            r.compile(remapping, projection=projection)(item_info, info)
 
         # check for colour information
         for colour_key in YouTubeChatDownloader._COLOUR_KEYS:
             if colour_key in item_info:  # if item has colour information
+                colour_key_name = YouTubeChatDownloader._COLOUR_KEY_NAMES[colour_key]
+                if projection is not None and colour_key_name not in projection:
+                    continue
                 rgba_colour = arbg_int_to_rgba(item_info[colour_key])
                 hex_colour = rgba_to_hex(rgba_colour)
-                new_key = camel_case_split(
-                    colour_key.replace('Color', 'Colour'))
-                info[new_key] = hex_colour
+                info[colour_key_name] = hex_colour
 
         item_endpoint = item_info.get('showItemEndpoint')
         if item_endpoint:  # has additional information
@@ -682,12 +1016,12 @@ class YouTubeChatDownloader(BaseChatDownloader):
 
             if renderer:
                 info.update(YouTubeChatDownloader._parse_item(
-                    renderer, offset=offset))
+                    renderer, offset=offset, projection=projection))
 
         header = item_info.get('header')
         if header:
             info.update(YouTubeChatDownloader._parse_item(
-                header, offset=offset))
+                header, offset=offset, projection=projection))
 
         BaseChatDownloader._move_to_dict(info, 'author')
 
@@ -731,44 +1065,56 @@ class YouTubeChatDownloader(BaseChatDownloader):
 
     @staticmethod
     def _parse_badges(badge_items):
-        badges = []
+        cache = YouTubeChatDownloader._get_parse_cache()
 
+        badges = []
         for badge in badge_items:
-            to_add = {}
-            parsed_badge = YouTubeChatDownloader._parse_item(badge)
-
-            title = parsed_badge.pop('tooltip', None)
-            if title:
-                to_add['title'] = title
-
-            icon = parsed_badge.pop('icon', None)
-            if icon:
-                to_add['icon_name'] = icon.lower()
-
-            badge_icons = parsed_badge.pop('badge_icons', None)
-            if badge_icons:
-                to_add['icons'] = []
-
-                url = None
-                for icon in badge_icons:
-                    url = icon.get('url')
-                    if url:
-                        matches = re.search(r'=s(\d+)', url)
-                        if matches:
-                            size = int(matches.group(1))
-                            to_add['icons'].append(
-                                Image(url, size, size).json())
-                if url:
-                    to_add['icons'].insert(0, Image(
-                        YouTubeChatDownloader._get_source_image_url(url), image_id='source').json())
+            key = None
+            if cache is not None:
+                # A badge is identified by its title, icon and image
+                renderer = try_get_first_value(badge) or {}
+                key = ('badge', renderer.get('tooltip'), multi_get(renderer, 'icon', 'iconType'),
+                       multi_get(renderer, 'customThumbnail', 'thumbnails', 0, 'url'))
 
-            badges.append(to_add)
+            badges.append(YouTubeChatDownloader._get_cached(
+                cache, key, YouTubeChatDownloader._copy_badge, YouTubeChatDownloader._parse_badge, badge))
 
-            # if 'member'
-            # remove the tooltip afterwards
-            # print(badges)
         return badges
 
+    @staticmethod
+    def _parse_badge(badge):
+        to_add = {}
+        parsed_badge = YouTubeChatDownloader._parse_item(badge)
+
+        title = parsed_badge.pop('tooltip', None)
+        if title:
+            to_add['title'] = title
+
+        icon = parsed_badge.pop('icon', None)
+        if icon:
+            to_add['icon_name'] = icon.lower()
+
+        badge_icons = parsed_badge.pop('badge_icons', None)
+        if badge_icons:
+            to_add['icons'] = []
+
+            url = None
+            for icon in badge_icons:
+                url = icon.get('url')
+                if url:
+                    matches = re.search(r'=s(\d+)', url)
+                    if matches:
+                        size = int(matches.group(1))
+                        to_add['icons'].append(
+                            Image(url, size, size).json())
+            if url:
+                to_add['icons'].insert(0, Image(
+                    YouTubeChatDownloader._get_source_image_url(url), image_id='source').json())
+
+        # if 'member'
+        # remove the tooltip afterwards
+        return to_add
+
     @staticmethod
     def _parse_thumbnails(item):
 
@@ -781,6 +1127,18 @@ class YouTubeChatDownloader(BaseChatDownloader):
         # https://yt3.ggpht.com/ytc/AAUvwnhBYeK7_iQTJbXe6kIMpMlCI2VsVHhb6GBJuYeZ
 
         thumbnails = item.get('thumbnails') or []
+
+        cache = YouTubeChatDownloader._get_parse_cache()
+        key = None
+        if cache is not None and thumbnails:
+            # Sizes are part of the URLs, so these identify the images
+            key = tuple([thumbnail.get('url') for thumbnail in thumbnails])
+
+        return YouTubeChatDownloader._get_cached(
+            cache, key, YouTubeChatDownloader._copy_images, YouTubeChatDownloader._parse_thumbnail_list, thumbnails)
+
+    @staticmethod
+    def _parse_thumbnail_list(thumbnails):
         final = list(map(lambda x: Image(**x).json(), thumbnails))
 
         if len(final) > 0:
@@ -789,6 +1147,55 @@ class YouTubeChatDownloader(BaseChatDownloader):
 
         return final
 
+    # Emotes, badges and images which have already been parsed in a chat.
+    # `_parse_chat_action` sets the chat's cache for the current thread.
+    _PARSE_CACHE = threading.local()
+    _PARSE_CACHE_SIZE = 2048
+
+    @staticmethod
+    def _get_parse_cache():
+        return getattr(YouTubeChatDownloader._PARSE_CACHE, 'cache', None)
+
+    @staticmethod
+    def _get_cached(cache, key, copy_function, parse_function, *args):
+        """Return a copy of the cached result of parsing an emote, badge or
+        list of images, parsing (and caching) it if it is not in the cache.
+        Nothing is cached if `cache` or `key` is None.
+
+        Cached values must not be modified through the messages they are
+        returned in, so `copy_function` is used to copy them. This is much
+        cheaper than parsing them again.
+        """
+        if cache is None or key is None:
+            return parse_function(*args)
+
+        value = cache.get(key)
+        if value is None:
+            value = parse_function(*args)
+            cache.set(key, value)
+
+        return copy_function(value)
+
+    @staticmethod
+    def _copy_images(images):
+        return [dict(image) for image in images]
+
+    @staticmethod
+    def _copy_emote(emote):
+        copied = dict(emote)
+        for key in ('shortcuts', 'search_terms'):
+            if copied[key] is not None:
+                copied[key] = list(copied[key])
+        copied['images'] = [dict(image) for image in emote['images']]
+        return copied
+
+    @staticmethod
+    def _copy_badge(badge):
+        copied = dict(badge)
+        if 'icons' in copied:
+            copied['icons'] = [dict(icon) for icon in copied['icons']]
+        return copied
+
     @staticmethod
     def _parse_action_button(item):
         endpoint = multi_get(item, 'buttonRenderer', 'navigationEndpoint')
@@ -927,6 +1334,19 @@ class YouTubeChatDownloader(BaseChatDownloader):
         'lowerBumper': 'lower_bumper',
     }
 
+    # Used when emotes are not selected by the projection
+    _REMAPPING_WITHOUT_EMOTES = {}
+    for _key, _remap in _REMAPPING.items():
+        if isinstance(_remap, r) and _remap.remap_function is _parse_runs.__func__:
+            _remap = r(None, _parse_runs_without_emotes, True)
+        _REMAPPING_WITHOUT_EMOTES[_key] = _remap
+    del _key, _remap  # Not class attributes
+
+    _FIELD_DEPENDENCIES = {
+        # The author's name defaults to '' if the author has no name
+        'author_name': ('author_id', 'author_images'),
+    }
+
     _COLOUR_KEYS = [
         # paid_message
         'authorNameTextColor', 'timestampColor', 'bodyBackgroundColor',
@@ -943,6 +1363,12 @@ class YouTubeChatDownloader(BaseChatDownloader):
         'detailTextColor'
     ]
 
+    # e.g. authorNameTextColor -> author_name_text_colour
+    _COLOUR_KEY_NAMES = {
+        _colour_key: get_snake_case_name(_colour_key.replace('Color', 'Colour'))
+        for _colour_key in _COLOUR_KEYS
+    }
+
     _STICKER_KEYS = [
         # to actually ignore
         'stickerDisplayWidth', 'stickerDisplayHeight',  # ignore
@@ -1165,6 +1591,7 @@ class YouTubeChatDownloader(BaseChatDownloader):
         'videoType': 'video_type',
         'viewCountText': r('view_count', lambda x: YouTubeChatDownloader._parse_text(x)),
         'shortViewCountText': r('short_view_count', lambda x: YouTubeChatDownloader._parse_text(x)),
+        'upcomingEventData': r('scheduled_start_time', lambda x: int_or_none(x.get('startTime'))),
 
         # 'videoId', 'thumbnail', 'title', 'viewCountText', 'navigationEndpoint', 'ownerBadges', 'trackingParams', 'shortViewCountText', 'menu', 'thumbnailOverlays'
     }
@@ -1249,7 +1676,7 @@ class YouTubeChatDownloader(BaseChatDownloader):
 
         user_url = f'https://www.youtube.com/{_type}{_id}'
         yt_info, ytcfg, _ = self._get_initial_info(
-            f'{user_url}/{vid_type}', params)
+            f'{user_url}/{vid_type}', params, names=('initial_data', 'ytcfg'))
 
         tabs = multi_get(yt_info, 'contents',
                          'twoColumnBrowseResultsRenderer', 'tabs')
@@ -1317,7 +1744,7 @@ class YouTubeChatDownloader(BaseChatDownloader):
     def get_playlist_items(self, playlist_url, params=None):
 
         yt_initial_data, ytcfg, _ = self._get_initial_info(
-            playlist_url, params)
+            playlist_url, params, names=('initial_data', 'ytcfg'))
 
         page_contents = self._get_rendered_content(yt_initial_data)
 
@@ -1362,23 +1789,132 @@ class YouTubeChatDownloader(BaseChatDownloader):
     _CONSENT_ID_REGEX = r'PENDING\+(\d+)'
     # https://github.com/ytdl-org/youtube-dl/blob/a8035827177d6b59aca03bd717acb6a9bdd75ada/youtube_dl/extractor/youtube.py#L251
 
+    # Client context (see `_client_ytcfg`) stored between sessions, if a
+    # cache directory is specified. Only these keys of ytcfg are needed.
+    _CLIENT_CACHE_VERSION = 1
+    _CLIENT_CACHE_TTL = 12 * 60 * 60  # seconds
+    _CLIENT_YTCFG_KEYS = (
+        'INNERTUBE_API_KEY',
+        'INNERTUBE_CONTEXT',
+        'INNERTUBE_CONTEXT_CLIENT_NAME',
+        'INNERTUBE_CLIENT_VERSION',
+        'DATASYNC_ID',
+        'DELEGATED_SESSION_ID',
+        'ID_TOKEN',
+        'SESSION_INDEX',
+    )
+
+    @staticmethod
+    def _get_client_cache_path(cache_dir, cookies=None):
+        if not cache_dir:
+            return None
+
+        # One cache per cookie file (i.e. account), and one for no cookies
+        if cookies:
+            key = hashlib.sha1(os.path.abspath(cookies).encode('utf-8')).hexdigest()[:16]
+        else:
+            key = 'anonymous'
+        return os.path.join(cache_dir, f'youtube-{key}.json')
+
+    def _get_account_id(self):
+        # Identifies the account which is logged in (if any), without storing its cookies
+        sapisid = self.get_cookie_value('SAPISID') or self.get_cookie_value('__Secure-3PAPISID') or ''
+        return hashlib.sha1(sapisid.encode('utf-8')).hexdigest()
+
+    def _load_client_cache(self):
+        """Load the client context (and, if no cookie file is used, the
+        cookies) of a previous session, if they were stored recently enough
+        and for the same account.
+        """
+        if not self._client_cache_path:
+            return
+
+        try:
+            with open(self._client_cache_path, encoding='utf-8') as f:
+                cache = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log('debug', f'Unable to read client cache: {e}')
+            return
+
+        now = time.time()
+        if not isinstance(cache, dict) or cache.get('version') != self._CLIENT_CACHE_VERSION \
+                or not now - self._CLIENT_CACHE_TTL < (cache.get('time') or 0) <= now:
+            return
+
+        if self._anonymous:
+            for cookie in cache.get('cookies') or []:
+                expires = cookie.get('expires')
+                if (expires is None or expires > now) and self.get_cookie_value(cookie['name']) is None:
+                    self.set_cookie_value(
+                        cookie['domain'], cookie['name'], cookie['value'], expire_time=expires,
+                        path=cookie.get('path', '/'), secure=cookie.get('secure', False))
+
+        ytcfg = cache.get('ytcfg') or {}
+        if cache.get('account') == self._get_account_id() \
+                and ytcfg.get('INNERTUBE_API_KEY') and ytcfg.get('INNERTUBE_CONTEXT'):
+            self._client_ytcfg = ytcfg
+            log('debug', f'Loaded client context from {self._client_cache_path}')
+
+    def _save_client_cache(self, ytcfg):
+        if not self._client_cache_path:
+            return
+
+        cache = {
+            'version': self._CLIENT_CACHE_VERSION,
+            'time': time.time(),
+            'account': self._get_account_id(),
+            'ytcfg': {key: ytcfg[key] for key in self._CLIENT_YTCFG_KEYS if key in ytcfg},
+        }
+        if self._anonymous:
+            cache['cookies'] = [{
+                'name': cookie.name,
+                'value': cookie.value,
+                'domain': cookie.domain,
+                'path': cookie.path,
+                'expires': cookie.expires,
+                'secure': cookie.secure,
+            } for cookie in self.session.cookies if cookie.domain.endswith('youtube.com')]
+
+        # Write to a temporary file first, since other processes may be reading the cache
+        cache_dir = os.path.dirname(self._client_cache_path)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=cache_dir, delete=False) as f:
+                json.dump(cache, f)
+            os.replace(f.name, self._client_cache_path)
+        except OSError as e:
+            log('debug', f'Unable to write client cache: {e}')
+
     def _initialize_consent(self):
         if self.get_cookie_value('__Secure-3PSID'):
             return
         socs = self.get_cookie_value('SOCS')
-        if socs and not socs.value.startswith('CAA'):  # not consented
+        if socs and not socs.startswith('CAA'):  # not consented
             return
         self.set_cookie_value('.youtube.com', 'SOCS', 'CAI', secure=True)  # accept all (required for mixes)
 
     def _generate_sapisidhash_header(self):
+        time_now = round(time.time())
+
+        # The header only changes when its timestamp does, so within the same
+        # second, reuse it (without reading the cookies)
+        last_header = self._sapisidhash_header
+        if last_header is not None and last_header[0] == time_now:
+            return last_header[1]
+
+        header = self._compute_sapisidhash_header(time_now)
+        self._sapisidhash_header = (time_now, header)
+        return header
+
+    def _compute_sapisidhash_header(self, time_now):
         sapis_id = self.get_cookie_value('SAPISID')
         sapisid_cookie = self.get_cookie_value('__Secure-3PAPISID') or sapis_id
 
         if sapisid_cookie is None:
             return
 
-        time_now = round(time.time())
-
         # SAPISID cookie is required if not already present
         if not sapis_id:
             self.set_cookie_value(
@@ -1420,19 +1956,49 @@ class YouTubeChatDownloader(BaseChatDownloader):
             except RequestException as e:
                 self.retry(attempt_number, error=e, **program_params)
 
-    def _get_initial_info(self, url, params=None):
+    def _get_initial_info(self, url, params=None, headers=None, names=None):
+        """Get the initial data, ytcfg and player response of a page. The
+        page is read (and searched) in chunks, and reading stops once all
+        values have been found.
+
+        :param url: The URL of the page
+        :type url: str
+        :param params: The chat's parameters, defaults to None
+        :type params: dict, optional
+        :param headers: Headers to send with the request, defaults to None
+        :type headers: dict, optional
+        :param names: Names of the values to extract (see
+            `_YT_INITIAL_INFO_PATTERNS`), defaults to None (all values).
+            Values which are not extracted are empty
+        :type names: tuple, optional
+        :raises VideoNotFound: if the page does not exist
+        :raises ParsingError: if the page does not contain initial data
+        :return: The initial data, ytcfg and player response
+        :rtype: tuple
+        """
         if params is None:
             params = {}
 
+        if names is None:
+            names = self._YT_INITIAL_INFO_PATTERNS.keys()
+        patterns = {name: self._YT_INITIAL_INFO_PATTERNS[name] for name in names}
+
         max_attempts = params.get('max_attempts', 1)
         for attempt_number in attempts(max_attempts):
             try:
-                response = self._session_get(url)
-                html = response.text
-                yt = regex_search(html, self._YT_INITIAL_DATA_RE)
-                yt_initial_data = try_parse_json(yt)
-
-                if response.status_code != 200:
+                extractor = ScriptJSONExtractor(patterns)
+                with self._session_get(url, headers=headers, stream=True) as response:
+                    if response.status_code == 200:
+                        self._feed_response(response, extractor)
+                        html = None
+                    else:  # Read the whole page, to check for errors
+                        html = response.text
+                        extractor.feed(html)
+
+                values = extractor.close()
+                yt_initial_data = values.get('initial_data')
+
+                if html is not None:
                     # Check for errors
                     title = get_title_of_webpage(html)
                     if response.status_code == 404:
@@ -1442,30 +2008,35 @@ class YouTubeChatDownloader(BaseChatDownloader):
                         continue
 
                 if not yt_initial_data:  # Fatal error
-                    log('debug', html)
+                    log('debug', html or f'No initial data found in {url}')
                     raise ParsingError(f'Unable to parse initial video data')
 
-                cfg = regex_search(html, self._YT_CFG_RE)
-                ytcfg = try_parse_json(cfg, {})
-
-                player_response = regex_search(
-                    html, self._YT_INITIAL_PLAYER_RESPONSE_RE)
-
-                player_response_info = try_parse_json(player_response, {})
-
-                return yt_initial_data, ytcfg, player_response_info
+                return yt_initial_data, values.get('ytcfg', {}), values.get('player_response', {})
 
             except RequestException as e:
                 self.retry(attempt_number, error=e, **params)
 
         return None, None, None
 
+    def _feed_response(self, response, extractor):
+        """Feed the text of a (streamed) response to an extractor, until all
+        of its values have been found. The rest of the response is not read.
+        """
+        decoder = codecs.getincrementaldecoder(
+            response.encoding or 'utf-8')(errors='replace')
+        for chunk in response.iter_content(self._YT_INITIAL_INFO_CHUNK_SIZE):
+            if extractor.feed(decoder.decode(chunk)):
+                return
+        extractor.feed(decoder.decode(b'', final=True))
+
     def get_video_data(self, video_id, params=None):
         return self._parse_video_data(video_id, params)[0]
 
-    def _parse_video_data(self, video_id, params=None, video_type='video'):
-        details = {}
-
+    def _get_html_video_info(self, video_id, params=None, video_type='video'):
+        """Get the initial data, ytcfg and player response of a video (or
+        clip) from its watch page. The ytcfg is kept, so that the innertube
+        API can be used for other videos.
+        """
         if video_type == 'clip':
             original_url = self._YT_CLIP_TEMPLATE.format(video_id)
         else:  # video_type == 'video'
@@ -1474,6 +2045,96 @@ class YouTubeChatDownloader(BaseChatDownloader):
         yt_initial_data, ytcfg, player_response_info = self._get_initial_info(
             original_url, params)
 
+        if ytcfg.get('INNERTUBE_API_KEY') and ytcfg.get('INNERTUBE_CONTEXT'):
+            self._client_ytcfg = ytcfg
+            self._save_client_cache(ytcfg)
+
+        return yt_initial_data, ytcfg, player_response_info
+
+    def _innertube_request(self, endpoint_template, video_id, params=None):
+        """Make a single request for a video to an endpoint of the innertube
+        API. The ytcfg of a previous watch page is used as the client context.
+
+        :return: The response, or None if there is no client context or the
+            request fails
+        :rtype: dict
+        """
+        ytcfg = self._client_ytcfg
+        if not ytcfg:
+            return None
+
+        headers = self._generate_headers(ytcfg)
+        headers.update({
+            'content-type': 'application/json',
+            'referer': self._YT_VIDEO_TEMPLATE.format(video_id)
+        })
+        data = {
+            'context': ytcfg['INNERTUBE_CONTEXT'],
+            'videoId': video_id
+        }
+
+        # Do not retry, since the watch page can be used instead
+        single_attempt = {**(params or {}), 'max_attempts': 1}
+        try:
+            return self._get_continuation_info(endpoint_template.format(
+                ytcfg['INNERTUBE_API_KEY']), single_attempt, json=data, headers=headers)
+        except RetriesExceeded as e:
+            log('debug', f'Unable to use the innertube API ({e}), using the watch page instead')
+            return None
+
+    def _get_innertube_initial_data(self, video_id, params=None):
+        """Get the initial data of a video from the innertube API's ``next``
+        endpoint, which is much smaller than the watch page.
+
+        :return: The initial data, or None if it cannot be retrieved
+        :rtype: dict
+        """
+        yt_initial_data = self._innertube_request(
+            self._YOUTUBE_NEXT_API_TEMPLATE, video_id, params)
+        if not (yt_initial_data or {}).get('contents'):
+            return None
+        return yt_initial_data
+
+    @staticmethod
+    def _has_live_chat(yt_initial_data):
+        return bool(multi_get(yt_initial_data, 'contents', 'twoColumnWatchNextResults',
+                              'conversationBar', 'liveChatRenderer'))
+
+    def _get_innertube_video_info(self, video_id, params=None, yt_initial_data=None):
+        """Get the initial data and player response of a video from the
+        innertube API's ``next`` and ``player`` endpoints, which return the
+        same JSON as the watch page, without the rest of the page.
+
+        :param yt_initial_data: The initial data, if it has already been
+            requested (see `_get_innertube_initial_data`), defaults to None
+        :type yt_initial_data: dict, optional
+        :return: The initial data, ytcfg and player response, or None if
+            there is no client context, a request fails, or the video's
+            chat cannot be found
+        :rtype: tuple
+        """
+        if yt_initial_data is None:
+            yt_initial_data = self._get_innertube_initial_data(video_id, params)
+        if not self._has_live_chat(yt_initial_data):
+            return None
+
+        player_response_info = self._innertube_request(
+            self._YOUTUBE_PLAYER_API_TEMPLATE, video_id, params)
+        if not multi_get(player_response_info, 'videoDetails'):
+            return None
+
+        return yt_initial_data, self._client_ytcfg, player_response_info
+
+    def _parse_video_data(self, video_id, params=None, video_type='video', yt_initial_data=None):
+        details = {}
+
+        video_info = None
+        if video_type == 'video':  # The watch page is needed for clip info
+            video_info = self._get_innertube_video_info(video_id, params, yt_initial_data)
+        if video_info is None:
+            video_info = self._get_html_video_info(video_id, params, video_type)
+        yt_initial_data, ytcfg, player_response_info = video_info
+
         if not player_response_info:
             log('debug', yt_initial_data)
             log('warning', f'Unable to parse player response, proceeding with caution')
@@ -1543,11 +2204,11 @@ class YouTubeChatDownloader(BaseChatDownloader):
 
         return details, player_response_info, yt_initial_data, ytcfg
 
-    def _get_initial_video_info(self, video_id, params=None, video_type='video'):
+    def _get_initial_video_info(self, video_id, params=None, video_type='video', yt_initial_data=None):
         """ Get initial YouTube video information. """
 
         details, player_response_info, yt_initial_data, ytcfg = self._parse_video_data(
-            video_id, params, video_type)
+            video_id, params, video_type, yt_initial_data)
 
         # Error checking
         if not details['continuation_info']:
@@ -1667,8 +2328,386 @@ class YouTubeChatDownloader(BaseChatDownloader):
 
         return headers
 
-    def _get_chat_messages(self, initial_info, ytcfg, params):
+    # Action handlers. Each returns the original item, its message type and
+    # the (updated) parsed data. If the message type is rejected by the
+    # message filter, the item is not parsed, and the data returned is None.
+    @staticmethod
+    def _is_rejected(original_message_type, message_filter):
+        return message_filter is not None and get_snake_case_name(
+            original_message_type, 'liveChat', 'Renderer') not in message_filter
+
+    def _parse_item_action(self, action, action_type, item_key, data, offset, message_filter=None, projection=None):
+        original_item = multi_get(action, action_type, item_key) or {}
+        original_message_type = try_get_first_key(original_item)
+        if original_message_type and self._is_rejected(original_message_type, message_filter):
+            return original_item, original_message_type, None
+        return original_item, original_message_type, self._parse_item(original_item, data, offset, projection)
+
+    def _parse_removal_action(self, action, action_type, message_type, data, offset, message_filter=None, projection=None):
+        if self._is_rejected(message_type, message_filter):
+            return action, message_type, None
+        return action, message_type, self._parse_item(action, data, offset, projection)
+
+    def _parse_banner_action(self, action, action_type, item_key, data, offset, message_filter=None, projection=None):
+        original_item = multi_get(action, action_type, item_key)
+        if not original_item:
+            debug_log(
+                'No bannerRenderer item',
+                f'Action type: {action_type}',
+                f'Action: {action}',
+                f'Parsed data: {data}'
+            )
+            return {}, None, data
+
+        original_message_type = try_get_first_key(original_item)
+        if original_message_type and self._is_rejected(original_message_type, message_filter):
+            return original_item, original_message_type, None
+
+        contents = original_item[original_message_type].get('contents')
+        data.update(self._parse_item(contents, offset=offset, projection=projection))
+        return original_item, original_message_type, data
+
+    # Maps each action type to its handler, and the handler's argument
+    # (i.e., the key of the item, or the message type)
+    _ACTION_HANDLERS = {}
+    for _action_type in _KNOWN_ITEM_ACTION_TYPES:
+        _ACTION_HANDLERS[_action_type] = (_parse_item_action, 'item')
+    for _action_type in _KNOWN_REPLACE_ACTION_TYPES:
+        _ACTION_HANDLERS[_action_type] = (
+            _parse_item_action, 'replacementItem')
+    for _action_type in _KNOWN_TOOLTIP_ACTION_TYPES:
+        _ACTION_HANDLERS[_action_type] = (_parse_item_action, 'tooltip')
+    for _action_type in _KNOWN_ADD_BANNER_TYPES:
+        _ACTION_HANDLERS[_action_type] = (
+            _parse_banner_action, 'bannerRenderer')
+    for _action_type in _KNOWN_REMOVE_ACTION_TYPES:
+        # markChatItemsByAuthorAsDeletedAction, removeChatItemAction, ...
+        _ACTION_HANDLERS[_action_type] = (_parse_removal_action, 'banUser')
+    _ACTION_HANDLERS['markChatItemAsDeletedAction'] = (
+        _parse_removal_action, 'deletedMessage')
+    for _action_type in _KNOWN_REMOVE_BANNER_TYPES:
+        _ACTION_HANDLERS[_action_type] = (
+            _parse_removal_action, 'removeBanner')
+    del _action_type  # Not a class attribute
+
+    def _parse_chat_action(self, action, offset=None, message_filter=None, projection=None, cache=None):
+        """Parse a single chat action (as returned by the live chat API)
+
+        :param action: The action
+        :type action: dict
+        :param offset: Offset (in seconds) of the video, defaults to None
+        :type offset: float, optional
+        :param message_filter: Message types to parse (see
+            `_get_message_filter`). Defaults to None (parse all messages)
+        :type message_filter: frozenset, optional
+        :param projection: Fields to parse, defaults to None (all fields).
+            Other fields may also be included
+        :type projection: Projection, optional
+        :param cache: Cache of the chat's parsed emotes, badges and images,
+            defaults to None (no caching)
+        :type cache: LRUCache, optional
+        :return: The parsed chat item, or None if the action should be ignored
+            (or its type is not in `message_filter`)
+        :rtype: dict
+        """
+        data = {}
+
+        # if it is a replay chat item action, must re-base it
+        replay_chat_item_action = action.get(
+            'replayChatItemAction')
+        if replay_chat_item_action:
+            offset_time = replay_chat_item_action.get(
+                'videoOffsetTimeMsec')
+            if offset_time:
+                data['time_in_seconds'] = float(offset_time) / 1000
+
+            action = replay_chat_item_action['actions'][0]
+
+        action.pop('clickTrackingParams', None)
+        original_action_type = try_get_first_key(action)
+
+        data['action_type'] = get_snake_case_name(
+            original_action_type, suffixes=('Action', 'Command'))
+
+        # We now parse the info and get the message
+        # type based on the type of action
+        handler = self._ACTION_HANDLERS.get(original_action_type)
+        if handler is not None:
+            parse_action, argument = handler
+            previous_cache = self._get_parse_cache()
+            self._PARSE_CACHE.cache = cache
+            try:
+                original_item, original_message_type, data = parse_action(
+                    self, action, original_action_type, argument, data, offset, message_filter, projection)
+            finally:
+                self._PARSE_CACHE.cache = previous_cache
+            if data is None:
+                return None  # rejected by the message filter
+
+        elif original_action_type in self._KNOWN_IGNORE_ACTION_TYPES:
+            return None  # ignore these
+
+        else:
+            # not processing these
+            original_message_type = None
+            original_item = {}
+            debug_log(
+                f'Unknown action: {original_action_type}',
+                action,
+                data
+            )
+
+        item_info = original_item.get(original_message_type)
+        if item_info and not self._KNOWN_KEYS.issuperset(item_info):
+            missing_keys = item_info.keys() - self._KNOWN_KEYS
+            debug_log(
+                f'Missing keys found: {missing_keys}',
+                f'Message type: {original_message_type}',
+                f'Action type: {original_action_type}',
+                f'Action: {action}',
+                f'Parsed data: {data}'
+            )
+
+        if not data:
+            debug_log(
+                f'Parse of action returned empty results: {original_action_type}',
+                action
+            )
+
+        if original_message_type:
+
+            data['message_type'] = get_snake_case_name(
+                original_message_type, 'liveChat', 'Renderer')
+
+            # TODO add option to keep placeholder items
+            if original_message_type in self._KNOWN_IGNORE_MESSAGE_TYPES:
+                return None  # skip placeholder items
+            elif original_message_type not in self._KNOWN_ACTION_TYPES[original_action_type]:
+                debug_log(
+                    f'Unknown message type "{original_message_type}" for action "{original_action_type}"',
+                    f"New message type: {data['message_type']}",
+                    f'Action: {action}',
+                    f'Parsed data: {data}'
+                )
+
+        else:  # no type # can ignore message
+            debug_log(
+                'No message type',
+                f'Action type: {original_action_type}',
+                f'Action: {action}',
+                f'Parsed data: {data}'
+            )
+            return None
+
+        return data
+
+    def _parse_continuations(self, info):
+        """Parse the continuation information of a live chat response
+
+        :param info: The `liveChatContinuation` object of the response
+        :type info: dict
+        :return: Whether there is a chat continuation, the continuation and
+            click tracking parameters to use for the next request, and the
+            number of milliseconds to wait before making the next request
+        :rtype: (bool, str, str, float)
+        """
+        # assume there are no more chat continuations
+        has_continuation = False
+        continuation = click_tracking_params = None
+        total_sleep_duration = 0
+
+        # parse the continuation information
+        for cont in info.get('continuations') or []:
+
+            continuation_key = try_get_first_key(cont)
+            continuation_info = cont[continuation_key]
+
+            log('debug', f'Continuation info: {continuation_info}')
 
+            if continuation_key in self._KNOWN_CHAT_CONTINUATIONS:
+
+                # set new chat continuation
+                # overwrite if there is continuation data
+                continuation = continuation_info.get('continuation')
+
+                click_tracking_params = continuation_info.get(
+                    'clickTrackingParams') or continuation_info.get('trackingParams')
+                # there is a chat continuation
+                has_continuation = True
+
+            elif continuation_key in self._KNOWN_SEEK_CONTINUATIONS:
+                pass
+                # ignore these continuations
+
+            else:
+                debug_log(
+                    f'Unknown continuation: {continuation_key}',
+                    cont
+                )
+
+            # sometimes continuation contains timeout info
+            sleep_duration = continuation_info.get('timeoutMs')
+            # and not actions:# and not force_no_timeout:
+            if sleep_duration:
+                # Timeouts help prevent 429 errors (caused by too many requests).
+                #
+                # A single request to the YouTube live chat endpoint seems to only
+                # go back around 10 seconds (only retrieving around 150-200 messages
+                # at any given time).
+                #
+                # For very large livestreams, YouTube sometimes sets timeouts to be
+                # more than 10 seconds (most likely to alleviate server stress).
+                # This means that, normally, users will not be able to see all chat
+                # messages (leaving a gap of timeout - 10 seconds).
+                #
+                # To get around this, we clamp the timeout to be between 0 and 8000
+                # milliseconds (a 2 second window for making the next request).
+                # This ensures that no messages are missed and we do spam YouTube
+                # with requests (which may lead to 429 errors or IP blocking).
+
+                total_sleep_duration += max(min(sleep_duration, 8000), 0)
+
+        return has_continuation, continuation, click_tracking_params, total_sleep_duration
+
+    @staticmethod
+    def _get_poll_scheduler(params):
+        fill_target = params.get('poll_fill_target')
+        return LivePollScheduler() if fill_target is None else LivePollScheduler(fill_target)
+
+    @staticmethod
+    def _get_action_message_info(action):
+        """Get the ID and time sent (in seconds) of an action's message"""
+        item = multi_get(action, 'addChatItemAction', 'item')
+        renderer = (try_get_first_value(item) or {}) if item else {}
+        timestamp = int_or_none(renderer.get('timestampUsec'))
+        return renderer.get('id'), timestamp / 1e6 if timestamp else None
+
+    def _schedule_next_poll(self, poll_scheduler, actions, sleep_duration):
+        """Record a live chat response, and choose how long to wait (in
+        milliseconds) before the next request, given the server's suggestion
+        """
+        message_ids = []
+        timestamps = []
+        for action in actions:
+            message_id, timestamp = self._get_action_message_info(action)
+            if message_id:
+                message_ids.append(message_id)
+            if timestamp:
+                timestamps.append(timestamp)
+
+        interval = poll_scheduler.update(
+            len(actions), message_ids, (sleep_duration or 0) / 1000 or None,
+            timestamps=timestamps)
+        log('debug', f'{poll_scheduler}')
+        return interval * 1000
+
+    _POLL_SESSION_LOG_INTERVAL = 60  # seconds
+
+    def _get_session_merger(self, params):
+        """Create a LiveSessionMerger if a live chat should be polled by
+        multiple sessions (i.e., if `poll_sessions` is greater than 1)"""
+        poll_sessions = params.get('poll_sessions')
+        if poll_sessions is None:
+            poll_sessions = 1
+        elif poll_sessions < 1:
+            raise InvalidParameter(
+                f'Invalid number of poll sessions: {poll_sessions}. Must be at least 1')
+        if poll_sessions == 1:
+            return None
+
+        log('debug', f'Polling live chat with {poll_sessions} sessions.')
+        return LiveSessionMerger([self._get_poll_scheduler(params) for _ in range(poll_sessions)])
+
+    @staticmethod
+    def _get_session_stagger(merger):
+        # Spread the sessions' requests evenly over the shortest time between requests
+        return LivePollScheduler.MIN_INTERVAL / len(merger.sessions)
+
+    def _get_staggered_chat(self, initial_info, ytcfg, params, merger):
+        """Poll a live chat with several independent sessions (each following
+        its own continuations), whose requests are staggered, and merge their
+        messages into a single stream without duplicates. Since each response
+        only contains the most recent messages, this fills in the messages
+        that a single session would miss in very busy chats.
+
+        :param merger: Merges the sessions' messages (see `_get_session_merger`)
+        :type merger: LiveSessionMerger
+        :return: Generator which yields the merged messages
+        :rtype: generator
+        """
+        stagger = self._get_session_stagger(merger)
+
+        def create_factory(index):
+            def get_session_messages():
+                interruptible_sleep(index * stagger)
+                yield from self._get_chat_messages(
+                    initial_info, ytcfg, params, merger.sessions[index]['poll_scheduler'])
+            return get_session_messages
+
+        next_log_time = time.monotonic() + self._POLL_SESSION_LOG_INTERVAL
+        factories = [create_factory(index) for index in range(len(merger.sessions))]
+        for index, message in merged_parallel_generator(factories):
+            if merger.add(index, message):
+                yield message
+
+            if time.monotonic() >= next_log_time:
+                log('debug', f'{merger}')
+                next_log_time += self._POLL_SESSION_LOG_INTERVAL
+
+        log('debug', f'{merger}')
+
+    async def _get_staggered_chat_async(self, initial_info, ytcfg, params, client, merger):
+        """Asynchronous version of `_get_staggered_chat`, which runs each
+        session in its own task.
+        """
+        stagger = self._get_session_stagger(merger)
+        entries = asyncio.Queue(256)
+
+        async def run_session(index):
+            try:
+                await client.sleep(index * stagger)
+                async for message in self._get_chat_messages_async(
+                        initial_info, ytcfg, params, client, merger.sessions[index]['poll_scheduler']):
+                    await entries.put((index, message, None))
+                await entries.put((index, None, None))
+            except Exception as e:
+                await entries.put((index, None, e))
+
+        tasks = [asyncio.ensure_future(run_session(index))
+                 for index in range(len(merger.sessions))]
+        remaining = len(tasks)
+        next_log_time = time.monotonic() + self._POLL_SESSION_LOG_INTERVAL
+        try:
+            while remaining:
+                index, message, error = await entries.get()
+                if error is not None:
+                    raise error
+                if message is None:  # Session finished
+                    remaining -= 1
+                    continue
+
+                if merger.add(index, message):
+                    yield message
+
+                if time.monotonic() >= next_log_time:
+                    log('debug', f'{merger}')
+                    next_log_time += self._POLL_SESSION_LOG_INTERVAL
+
+            log('debug', f'{merger}')
+
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _get_chat_request_info(self, initial_info, ytcfg, params):
+        """Validate the parameters and determine how to request the chat of
+        a video. Used by both the synchronous and asynchronous chat loops.
+
+        :return: Dictionary containing the initial continuation, the URLs of
+            the initial page and the continuation API, the request headers
+            and the message filters
+        :rtype: dict
+        """
         initial_continuation_info = initial_info.get('continuation_info') or {}
         if len(initial_continuation_info) < 2:
             raise NoContinuation(
@@ -1678,7 +2717,6 @@ class YouTubeChatDownloader(BaseChatDownloader):
 
         # duration = initial_info.get('duration')
         # stream_start_time = initial_info.get('start_time')
-        offset = initial_info.get('offset')  # Clips
 
         start_time = ensure_seconds(params.get('start_time'))
         end_time = ensure_seconds(params.get('end_time'))
@@ -1710,8 +2748,6 @@ class YouTubeChatDownloader(BaseChatDownloader):
 
         # force_no_timeout = params.get('force_no_timeout')
 
-        max_attempts = params.get('max_attempts')
-
         messages_groups_to_add = params.get('message_groups') or []
         messages_types_to_add = params.get('message_types') or []
 
@@ -1724,316 +2760,282 @@ class YouTubeChatDownloader(BaseChatDownloader):
         self.check_for_invalid_types(
             messages_types_to_add, self._MESSAGE_TYPES)
 
-        # Generate base headers and update session headers
-        self.update_session_headers(self._generate_headers(ytcfg))
-
-        self.update_session_headers({
+        # Generate base headers
+        headers = self._generate_headers(ytcfg)
+        headers.update({
             'content-type': 'application/json',
             'referer': init_page
         })
 
-        innertube_context = ytcfg.get('INNERTUBE_CONTEXT') or {}
+        return {
+            'continuation': continuation,
+            'is_replay': is_replay,
+            'offset': initial_info.get('offset'),  # Clips
+            'start_time': start_time,
+            'end_time': end_time,
+            'offset_milliseconds': offset_milliseconds,
+            'init_page': init_page,
+            'continuation_url': continuation_url,
+            'headers': headers,
+            'body_encoder': ContinuationBodyEncoder(ytcfg.get('INNERTUBE_CONTEXT') or {}),
+            'message_groups': messages_groups_to_add,
+            'message_types': messages_types_to_add,
+            'message_filter': self._get_message_filter(
+                self._MESSAGE_GROUPS, messages_groups_to_add, messages_types_to_add),
+            'projection': self._get_projection(params),
+            'cache': LRUCache(self._PARSE_CACHE_SIZE),
+        }
 
-        message_count = 0
-        first_time = True
-        click_tracking_params = None
+    def _get_chat_request_headers(self, request_info):
+        """Get the headers of the next request for a chat. Headers are sent
+        with each request (rather than set on the session), since the session
+        may be shared by other chats.
+        """
+        headers = dict(request_info['headers'])
 
-        while True:
-            continuation_params = {
-                'context': innertube_context,
-                'continuation': continuation
-            }
+        # Update authentication header, if necessary
+        auth = self._generate_sapisidhash_header()
+        if auth:
+            headers['authorization'] = auth
 
-            # Update authentication header, if necessary
-            auth = self._generate_sapisidhash_header()
-            if auth:
-                self.update_session_headers({
-                    'authorization': auth
-                })
+        return headers
 
-            if first_time:
-                # must run to get first few messages, otherwise might miss some
-                yt_info = self._get_initial_info(init_page, params)[0]
+    @staticmethod
+    def _encode_continuation_request(request_info, continuation, click_tracking_params, headers):
+        """Encode the body of a request for the next page of a chat, and add
+        its content type to the headers"""
+        headers['content-type'] = 'application/json'
+        return request_info['body_encoder'].encode(
+            continuation, click_tracking_params,
+            request_info['offset_milliseconds'] if request_info['is_replay'] else None)
 
-            else:
-                if is_replay and offset_milliseconds is not None:
-                    continuation_params['currentPlayerState'] = {
-                        'playerOffsetMs': offset_milliseconds}
+    @staticmethod
+    def _get_chat_page_info(yt_info, request_info):
+        """Get the continuation information and actions of a page of chat
 
-                if click_tracking_params:
-                    continuation_params['context']['clickTracking'] = {
-                        'clickTrackingParams': click_tracking_params}
+        :return: The continuation information and actions, or None if there
+            are no more pages
+        :rtype: (dict, list)
+        """
+        logged_in_info = multi_get(
+            yt_info, 'responseContext', 'serviceTrackingParams', 1, 'params', 0)
+        log('debug', f'Logged-in info: {logged_in_info}')
+
+        info = multi_get(yt_info, 'continuationContents',
+                         'liveChatContinuation')
+        if not info:
+            log('debug', f'No continuation information found: {yt_info}')
+            return None
+
+        actions = info.get('actions') or []
+        if not actions:
+            if request_info['is_replay']:
+                # no more actions to process in a chat replay
+                return None
+            # otherwise, is live, so keep trying
+            log('debug', 'No actions to process.')
 
-                yt_info = self._get_continuation_info(
-                    continuation_url, params, json=continuation_params)
+        return info, actions
 
-            debug_info = {
-                'click_tracking': multi_get(continuation_params, 'context', 'clickTracking'),
-                'continuation': multi_get(continuation_params, 'continuation')
-            }
-            log('debug', [
-                f'Continuation parameters: {debug_info}',
-                f"Session headers: {', '.join(self.session.headers.keys())}"
-            ])
-
-            logged_in_info = multi_get(
-                yt_info, 'responseContext', 'serviceTrackingParams', 1, 'params', 0)
-            log('debug', f'Logged-in info: {logged_in_info}')
-
-            info = multi_get(yt_info, 'continuationContents',
-                             'liveChatContinuation')
-            if not info:
-                log('debug', f'No continuation information found: {yt_info}')
-                return
+    def _parse_chat_page(self, actions, first_time, request_info):
+        """Parse the actions of a page of chat
 
-            actions = info.get('actions') or []
+        :return: The messages to add, and whether the end time (of a chat
+            replay) has been reached
+        :rtype: (list, bool)
+        """
+        is_replay = request_info['is_replay']
+        offset = request_info['offset']
+        start_time = request_info['start_time']
+        end_time = request_info['end_time']
+
+        messages = []
+        for action in actions:
+            data = self._parse_chat_action(
+                action, offset, request_info['message_filter'], request_info['projection'], request_info['cache'])
+            if data is None:  # ignored, or rejected by the message filter
+                continue
 
-            if actions:
-                for action in actions:
-                    data = {}
-
-                    # if it is a replay chat item action, must re-base it
-                    replay_chat_item_action = action.get(
-                        'replayChatItemAction')
-                    if replay_chat_item_action:
-                        offset_time = replay_chat_item_action.get(
-                            'videoOffsetTimeMsec')
-                        if offset_time:
-                            data['time_in_seconds'] = float(offset_time) / 1000
-
-                        action = replay_chat_item_action['actions'][0]
-
-                    action.pop('clickTrackingParams', None)
-                    original_action_type = try_get_first_key(action)
-
-                    data['action_type'] = camel_case_split(
-                        remove_suffixes(original_action_type, ('Action', 'Command')))
-
-                    original_message_type = None
-                    original_item = {}
-
-                    # We now parse the info and get the message
-                    # type based on the type of action
-                    if original_action_type in self._KNOWN_ITEM_ACTION_TYPES:
-                        original_item = multi_get(
-                            action, original_action_type, 'item')
-
-                        original_message_type = try_get_first_key(
-                            original_item)
-                        data = self._parse_item(original_item, data, offset)
-
-                    elif original_action_type in self._KNOWN_REMOVE_ACTION_TYPES:
-                        original_item = action
-                        if original_action_type == 'markChatItemAsDeletedAction':
-                            original_message_type = 'deletedMessage'
-                        else:  # markChatItemsByAuthorAsDeletedAction, removeChatItemAction
-                            original_message_type = 'banUser'
-
-                        data = self._parse_item(original_item, data, offset)
-
-                    elif original_action_type in self._KNOWN_REPLACE_ACTION_TYPES:
-                        original_item = multi_get(
-                            action, original_action_type, 'replacementItem')
-                        original_message_type = try_get_first_key(
-                            original_item)
-                        data = self._parse_item(original_item, data, offset)
-
-                    elif original_action_type in self._KNOWN_TOOLTIP_ACTION_TYPES:
-                        original_item = multi_get(
-                            action, original_action_type, 'tooltip')
-                        original_message_type = try_get_first_key(
-                            original_item)
-                        data = self._parse_item(original_item, data, offset)
-
-                    elif original_action_type in self._KNOWN_ADD_BANNER_TYPES:
-                        original_item = multi_get(
-                            action, original_action_type, 'bannerRenderer')
-
-                        if original_item:
-                            original_message_type = try_get_first_key(
-                                original_item)
-                            contents = original_item[original_message_type].get(
-                                'contents')
-                            parsed_contents = self._parse_item(
-                                contents, offset=offset)
-
-                            data.update(parsed_contents)
+            # if from a replay, check whether to skip this message or not, based on its time
+            if is_replay:
+                # assume message is at beginning if it does not have a time component
+                time_in_seconds = data.get(
+                    'time_in_seconds', 0) + (offset or 0)
 
-                        else:
-                            debug_log(
-                                'No bannerRenderer item',
-                                f'Action type: {original_action_type}',
-                                f'Action: {action}',
-                                f'Parsed data: {data}'
-                            )
-
-                    elif original_action_type in self._KNOWN_REMOVE_BANNER_TYPES:
-                        original_item = action
-                        original_message_type = 'removeBanner'
-                        data = self._parse_item(original_item, data, offset)
-
-                    elif original_action_type in self._KNOWN_IGNORE_ACTION_TYPES:
-                        continue  # ignore these
-
-                    else:
-                        # not processing these
-                        debug_log(
-                            f'Unknown action: {original_action_type}',
-                            action,
-                            data
-                        )
-
-                    test_for_missing_keys = original_item.get(
-                        original_message_type, {}).keys()
-                    missing_keys = test_for_missing_keys - self._KNOWN_KEYS
-
-                    if not data:
-                        debug_log(
-                            f'Parse of action returned empty results: {original_action_type}',
-                            action
-                        )
-
-                    if missing_keys:
-                        debug_log(
-                            f'Missing keys found: {missing_keys}',
-                            f'Message type: {original_message_type}',
-                            f'Action type: {original_action_type}',
-                            f'Action: {action}',
-                            f'Parsed data: {data}'
-                        )
-
-                    if original_message_type:
-
-                        new_index = remove_prefixes(
-                            original_message_type, 'liveChat')
-                        new_index = remove_suffixes(new_index, 'Renderer')
-                        data['message_type'] = camel_case_split(new_index)
-
-                        # TODO add option to keep placeholder items
-                        if original_message_type in self._KNOWN_IGNORE_MESSAGE_TYPES:
-                            continue
-                            # skip placeholder items
-                        elif original_message_type not in self._KNOWN_ACTION_TYPES[original_action_type]:
-                            debug_log(
-                                f'Unknown message type "{original_message_type}" for action "{original_action_type}"',
-                                f"New message type: {data['message_type']}",
-                                f'Action: {action}',
-                                f'Parsed data: {data}'
-                            )
-
-                    else:  # no type # can ignore message
-                        debug_log(
-                            'No message type',
-                            f'Action type: {original_action_type}',
-                            f'Action: {action}',
-                            f'Parsed data: {data}'
-                        )
-                        continue
+                before_start = start_time is not None and time_in_seconds < start_time
+                after_end = end_time is not None and time_in_seconds > end_time
 
-                    # check whether to skip this message or not, based on its type
+                if first_time and before_start:
+                    continue  # first time and invalid start time
+                elif before_start or after_end:
+                    return messages, True  # while actually searching, if time is invalid
 
-                    to_add = self._must_add_item(
-                        data,
-                        self._MESSAGE_GROUPS,
-                        messages_groups_to_add,
-                        messages_types_to_add
-                    )
+            # try to reconstruct time in seconds from timestamp and stream start
+            # if data.get('time_in_seconds') is None and data.get('timestamp') and stream_start_time:
+            #     data['time_in_seconds'] = (data['timestamp'] - stream_start_time)/1e6
+            #     data['time_text'] = seconds_to_time(int(data['time_in_seconds']))
 
-                    if not to_add:
-                        continue
+            messages.append(data)
+
+        return messages, False
+
+    def _get_next_chat_page(self, info, actions, poll_scheduler):
+        """Get the continuation of the next page of chat, and how long to wait
+        before requesting it
+
+        :return: The continuation and click tracking parameters of the next
+            page (None if there are no more pages), and the number of seconds
+            to wait
+        :rtype: (str, str, float)
+        """
+        has_continuation, continuation, click_tracking_params, sleep_duration = self._parse_continuations(
+            info)
+
+        if poll_scheduler is not None and has_continuation:
+            sleep_duration = self._schedule_next_poll(poll_scheduler, actions, sleep_duration)
+
+        if sleep_duration:
+            log('debug', f'Sleeping for {sleep_duration}ms.')
+
+        if not has_continuation:
+            continuation = None
+        return continuation, click_tracking_params, (sleep_duration or 0) / 1000
+
+    def _get_chat_messages(self, initial_info, ytcfg, params, poll_scheduler=None):
+
+        request_info = self._get_chat_request_info(initial_info, ytcfg, params)
+
+        is_replay = request_info['is_replay']
+        cache = request_info['cache']
+        if poll_scheduler is None and not is_replay:
+            poll_scheduler = self._get_poll_scheduler(params)
+
+        def get_pages(continuation):
+            """Request each page of chat messages, as soon as its
+            continuation is known"""
+            first_time = True
+            click_tracking_params = None
+
+            while True:
+                check_for_timeout()
+                headers = self._get_chat_request_headers(request_info)
 
-                    # if from a replay, check whether to skip this message or not, based on its time
-                    if is_replay:
-                        # assume message is at beginning if it does not have a time component
-                        time_in_seconds = data.get(
-                            'time_in_seconds', 0) + (offset or 0)
+                if first_time:
+                    # must run to get first few messages, otherwise might miss some
+                    yt_info = self._get_initial_info(
+                        request_info['init_page'], params, headers=headers, names=('initial_data',))[0]
 
-                        before_start = start_time is not None and time_in_seconds < start_time
-                        after_end = end_time is not None and time_in_seconds > end_time
+                else:
+                    body = self._encode_continuation_request(
+                        request_info, continuation, click_tracking_params, headers)
+                    yt_info = self._get_continuation_info(
+                        request_info['continuation_url'], params, data=body, headers=headers)
+
+                debug_info = {
+                    'click_tracking': click_tracking_params,
+                    'continuation': continuation
+                }
+                log('debug', [
+                    f'Continuation parameters: {debug_info}',
+                    f"Request headers: {', '.join(headers.keys())}"
+                ])
+
+                page_info = self._get_chat_page_info(yt_info, request_info)
+                if page_info is None:
+                    return
+                info, actions = page_info
 
-                        if first_time and before_start:
-                            continue  # first time and invalid start time
-                        elif before_start or after_end:
-                            return  # while actually searching, if time is invalid
+                yield actions, first_time
 
-                    # try to reconstruct time in seconds from timestamp and stream start
-                    # if data.get('time_in_seconds') is None and data.get('timestamp') and stream_start_time:
-                    #     data['time_in_seconds'] = (data['timestamp'] - stream_start_time)/1e6
-                    #     data['time_text'] = seconds_to_time(int(data['time_in_seconds']))
+                continuation, click_tracking_params, sleep_time = self._get_next_chat_page(
+                    info, actions, poll_scheduler)
+                if sleep_time:
+                    interruptible_sleep(sleep_time)
+
+                if continuation is None:  # no continuation, end
+                    break
+
+                first_time = False
+
+        pages = get_pages(request_info['continuation'])
+        if is_replay:
+            # Request the next page(s) while parsing the current one
+            pages = self._prefetch_pages(pages, params)
 
+        message_count = 0
+        for actions, first_time in pages:
+            if actions:
+                messages, reached_end = self._parse_chat_page(actions, first_time, request_info)
+                for data in messages:
                     message_count += 1
                     yield data
 
+                if reached_end:
+                    return
+
                 log('debug', f'Total number of messages: {message_count}')
-            elif is_replay:
-                # no more actions to process in a chat replay
-                break
-            else:
-                # otherwise, is live, so keep trying
-                log('debug', 'No actions to process.')
+                log('debug', f'Emote, badge and image cache: {cache}')
+
+    async def _get_chat_messages_async(self, initial_info, ytcfg, params, client, poll_scheduler=None):
+        """Asynchronous version of `_get_chat_messages`, which uses an
+        `AsyncClient` for making requests and waiting.
+        """
+        request_info = self._get_chat_request_info(initial_info, ytcfg, params)
+
+        cache = request_info['cache']
+        if poll_scheduler is None and not request_info['is_replay']:
+            poll_scheduler = self._get_poll_scheduler(params)
 
-            # assume there are no more chat continuations
-            no_continuation = True
+        message_count = 0
+        first_time = True
+        continuation = request_info['continuation']
+        click_tracking_params = None
 
-            # parse the continuation information
-            for cont in info.get('continuations') or []:
+        while True:
+            headers = self._get_chat_request_headers(request_info)
 
-                continuation_key = try_get_first_key(cont)
-                continuation_info = cont[continuation_key]
+            if first_time:
+                # must run to get first few messages, otherwise might miss some
+                extractor = ScriptJSONExtractor(
+                    {'initial_data': self._YT_INITIAL_INFO_PATTERNS['initial_data']})
+                await client.feed_text(request_info['init_page'], extractor.feed, params, headers=headers)
+                yt_info = extractor.close().get('initial_data')
+                if not yt_info:
+                    log('debug', f"No initial data found in {request_info['init_page']}")
+                    raise ParsingError('Unable to parse initial chat data')
+
+            else:
+                body = self._encode_continuation_request(
+                    request_info, continuation, click_tracking_params, headers)
+                yt_info = await client.post_json(
+                    request_info['continuation_url'], params, data=body, headers=headers)
 
-                log('debug', f'Continuation info: {continuation_info}')
+            page_info = self._get_chat_page_info(yt_info, request_info)
+            if page_info is None:
+                return
+            info, actions = page_info
 
-                if continuation_key in self._KNOWN_CHAT_CONTINUATIONS:
+            if actions:
+                messages, reached_end = self._parse_chat_page(actions, first_time, request_info)
+                for data in messages:
+                    message_count += 1
+                    yield data
 
-                    # set new chat continuation
-                    # overwrite if there is continuation data
-                    continuation = continuation_info.get('continuation')
+                if reached_end:
+                    return
 
-                    click_tracking_params = continuation_info.get(
-                        'clickTrackingParams') or continuation_info.get('trackingParams')
-                    # there is a chat continuation
-                    no_continuation = False
+                log('debug', f'Total number of messages: {message_count}')
+                log('debug', f'Emote, badge and image cache: {cache}')
 
-                elif continuation_key in self._KNOWN_SEEK_CONTINUATIONS:
-                    pass
-                    # ignore these continuations
+            continuation, click_tracking_params, sleep_time = self._get_next_chat_page(
+                info, actions, poll_scheduler)
+            if sleep_time:
+                await client.sleep(sleep_time)
 
-                else:
-                    debug_log(
-                        f'Unknown continuation: {continuation_key}',
-                        cont
-                    )
-
-                # sometimes continuation contains timeout info
-                sleep_duration = continuation_info.get('timeoutMs')
-                # and not actions:# and not force_no_timeout:
-                if sleep_duration:
-                    # Timeouts help prevent 429 errors (caused by too many requests).
-                    #
-                    # A single request to the YouTube live chat endpoint seems to only
-                    # go back around 10 seconds (only retrieving around 150-200 messages
-                    # at any given time).
-                    #
-                    # For very large livestreams, YouTube sometimes sets timeouts to be
-                    # more than 10 seconds (most likely to alleviate server stress).
-                    # This means that, normally, users will not be able to see all chat
-                    # messages (leaving a gap of timeout - 10 seconds).
-                    #
-                    # To get around this, we clamp the timeout to be between 0 and 8000
-                    # milliseconds (a 2 second window for making the next request).
-                    # This ensures that no messages are missed and we do spam YouTube
-                    # with requests (which may lead to 429 errors or IP blocking).
-
-                    sleep_duration = max(min(sleep_duration, 8000), 0)
-
-                    log('debug', f'Sleeping for {sleep_duration}ms.')
-                    interruptible_sleep(sleep_duration / 1000)
-
-            if no_continuation:  # no continuation, end
+            if continuation is None:  # no continuation, end
                 break
 
-            if first_time:
-                first_time = False
+            first_time = False
 
     def _get_chat_by_clip_id(self, match, params):
         return self.get_chat_by_clip_id(match.group('id'), params)
@@ -2057,6 +3059,8 @@ class YouTubeChatDownloader(BaseChatDownloader):
         return Chat(
             self._get_chat_messages(initial_info, ytcfg, params),
             id=clip_id,
+            async_chat=lambda client: self._get_chat_messages_async(
+                initial_info, ytcfg, params, client),
             **initial_info
         )
 
@@ -2117,6 +3121,30 @@ class YouTubeChatDownloader(BaseChatDownloader):
 
         return chat_item
 
+    # Waits (in seconds) before checking an upcoming livestream's chat again
+    _UPCOMING_LEAD_TIME = 120  # Start checking this long before the scheduled start
+    _UPCOMING_MIN_WAIT = 5
+    _UPCOMING_MAX_WAIT = 3600
+    _UPCOMING_MAX_DELAY = 900  # Stop waiting for livestreams this late
+
+    @classmethod
+    def _get_upcoming_wait(cls, seconds_until_start):
+        """Choose how long to wait before checking an upcoming livestream's
+        chat again. Sleep until shortly before the scheduled start, and then
+        check more often as the start approaches, and less often the later
+        the livestream is.
+
+        :param seconds_until_start: Time until the scheduled start (negative
+            if the livestream is late)
+        :type seconds_until_start: float
+        :return: The number of seconds to wait
+        :rtype: float
+        """
+        if seconds_until_start > cls._UPCOMING_LEAD_TIME:
+            return min(seconds_until_start - cls._UPCOMING_LEAD_TIME, cls._UPCOMING_MAX_WAIT)
+
+        return min(max(abs(seconds_until_start) / 2, cls._UPCOMING_MIN_WAIT), cls._UPCOMING_LEAD_TIME / 4)
+
     def _get_chat_messages_by_user_args(self, user_video_args, chat_item, params):
         # chat_item allows to change title and info based on new info
 
@@ -2126,12 +3154,21 @@ class YouTubeChatDownloader(BaseChatDownloader):
         # For efficiency purposes, do not loop over all past broadcasts if not found
         max_vids_to_try = 5
 
+        # Upcoming livestream (with a scheduled start time) which has no chat yet
+        upcoming = None
+
         while True:
 
-            vids = self.get_user_videos(
-                **user_video_args, video_type='live', params=params)
+            if upcoming is None:
+                vids = islice(self.get_user_videos(
+                    **user_video_args, video_type='live', params=params), max_vids_to_try)
+            else:
+                # Only check the upcoming livestream, rather than all of the channel's livestreams
+                vids = [upcoming]
 
-            for video in islice(vids, max_vids_to_try):
+            checking_upcoming = upcoming is not None
+            upcoming = None
+            for video in vids:
                 video_id = video['video_id']
 
                 if video['video_type'] not in ('LIVE', 'UPCOMING'):
@@ -2143,8 +3180,18 @@ class YouTubeChatDownloader(BaseChatDownloader):
                     log('debug', f'Skipping video with ID: "{video_id}"')
                     continue
 
+                yt_initial_data = None
+                if checking_upcoming:
+                    # Until the chat is available, only request the video's
+                    # initial data, rather than the whole watch page
+                    yt_initial_data = self._get_innertube_initial_data(video_id, params)
+                    if yt_initial_data is not None and not self._has_live_chat(yt_initial_data):
+                        log('debug', f'The chat of "{video_id}" is not available yet')
+                        upcoming = video
+                        continue
+
                 try:
-                    chat = self.get_chat_by_video_id(video_id, params)
+                    chat = self.get_chat_by_video_id(video_id, params, yt_initial_data)
 
                     log('info',
                         f"Found a livestream: \"{video['title']}\" ({video_id}).")
@@ -2161,27 +3208,85 @@ class YouTubeChatDownloader(BaseChatDownloader):
                     log('warning',
                         f"Unable to get chat for \"{video['title']}\" ({video_id}) due to an error: \"{e}\"")
 
-            log('info',
-                f'There are no active or upcoming livestreams with a live chat. Retrying in {sleep_amount} seconds.')
-            interruptible_sleep(sleep_amount)
+                    # Chats of upcoming livestreams may only be available shortly before they start
+                    scheduled_start_time = video.get('scheduled_start_time')
+                    if video['video_type'] == 'UPCOMING' and scheduled_start_time is not None and (
+                            upcoming is None or scheduled_start_time < upcoming['scheduled_start_time']):
+                        upcoming = video
+
+            if upcoming is not None:
+                seconds_until_start = upcoming['scheduled_start_time'] - time.time()
+                if seconds_until_start < -self._UPCOMING_MAX_DELAY:
+                    # Very late, so it may have been rescheduled or cancelled
+                    upcoming = None
+
+            if upcoming is None:
+                log('info',
+                    f'There are no active or upcoming livestreams with a live chat. Retrying in {sleep_amount} seconds.')
+                interruptible_sleep(sleep_amount)
+
+            else:
+                wait = self._get_upcoming_wait(seconds_until_start)
+                log('info',
+                    f"\"{upcoming['title']}\" ({upcoming['video_id']}) is scheduled to start in {seconds_to_time(int(max(seconds_until_start, 0)))}. Retrying in {wait:.0f} seconds.")
+
+                if wait >= self._UPCOMING_MAX_WAIT:
+                    # Check all of the channel's livestreams again, in case of changes to the schedule
+                    upcoming = None
+
+                interruptible_sleep(wait)
 
             # continue forever, until reaching a video with valid chat
 
-    def get_chat_by_video_id(self, video_id, params):
+    def get_chat_by_video_id(self, video_id, params, yt_initial_data=None):
         """Get chat messages for a YouTube video, given its ID.
 
         :param video_id: YouTube video ID
         :type video_id: str
+        :param yt_initial_data: The video's initial data, if it has already
+            been requested from the innertube API, defaults to None
+        :type yt_initial_data: dict, optional
         :return: Chat object for the corresponding YouTube video
         :rtype: Chat
         """
-        initial_info, ytcfg = self._get_initial_video_info(video_id, params)
+        initial_info, ytcfg = self._get_initial_video_info(
+            video_id, params, yt_initial_data=yt_initial_data)
+
+        def get_shard(start_time, end_time):
+            # Each shard seeks to its start time (using `playerOffsetMs`)
+            return self._get_chat_messages(
+                initial_info, ytcfg, {**params, 'start_time': start_time, 'end_time': end_time})
+
+        poll_scheduler = None
+        merger = None
+        if initial_info.get('status') == 'past':
+            chat = self._get_sharded_replay(get_shard, params.get('start_time'), params.get(
+                'end_time'), initial_info.get('duration'), params)
+        else:
+            merger = self._get_session_merger(params)
+            if merger is None:
+                poll_scheduler = self._get_poll_scheduler(params)
+                chat = self._get_chat_messages(initial_info, ytcfg, params, poll_scheduler)
+            else:
+                chat = self._get_staggered_chat(initial_info, ytcfg, params, merger)
 
-        return Chat(
-            self._get_chat_messages(initial_info, ytcfg, params),
+        def get_async_chat(client):
+            if merger is not None:
+                return self._get_staggered_chat_async(initial_info, ytcfg, params, client, merger)
+            return self._get_chat_messages_async(initial_info, ytcfg, params, client, poll_scheduler)
+
+        chat = Chat(
+            chat,
             id=video_id,
+            async_chat=get_async_chat,
             **initial_info
         )
 
+        # Exposes the request rate and estimated gap of live chats, and the
+        # coverage of each session (if polled by multiple sessions)
+        chat.poll_scheduler = poll_scheduler
+        chat.poll_sessions = merger
+        return chat
+
     def _get_chat_by_video_id(self, match, params):
         return self.get_chat_by_video_id(match.group('id'), params)
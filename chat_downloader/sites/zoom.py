@@ -137,9 +137,10 @@ class ZoomChatDownloader(BaseChatDownloader):
     def _get_chat_messages(self, messages, params):
         start_time = ensure_seconds(params.get('start_time'), 0)
         end_time = ensure_seconds(params.get('end_time'), float('inf'))
+        projection = self._get_projection(params)
 
         for data in messages:
-            data = r.remap_dict(data, self._REMAPPING)
+            data = r.remap_dict(data, self._REMAPPING, projection=projection)
 
             # Process time inforamtion
             data['time_in_seconds'] = time_to_seconds(data['time_text'])
@@ -3,10 +3,12 @@ import datetime
 import re
 import sys
 import locale
+import collections
 import collections.abc
 import io
 import json
 import base64
+import functools
 
 
 def base64_encode(text):
@@ -203,14 +205,210 @@ def update_dict_without_overwrite(original, new):
     return original
 
 
+# Names of renderers, actions, tags, etc. come from a small vocabulary, so
+# the results of converting them are memoized (up to this many names)
+_NAME_CACHE_SIZE = 1024
+
+_CAMEL_CASE_WORD_RE = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?=[A-Z]|$)')
+
+
+@functools.lru_cache(maxsize=_NAME_CACHE_SIZE)
 def camel_case_split(word):
-    return '_'.join(re.findall(r'[A-Z]?[a-z]+|[A-Z]+(?=[A-Z]|$)', word)).lower()
+    return '_'.join(_CAMEL_CASE_WORD_RE.findall(word)).lower()
+
+
+@functools.lru_cache(maxsize=_NAME_CACHE_SIZE)
+def get_snake_case_name(name, prefixes=(), suffixes=()):
+    """Convert a camel case name to snake case, after removing its prefixes
+    and suffixes. E.g., ``liveChatTextMessageRenderer`` is converted to
+    ``text_message``, given the prefix ``liveChat`` and suffix ``Renderer``.
+
+    :param name: The camel case name
+    :type name: str
+    :param prefixes: Prefix(es) to remove, defaults to ()
+    :type prefixes: Union[str, tuple], optional
+    :param suffixes: Suffix(es) to remove, defaults to ()
+    :type suffixes: Union[str, tuple], optional
+    :return: The snake case name
+    :rtype: str
+    """
+    return camel_case_split(remove_suffixes(remove_prefixes(name, prefixes), suffixes))
 
 
+@functools.lru_cache(maxsize=_NAME_CACHE_SIZE)
 def replace_with_underscores(text, sep='-'):
     return text.replace(sep, '_')
 
 
+class LRUCache():
+    """Mapping which holds at most `max_size` items, discarding the least
+    recently used item when full. Hits and misses of `get` are counted.
+    Not thread-safe.
+    """
+
+    def __init__(self, max_size=1024):
+        """Create an LRUCache object
+
+        :param max_size: The maximum number of items to hold, defaults to 1024
+        :type max_size: int, optional
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items = collections.OrderedDict()
+
+    def get(self, key, default=None):
+        """Return the value for key (marking it as recently used) if key is
+        in the cache, else default.
+        """
+        value = self._items.get(key)
+        if value is None:
+            self.misses += 1
+            return default
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """Add an item to the cache, discarding the least recently used item
+        if the cache is full. Values may not be None.
+        """
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        """The fraction of lookups which were hits (0 if there were none)
+
+        :rtype: float
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __repr__(self):
+        return (f'LRUCache({len(self)}/{self.max_size} items, '
+                f'{self.hits} hits, {self.misses} misses, {self.hit_rate:.1%} hit rate)')
+
+
+class ScriptJSONExtractor():
+    """Extracts JSON values which are assigned in the scripts of an HTML page
+    (e.g. ``var data = {...};``) in a single pass, while the page is being
+    read. Only the first (valid) value of each name is extracted.
+
+    Each value is decoded once the end of its script (or the end of the
+    page) has been read, so the page does not need to be searched for the
+    end of each value. Scripts cannot contain ``</script``, so neither can
+    the values.
+    """
+
+    _SCRIPT_END = '</script'
+
+    # Number of characters to search again when more text is received, in
+    # case the start of a match was received but not its end
+    _OVERLAP = 256
+
+    _DECODER = json.JSONDecoder()
+
+    def __init__(self, patterns):
+        """Create a ScriptJSONExtractor object
+
+        :param patterns: Mapping of names to regular expressions which match
+            the text before each value (up to, but excluding, the value).
+            The expressions may not contain capturing groups
+        :type patterns: dict
+        """
+        self._regex = re.compile('|'.join(
+            f'(?P<{name}>{pattern})' for name, pattern in patterns.items()))
+        self._names = frozenset(patterns)
+
+        self.values = {}
+
+        self._buffer = ''
+        self._position = 0  # where to continue searching from
+        self._pending = None  # (name, start of value, where to search for the end of its script)
+
+    @property
+    def done(self):
+        """Whether all values have been extracted
+
+        :rtype: bool
+        """
+        return len(self.values) == len(self._names)
+
+    def feed(self, text):
+        """Process more text of the page
+
+        :param text: The text which follows all text fed so far
+        :type text: str
+        :return: Whether all values have been extracted
+        :rtype: bool
+        """
+        self._buffer += text
+        self._process(False)
+        return self.done
+
+    def close(self):
+        """Process the rest of the page, once all of its text has been fed
+
+        :return: The extracted values (by name)
+        :rtype: dict
+        """
+        self._process(True)
+        self._buffer = ''
+        return self.values
+
+    def _process(self, final):
+        buffer = self._buffer
+        while not self.done:
+            if self._pending is not None:
+                name, start, end_search_start = self._pending
+                end = buffer.find(self._SCRIPT_END, end_search_start)
+                if end < 0 and not final:  # Wait for the rest of the script
+                    self._pending = (name, start, max(
+                        start, len(buffer) - len(self._SCRIPT_END)))
+                    break
+
+                self._pending = None
+                try:
+                    value, value_end = self._DECODER.raw_decode(buffer, start)
+                except json.JSONDecodeError:  # Invalid value, keep searching
+                    self._position = start
+                    continue
+
+                self.values[name] = value
+                self._position = value_end
+                continue
+
+            match = self._regex.search(buffer, self._position)
+            if match is None:
+                self._position = max(
+                    self._position, len(buffer) - self._OVERLAP)
+                break
+
+            self._position = match.end()
+            if match.lastgroup not in self.values:
+                self._pending = (match.lastgroup, match.end(), match.end())
+
+        # Discard text which does not need to be searched again
+        discard = self._pending[1] if self._pending is not None else self._position
+        if discard > 0:
+            self._buffer = buffer[discard:]
+            self._position -= discard
+            if self._pending is not None:
+                name, start, end_search_start = self._pending
+                self._pending = (name, start - discard, end_search_start - discard)
+        else:
+            self._buffer = buffer
+
+
 def multi_get(dictionary, *keys, default=None):
     current = dictionary
     for key in keys:
@@ -0,0 +1,396 @@
+import os
+import queue
+import threading
+import time
+
+from .timed_utils import (
+    POLLING_TIME,
+    get_remaining_time,
+    check_for_timeout,
+    get_cancellation_tokens,
+    activate_tokens,
+    on_cancel,
+    CancellationToken
+)
+
+
+_WAKE_UP = object()  # Added to a queue to wake up its consumer
+
+
+def wait_for_entry(entries):
+    """Get an entry from a queue, which is filled by other threads. As with
+    `interruptible_sleep`, rather than waking up regularly to check for
+    timeouts and cancellation, a single wait is made (until the earliest
+    deadline of the timed generators running in the current thread), and
+    cancelling one of the thread's tokens wakes it up.
+
+    :param entries: The queue
+    :type entries: queue.Queue
+    :raises TimerExpired: if a timeout occurs while waiting
+    :raises Cancelled: if a cancellation token is cancelled while waiting
+    :return: The entry
+    """
+    def wake_up():
+        try:
+            entries.put_nowait(_WAKE_UP)
+        except queue.Full:
+            pass  # Not waiting
+
+    # Locks cannot be interrupted by Ctrl+C on Windows, so the main thread
+    # waits in short intervals there
+    max_wait = POLLING_TIME if os.name == 'nt' and \
+        threading.current_thread() is threading.main_thread() else None
+
+    with on_cancel(wake_up):
+        while True:
+            check_for_timeout()
+
+            # Wake up when the earliest timed generator's deadline is reached
+            wait = get_remaining_time()
+            if max_wait is not None:
+                wait = max_wait if wait is None else min(wait, max_wait)
+
+            try:
+                entry = entries.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+            if entry is not _WAKE_UP:
+                return entry
+
+
+class PrefetchGenerator:
+    """
+    Retrieve items from a generator in a background (producer) thread.
+
+    Items are placed in a bounded queue, from which they are yielded to the
+    consumer. This allows the producer's work (e.g. network requests) to
+    overlap with the consumer's work (e.g. formatting and writing messages).
+    Errors raised by the generator are re-raised in the consumer's thread.
+
+    While waiting for an item, the consumer can be interrupted by timeouts
+    and cancellation (see `wait_for_entry`), so this may be wrapped by a
+    `TimedGenerator`.
+    """
+
+    _ITEM, _ERROR, _DONE = range(3)
+
+    def __init__(self, generator, max_size=16, name=None):
+        """Create a PrefetchGenerator object. The producer thread is started
+        when the first item is requested.
+
+        :param generator: The generator to retrieve items from
+        :type generator: generator
+        :param max_size: Maximum number of items which have been retrieved,
+            but not yet consumed, defaults to 16
+        :type max_size: int, optional
+        :param name: Name of the producer thread, defaults to None
+        :type name: str, optional
+        """
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+
+        self.generator = generator
+        self.max_size = max_size
+        self.name = name
+
+        self._queue = queue.Queue(max_size)
+        self._stop_event = threading.Event()
+        self._token = CancellationToken()  # Cancelled when closed
+        self._thread = None
+        self._finished = False
+
+        # Statistics
+        self.items_consumed = 0
+        self.consumer_wait_time = 0  # Time spent waiting for the producer
+        self._producer_stats = {'wait_time': 0}  # Updated by the producer
+        self._total_occupancy = 0
+
+    def __iter__(self):
+        return self
+
+    def _start(self):
+        # The producer does not reference this object, so that it can be
+        # garbage collected (and closed) if it is no longer used.
+        # Cancelling the consumer (or closing this object) also cancels the
+        # producer, which interrupts any sleeping or requests in progress.
+        self._thread = threading.Thread(
+            target=self._produce,
+            args=(self.generator, self._queue, self._stop_event,
+                  self._producer_stats, get_cancellation_tokens() + [self._token]),
+            name=self.name, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _put(entries, stop_event, stats, entry):
+        """Put an entry in the queue, unless the generator has been closed.
+
+        :return: True if the entry was added, otherwise False
+        :rtype: bool
+        """
+        start = time.monotonic()
+        try:
+            while not stop_event.is_set():
+                try:
+                    entries.put(entry, timeout=POLLING_TIME)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            stats['wait_time'] += time.monotonic() - start
+
+    @classmethod
+    def _produce(cls, generator, entries, stop_event, stats, tokens):
+        def put(entry):
+            return cls._put(entries, stop_event, stats, entry)
+
+        try:
+            with activate_tokens(tokens):
+                for item in generator:
+                    if not put((cls._ITEM, item)):
+                        break
+                else:
+                    put((cls._DONE, None))
+
+        except BaseException as e:
+            put((cls._ERROR, e))
+
+        finally:
+            # Allow the generator to clean up (e.g. close connections)
+            close = getattr(generator, 'close', None)
+            if callable(close):
+                close()
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+
+        if self._thread is None:
+            self._start()
+
+        self._total_occupancy += self._queue.qsize()
+
+        start = time.monotonic()
+        try:
+            entry_type, value = wait_for_entry(self._queue)
+        finally:
+            self.consumer_wait_time += time.monotonic() - start
+
+        if entry_type == self._ITEM:
+            self.items_consumed += 1
+            return value
+
+        self._finished = True
+        if entry_type == self._ERROR:
+            raise value
+        raise StopIteration
+
+    def qsize(self):
+        """Get the number of items which have been retrieved, but not yet consumed
+
+        :return: The current size of the queue
+        :rtype: int
+        """
+        return self._queue.qsize()
+
+    def get_stats(self):
+        """Get statistics about the queue, which can be used to determine
+        whether the producer or consumer is the bottleneck. If the queue
+        is usually full, the consumer is slower than the producer.
+
+        :return: Dictionary containing the current size, maximum size and
+            average occupancy (from 0 to 1) of the queue, as well as the
+            number of items consumed and the total time (in seconds) that
+            the consumer and producer spent waiting for each other.
+        :rtype: dict
+        """
+        average_size = self._total_occupancy / \
+            max(self.items_consumed, 1)
+        return {
+            'size': self.qsize(),
+            'max_size': self.max_size,
+            'average_occupancy': min(average_size / self.max_size, 1),
+            'items_consumed': self.items_consumed,
+            'consumer_wait_time': self.consumer_wait_time,
+            'producer_wait_time': self._producer_stats['wait_time'],
+        }
+
+    def close(self):
+        """Stop the producer thread. Retrieving the current item is
+        interrupted (see `CancellationToken`), after which the generator is
+        closed by the producer thread."""
+        self._finished = True
+        self._stop_event.set()
+        self._token.cancel()
+
+        if self._thread is None:  # Producer never started
+            close = getattr(self.generator, 'close', None)
+            if callable(close):
+                close()
+            return
+
+        # Free up space in case the producer is waiting
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def __del__(self):
+        self.close()
+
+
+def ordered_parallel_generator(factories, workers, max_ahead=None):
+    """Run generators concurrently (in a pool of worker threads), and yield
+    their items in order, i.e., all items of the first generator, followed
+    by all items of the second generator, and so on. Items of the first
+    unfinished generator are yielded as soon as they are received.
+
+    Errors raised by a generator are re-raised when its items are due to be
+    yielded. Closing the returned generator stops all workers.
+
+    :param factories: Functions which create the generators, in order
+    :type factories: list
+    :param workers: Maximum number of generators to run at the same time
+    :type workers: int
+    :param max_ahead: Maximum number of generators which may be started (or
+        finished) before they are consumed, defaults to twice the number of
+        workers. This limits the number of items held in memory.
+    :type max_ahead: int, optional
+    :return: Generator which yields the items of each generator, in order
+    :rtype: generator
+    """
+    ITEM, ERROR, DONE = range(3)
+
+    factories = list(factories)
+    entries = [queue.Queue() for _ in factories]
+    next_index = iter(range(len(factories)))
+    index_lock = threading.Lock()
+    slots = threading.Semaphore(max_ahead or 2 * workers)
+    stop_event = threading.Event()
+    tokens = get_cancellation_tokens()  # Cancelling the consumer stops the workers
+
+    def work():
+        with activate_tokens(tokens):
+            work_until_finished()
+
+    def work_until_finished():
+        while not stop_event.is_set():
+            # Wait for the consumer to catch up
+            if not slots.acquire(timeout=POLLING_TIME):
+                continue
+
+            with index_lock:
+                index = next(next_index, None)
+            if index is None:
+                slots.release()
+                return
+
+            generator = None
+            try:
+                generator = factories[index]()
+                for item in generator:
+                    if stop_event.is_set():
+                        break
+                    entries[index].put((ITEM, item))
+                entries[index].put((DONE, None))
+
+            except BaseException as e:
+                entries[index].put((ERROR, e))
+
+            finally:
+                close = getattr(generator, 'close', None)
+                if callable(close):
+                    close()
+
+    for _ in range(min(workers, len(factories))):
+        threading.Thread(target=work, daemon=True).start()
+
+    try:
+        for index in range(len(factories)):
+            while True:
+                entry_type, value = wait_for_entry(entries[index])
+
+                if entry_type == ITEM:
+                    yield value
+                elif entry_type == ERROR:
+                    raise value
+                else:
+                    break
+
+            entries[index] = None  # Free memory
+            slots.release()
+
+    finally:
+        stop_event.set()
+
+
+def merged_parallel_generator(factories, max_size=256):
+    """Run generators concurrently (each in its own thread), and yield their
+    items as soon as they are received, i.e., in the order that they are
+    produced, together with the index of the generator which produced them.
+
+    Errors raised by a generator are re-raised immediately. Closing the
+    returned generator stops all threads.
+
+    :param factories: Functions which create the generators
+    :type factories: list
+    :param max_size: Maximum number of items which have been retrieved, but
+        not yet consumed, defaults to 256
+    :type max_size: int, optional
+    :return: Generator which yields ``(index, item)`` tuples
+    :rtype: generator
+    """
+    ITEM, ERROR, DONE = range(3)
+
+    factories = list(factories)
+    entries = queue.Queue(max_size)
+    stop_event = threading.Event()
+    tokens = get_cancellation_tokens()  # Cancelling the consumer stops the workers
+
+    def put(entry):
+        while not stop_event.is_set():
+            try:
+                entries.put(entry, timeout=POLLING_TIME)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def work(index):
+        generator = None
+        try:
+            with activate_tokens(tokens):
+                generator = factories[index]()
+                for item in generator:
+                    if not put((ITEM, index, item)):
+                        break
+                else:
+                    put((DONE, index, None))
+
+        except BaseException as e:
+            put((ERROR, index, e))
+
+        finally:
+            close = getattr(generator, 'close', None)
+            if callable(close):
+                close()
+
+    for index in range(len(factories)):
+        threading.Thread(target=work, args=(index,), daemon=True).start()
+
+    remaining = len(factories)
+    try:
+        while remaining:
+            entry_type, index, value = wait_for_entry(entries)
+
+            if entry_type == ITEM:
+                yield index, value
+            elif entry_type == ERROR:
+                raise value
+            else:
+                remaining -= 1
+
+    finally:
+        stop_event.set()
@@ -1,7 +1,8 @@
 import threading
-import _thread
 import time
 import sys
+import os
+from contextlib import contextmanager
 
 
 POLLING_TIME = 0.1
@@ -80,12 +81,252 @@ except ImportError:
 
 
 def timed_input(timeout=None, prompt='', newline=False, default=None):
+    # Do not wait past the deadline of a timed generator
+    remaining = get_remaining_time()
+    if remaining is not None and (timeout is None or remaining < timeout):
+        timeout = remaining
+
     if timeout is None:
         return input(prompt)
+
+    # If the chat can be cancelled, wait in short intervals (so that
+    # cancellation is noticed quickly). Otherwise, wait all at once.
+    poll_time = POLLING_TIME if get_cancellation_tokens() else timeout
+    end_time = time.monotonic() + timeout
+
+    while True:
+        wait = max(min(poll_time, end_time - time.monotonic()), 0)
+        is_last = time.monotonic() + wait >= end_time
+        try:
+            return _timed_input(wait, prompt, newline and is_last)
+        except TimeoutOccurred:
+            check_for_timeout()
+            if is_last:
+                return default
+        prompt = ''  # Only display the prompt once
+
+
+class TimerExpired(Exception):
+    """Raised from within a timed generator when one of its timers has expired"""
+
+    def __init__(self, timer, is_inactivity_timeout=False):
+        super().__init__(
+            'Inactivity timeout occurred' if is_inactivity_timeout else 'Timeout occurred')
+        self.timer = timer
+        self.is_inactivity_timeout = is_inactivity_timeout
+
+
+class Cancelled(Exception):
+    """Raised from within a cancellable generator when its token has been cancelled"""
+
+    def __init__(self, token):
+        super().__init__('Cancelled')
+        self.token = token
+
+
+# Timed generators (and cancellation tokens) which are currently retrieving
+# an item, per thread. This allows blocking code (e.g. sleeping) to
+# cooperatively check for timeouts, without needing to interrupt the main thread.
+_active_timers = threading.local()
+
+
+def _get_active_timers():
+    timers = getattr(_active_timers, 'timers', None)
+    if timers is None:
+        timers = _active_timers.timers = []
+    return timers
+
+
+def get_remaining_time():
+    """Get the number of seconds until the earliest deadline of the timed
+    generators running in the current thread.
+
+    :return: The number of seconds remaining, or None if there is no deadline
+    :rtype: float
+    """
+    remaining_times = [
+        remaining for remaining in map(
+            lambda timer: timer.get_remaining_time(), _get_active_timers())
+        if remaining is not None
+    ]
+    return min(remaining_times) if remaining_times else None
+
+
+def check_for_timeout():
+    """Check whether a timed generator running in the current thread has
+    timed out, or whether it has been cancelled. Long-running code (e.g.
+    sleeping or waiting for data) should call this regularly.
+
+    :raises TimerExpired: if a timeout has occurred
+    :raises Cancelled: if a cancellation token has been cancelled
+    """
+    for timer in _get_active_timers():
+        timer.check()
+
+
+def check_for_cancellation():
+    """Check whether a cancellation token of the current thread has been
+    cancelled. Unlike `check_for_timeout`, timeouts are not checked.
+
+    :raises Cancelled: if a cancellation token has been cancelled
+    """
+    for token in get_cancellation_tokens():
+        token.check()
+
+
+def get_cancellation_tokens():
+    """Get the cancellation tokens which are active in the current thread.
+    Code which starts other threads should activate these in each thread
+    (see `CancellationToken.activate`).
+
+    :return: The active cancellation tokens
+    :rtype: list
+    """
+    return [timer for timer in _get_active_timers() if isinstance(timer, CancellationToken)]
+
+
+@contextmanager
+def activate_tokens(tokens):
+    """Activate multiple cancellation tokens in the current thread"""
+    timers = _get_active_timers()
+    timers.extend(tokens)
+    try:
+        yield
+    finally:
+        for token in tokens:
+            timers.remove(token)
+
+
+@contextmanager
+def on_cancel(callback):
+    """Call a function (from the cancelling thread) if one of the current
+    thread's cancellation tokens is cancelled while in this context. This is
+    used to interrupt blocking operations, e.g. by closing a socket.
+
+    :param callback: The function to call
+    :type callback: function
+    """
+    tokens = get_cancellation_tokens()
+    for token in tokens:
+        token.add_callback(callback)
     try:
-        return _timed_input(timeout, prompt, newline)
-    except TimeoutOccurred:
-        return default
+        yield
+    finally:
+        for token in tokens:
+            token.remove_callback(callback)
+
+
+class CancellationToken:
+    """
+    Used to stop retrieving one or more chats from any thread.
+
+    While a chat's generator is retrieving an item, its token is active in
+    the retrieving thread. Sleeping, retrying and waiting for data check
+    for cancellation (see `check_for_timeout`), and blocking requests and
+    sockets are interrupted when the token is cancelled.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """Cancel the token. This may be called from any thread."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+
+        for callback in callbacks:
+            callback()
+
+    def check(self):
+        """Check whether the token has been cancelled
+
+        :raises Cancelled: if the token has been cancelled
+        """
+        if self._event.is_set():
+            raise Cancelled(self)
+
+    def get_remaining_time(self):
+        return None  # No deadline
+
+    def wait(self, timeout=None):
+        """Wait until the token is cancelled, or the timeout expires
+
+        :return: True if the token has been cancelled, otherwise False
+        :rtype: bool
+        """
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback):
+        """Add a function which is called when the token is cancelled. If
+        it has already been cancelled, the function is called immediately."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def activate(self):
+        """Activate the token in the current thread (as a context manager)"""
+        return activate_tokens([self])
+
+
+class CancellableGenerator:
+    """
+    Add cancellation functionality to generator objects.
+
+    The token is activated in whichever thread retrieves the next item, so
+    that blocking code running in that thread can be interrupted. When the
+    token is cancelled, the generator is closed and iteration stops.
+    """
+
+    def __init__(self, generator, token):
+        self.generator = generator
+        self.token = token
+        self._finished = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+
+        try:
+            with self.token.activate():
+                self.token.check()
+                return next(self.generator)
+
+        except Cancelled as e:
+            if e.token is not self.token:
+                raise  # Belongs to an outer cancellable generator
+            self.close()
+            raise StopIteration
+
+        except BaseException:
+            self._finished = True
+            raise
+
+    def close(self):
+        self._finished = True
+
+        # Allow the generator to clean up (e.g. close connections)
+        close = getattr(self.generator, 'close', None)
+        if callable(close):
+            close()
 
 
 class TimedGenerator:
@@ -94,6 +335,11 @@ class TimedGenerator:
 
     Used to create timed-generator objects as well as add inactivity functionality
     (i.e. return if no items have been generated in a given time period)
+
+    Timing is based on monotonic deadlines, which are checked before and
+    after each item is retrieved, as well as cooperatively by code which
+    waits for data (see `check_for_timeout`). No threads are created, so
+    this can be used from any thread.
     """
 
     def __init__(self, generator, timeout=None, inactivity_timeout=None, on_timeout=None, on_inactivity_timeout=None):
@@ -104,83 +350,134 @@ class TimedGenerator:
         self.on_timeout = on_timeout
         self.on_inactivity_timeout = on_inactivity_timeout
 
-        self.timer = self.inactivity_timer = None
+        self.deadline = self.inactivity_deadline = None
+        self._finished = False
 
         if self.timeout is not None:
-            self.start_timer()
-
-        if self.inactivity_timeout is not None:
-            self.start_inactivity_timer()
+            self.deadline = time.monotonic() + self.timeout
 
-    def start_timer(self):
-        self.timer = threading.Timer(self.timeout, _thread.interrupt_main)
-        self.timer.start()
-
-    def start_inactivity_timer(self):
-        self.inactivity_timer = threading.Timer(
-            self.inactivity_timeout, _thread.interrupt_main)
-        self.inactivity_timer.start()
+        self.reset_inactivity_timer()
 
     def reset_inactivity_timer(self):
-        if self.inactivity_timer:
-            self.inactivity_timer.cancel()
-            self.start_inactivity_timer()
+        if self.inactivity_timeout is not None:
+            self.inactivity_deadline = time.monotonic() + self.inactivity_timeout
+
+    def get_remaining_time(self):
+        """Get the number of seconds until the next deadline
+
+        :return: The number of seconds remaining, or None if no timeouts are set
+        :rtype: float
+        """
+        deadlines = [deadline for deadline in (
+            self.deadline, self.inactivity_deadline) if deadline is not None]
+        if not deadlines:
+            return None
+        return max(min(deadlines) - time.monotonic(), 0)
+
+    def check(self, include_inactivity=True):
+        """Check whether a timeout has occurred
+
+        :param include_inactivity: Also check the inactivity timeout, defaults to True
+        :type include_inactivity: bool, optional
+        :raises TimerExpired: if a timeout has occurred
+        """
+        now = time.monotonic()
+        if self.deadline is not None and now >= self.deadline:
+            raise TimerExpired(self)
+
+        if include_inactivity and self.inactivity_deadline is not None and now >= self.inactivity_deadline:
+            raise TimerExpired(self, True)
 
     def __iter__(self):
         return self
 
     def __next__(self):
-        to_raise = None
-        set_timers = [timer for timer in (
-            self.timer, self.inactivity_timer) if timer is not None]
+        if self._finished:
+            raise StopIteration
 
+        timers = _get_active_timers()
+        timers.append(self)
         try:
+            self.check()
             next_item = next(self.generator)
-            self.reset_inactivity_timer()
-            return next_item
 
-        except KeyboardInterrupt as e:
+            # An item has been received, so only the overall timeout applies
+            self.check(include_inactivity=False)
 
-            if not set_timers:
-                # Neither timer has been set, so we treat this
-                # as a normal KeyboardInterrupt. No need to cancel
-                # timers afterwards, we can exit here.
-                raise e
+        except TimerExpired as e:
+            if e.timer is not self:
+                raise  # Belongs to an outer timed generator
+            self._expire(e.is_inactivity_timeout)
 
-            # get expired timers
-            expired_timers = [
-                timer for timer in set_timers if not timer.is_alive()]
-            if expired_timers:
-                # Some timer expired
-                first_expired = expired_timers[0]
+        except BaseException:
+            # Some other error (e.g. StopIteration or KeyboardInterrupt).
+            # Always propagate.
+            self._finished = True
+            raise
 
-                to_raise = StopIteration
-                function = self.on_timeout if (
-                    first_expired == self.timer) else self.on_inactivity_timeout
-                self._run_function(function)
+        finally:
+            timers.remove(self)
 
-            else:  # both timers are still active, user sent a keyboard interrupt
-                to_raise = e
+        self.reset_inactivity_timer()
+        return next_item
 
-        except Exception as e:
-            # Some other error. Always propogate.
-            # If e is StopIteration, there are no more items to get.
-            # We can close the timers before exiting
-            to_raise = e
+    def _expire(self, is_inactivity_timeout):
+        self._finished = True
 
-        if to_raise:  # Something happened which will cause the generator to exit, cancel timers
-            for timer in set_timers:
-                timer.cancel()
+        # Allow the generator to clean up (e.g. close connections)
+        close = getattr(self.generator, 'close', None)
+        if callable(close):
+            close()
 
-            raise to_raise
+        self._run_function(
+            self.on_inactivity_timeout if is_inactivity_timeout else self.on_timeout)
+
+        raise StopIteration
 
     def _run_function(self, function):
         if callable(function):
             function()
 
 
-def interruptible_sleep(secs, poll_time=POLLING_TIME):
-    start_time = time.time()
+def interruptible_sleep(secs):
+    """Sleep for a number of seconds, from any thread. Unlike `time.sleep`,
+    sleeping stops as soon as a timed generator running in the current
+    thread times out, or one of the thread's cancellation tokens is
+    cancelled. Rather than waking up regularly to check for these, a single
+    wait is made (until the earliest deadline), which is interrupted by
+    cancellation.
 
-    while time.time() - start_time <= secs:
-        time.sleep(poll_time)
+    :param secs: The number of seconds to sleep
+    :type secs: float
+    :raises TimerExpired: if a timeout occurs while sleeping
+    :raises Cancelled: if a cancellation token is cancelled while sleeping
+    """
+    end_time = time.monotonic() + secs
+
+    tokens = get_cancellation_tokens()
+    cancelled = threading.Event()
+
+    # Locks cannot be interrupted by Ctrl+C on Windows, so the main thread
+    # waits in short intervals there (as `time.sleep` can be interrupted)
+    max_wait = POLLING_TIME if tokens and os.name == 'nt' and \
+        threading.current_thread() is threading.main_thread() else None
+
+    with on_cancel(cancelled.set):
+        while True:
+            check_for_timeout()
+
+            remaining = end_time - time.monotonic()
+            if remaining <= 0:
+                break
+
+            # Wake up when the earliest timed generator's deadline is reached
+            remaining_time = get_remaining_time()
+            if remaining_time is not None:
+                remaining = min(remaining, remaining_time)
+            if max_wait is not None:
+                remaining = min(remaining, max_wait)
+
+            if tokens:
+                cancelled.wait(remaining)
+            else:
+                time.sleep(remaining)
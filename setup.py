@@ -64,6 +64,9 @@ setup(
             'sphinx',
             'sphinx-rtd-theme',
             'sphinxcontrib-programoutput'
+        ],
+        'async': [
+            'aiohttp'
         ]
     },
     license='MIT license',
@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import copy
+import asyncio
+import unittest
+import threading
+from unittest import mock
+
+# Allow direct execution
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
+
+from chat_downloader.sites.youtube import YouTubeChatDownloader
+from chat_downloader.sites.twitch import TwitchChatDownloader, TwitchChatIRC
+from chat_downloader.async_chat_downloader import (
+    aiohttp,
+    AsyncClient,
+    AsyncChat,
+    AsyncChatDownloader
+)
+from chat_downloader.sites.common import Chat
+from chat_downloader.utils.timed_utils import interruptible_sleep
+
+
+def get_youtube_pages():
+    path = os.path.join(os.path.dirname(__file__), 'youtube_actions.json')
+    with open(path) as f:
+        actions = json.load(f)
+
+    pages = [actions[:7], actions[7:14], actions[14:]]
+
+    def make_page(index):
+        continuations = []
+        if index + 1 < len(pages):
+            continuations.append({'invalidationContinuationData': {
+                'continuation': str(index + 1), 'timeoutMs': 1}})
+
+        return {'continuationContents': {'liveChatContinuation': {
+            'actions': copy.deepcopy(pages[index]),
+            'continuations': continuations
+        }}}
+    return make_page
+
+
+def get_continuation(data):
+    return int(json.loads(data)['continuation'])
+
+
+class FakeYouTubeClient:
+    def __init__(self, make_page):
+        self.make_page = make_page
+
+    async def feed_text(self, url, feed, params=None, headers=None):
+        feed(f'<script>var ytInitialData = {json.dumps(self.make_page(0))};</script>')
+
+    async def post_json(self, url, params=None, json=None, headers=None, data=None):
+        return self.make_page(get_continuation(data))
+
+    async def sleep(self, seconds):
+        pass
+
+
+@unittest.skipIf(aiohttp is None, 'aiohttp is not installed')
+class TestAsync(unittest.TestCase):
+    """
+    Class used to run unit tests for asynchronous chat retrieval.
+    """
+
+    def test_youtube_matches_sync(self):
+        make_page = get_youtube_pages()
+        initial_info = {'continuation_info': {'a': '0', 'b': '0'}, 'status': 'live'}
+        ytcfg = {'INNERTUBE_API_KEY': 'x', 'INNERTUBE_CONTEXT': {}, 'DATASYNC_ID': '||'}
+        params = {'message_groups': ['all'], 'max_attempts': 1}
+
+        downloader = YouTubeChatDownloader()
+        downloader._get_initial_info = lambda url, params=None, headers=None, names=None: (make_page(0), {}, {})
+        downloader._get_continuation_info = lambda url, params, data=None, headers=None: make_page(
+            get_continuation(data))
+
+        expected = list(downloader._get_chat_messages(initial_info, ytcfg, params))
+
+        async def get_messages():
+            generator = downloader._get_chat_messages_async(
+                initial_info, ytcfg, params, FakeYouTubeClient(make_page))
+            return [message async for message in generator]
+
+        self.assertTrue(expected)
+        self.assertEqual(asyncio.run(get_messages()), expected)
+
+    def test_twitch_irc(self):
+        lines = [
+            f'@badges=;color=#FF0000;display-name=User{i};id={i};tmi-sent-ts=1600000000000 '
+            f':user{i}!user{i}@user{i}.tmi.twitch.tv PRIVMSG #channel :Message {i}\r\n'
+            for i in range(5)
+        ]
+        received = []
+
+        async def handle(reader, writer):
+            received.append(await reader.readline())
+            writer.write(''.join(lines).encode('utf-8'))
+            await writer.drain()
+
+        async def get_messages():
+            server = await asyncio.start_server(handle, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+
+            with mock.patch.object(TwitchChatIRC, '_HOST', '127.0.0.1'), \
+                    mock.patch.object(TwitchChatIRC, '_PORT', port):
+                downloader = TwitchChatDownloader()
+                client = AsyncClient(downloader)
+                params = {'message_groups': ['messages'], 'max_attempts': 1, 'buffer_size': 4096}
+
+                chat = AsyncChat(
+                    Chat(iter([])),
+                    downloader._get_chat_messages_by_stream_id_async(
+                        'channel', params, client),
+                    max_messages=len(lines)
+                )
+                try:
+                    return [message async for message in chat]
+                finally:
+                    await client.close()
+                    server.close()
+
+        messages = asyncio.run(get_messages())
+
+        self.assertTrue(received)
+        self.assertEqual([m['message'] for m in messages],
+                         [f'Message {i}' for i in range(5)])
+        self.assertEqual(messages[0]['author']['display_name'], 'User0')
+
+    def test_twitch_irc_ping(self):
+        # The server is pinged periodically, even if data is always being received
+        pings = []
+
+        async def handle(reader, writer):
+            async def read():
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    if line.startswith(b'PING'):
+                        pings.append(line)
+
+            reading = asyncio.create_task(read())
+            try:
+                while not writer.is_closing():
+                    writer.write(b':tmi.twitch.tv 421 user NOTICE :Unknown command\r\n')
+                    await writer.drain()
+                    await asyncio.sleep(0.01)
+            except ConnectionError:
+                pass
+            finally:
+                reading.cancel()
+
+        async def ping():
+            server = await asyncio.start_server(handle, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+
+            with mock.patch.object(TwitchChatIRC, '_HOST', '127.0.0.1'), \
+                    mock.patch.object(TwitchChatIRC, '_PORT', port), \
+                    mock.patch.object(TwitchChatDownloader, '_PING_INTERVAL', 0.1):
+                downloader = TwitchChatDownloader()
+                client = AsyncClient(downloader)
+                params = {'message_groups': ['messages'], 'max_attempts': 1, 'buffer_size': 4096}
+
+                messages = downloader._get_chat_messages_by_stream_id_async(
+                    'channel', params, client)
+                try:
+                    await asyncio.wait_for(messages.__anext__(), 0.5)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    await client.close()
+                    server.close()
+
+        asyncio.run(ping())
+
+        self.assertGreaterEqual(len(pings), 2)
+
+    def test_thread_closed_by_producer(self):
+        # Closing a chat which is retrieved in a thread (while that thread is
+        # waiting for the next message) closes the generator in that thread
+        closed = threading.Event()
+
+        def get_messages():
+            try:
+                yield 1
+                while True:
+                    interruptible_sleep(10)  # e.g. waiting between requests
+            finally:
+                closed.set()
+
+        async def get_first():
+            downloader = AsyncChatDownloader(max_threads=1)
+            try:
+                messages = downloader._iterate_in_thread(get_messages())
+                first = await messages.__anext__()
+                with self.assertRaises(asyncio.TimeoutError):
+                    await asyncio.wait_for(messages.__anext__(), 0.1)
+                await messages.aclose()
+                return first
+            finally:
+                await downloader.close()
+
+        self.assertEqual(asyncio.run(get_first()), 1)
+        self.assertTrue(closed.wait(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
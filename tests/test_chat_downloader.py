@@ -1,5 +1,7 @@
 import os
 import sys
+import time
+import threading
 import unittest
 
 # Allow direct execution
@@ -11,6 +13,14 @@ from chat_downloader.sites import (
     get_all_sites,
     BaseChatDownloader
 )
+from chat_downloader.sites.common import Chat
+from chat_downloader.errors import InvalidParameter
+from chat_downloader.utils.timed_utils import (
+    TimedGenerator,
+    CancellationToken,
+    CancellableGenerator,
+    interruptible_sleep
+)
 from chat_downloader.debugging import (
     set_testing_mode,
     set_log_level,
@@ -22,6 +32,60 @@ class TestChatDownloader(unittest.TestCase):
     pass
 
 
+class TestMultipleChats(unittest.TestCase):
+
+    def test_get_chats(self):
+        downloader = ChatDownloader()
+
+        def get_chat(url, **kwargs):
+            return Chat(iter(range(kwargs['max_messages'])), title=url, id=url)
+        downloader.get_chat = get_chat
+
+        urls = [f'url_{i}' for i in range(10)]
+
+        # Merged into one iterator
+        items = list(downloader.get_chats(urls, workers=3, max_messages=5))
+        self.assertEqual(len(items), 50)
+        self.assertCountEqual({chat.id for chat, _ in items}, urls)
+
+        # Delivered through callbacks
+        received = {}
+
+        def callback(chat, item):
+            received.setdefault(chat.id, []).append(item)
+        downloader.get_chats(urls, workers=3, callback=callback, max_messages=5)
+        self.assertEqual(received, {url: list(range(5)) for url in urls})
+
+        with self.assertRaises(InvalidParameter):
+            downloader.get_chats(urls, output='chat.json')
+
+    def test_get_chats_timeout(self):
+        # The merged chats time out, even if no chat receives any items
+        downloader = ChatDownloader()
+
+        def wait():
+            while True:
+                interruptible_sleep(10)
+                yield
+
+        def get_chat(url, **kwargs):
+            return Chat(CancellableGenerator(wait(), kwargs['cancellation_token']), title=url, id=url)
+        downloader.get_chat = get_chat
+
+        start = time.monotonic()
+        items = list(TimedGenerator(downloader.get_chats(['url_0', 'url_1']), timeout=0.2))
+        self.assertEqual(items, [])
+        self.assertLess(time.monotonic() - start, 5)
+
+        # Cancelling the caller's token stops waiting for items
+        token = CancellationToken()
+        threading.Timer(0.1, token.cancel).start()
+
+        start = time.monotonic()
+        self.assertEqual(list(downloader.get_chats(['url_0', 'url_1'], cancellation_token=token)), [])
+        self.assertLess(time.monotonic() - start, 1)
+
+
 def generator(site, test):
 
     def test_template(self):
@@ -1,13 +1,35 @@
+import io
 import os
+import re
 import sys
+import json
 import unittest
+import subprocess
+import tempfile
+import threading
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import requests
 
 # Allow direct execution
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
 
 
 from chat_downloader import ChatDownloader
-from chat_downloader.sites import YouTubeChatDownloader
+from chat_downloader.sites import (
+    YouTubeChatDownloader,
+    TwitchChatDownloader,
+    ZoomChatDownloader,
+    resolve
+)
+from chat_downloader.sites.common import Remapper, Projection, Chat
+from chat_downloader.sites.facebook import FacebookChatDownloader
+from chat_downloader.sites.youtube import LivePollScheduler, LiveSessionMerger, ContinuationBodyEncoder
+from chat_downloader.utils.core import LRUCache
+from chat_downloader.errors import InvalidParameter, ChatDisabled
+from chat_downloader.debugging import TestingModes
 import itertools
 
 
@@ -16,6 +38,671 @@ class TestSites(unittest.TestCase):
     Class used to run unit tests for writers.
     """
 
+    def test_resolve(self):
+        tests = {
+            'https://www.youtube.com/watch?v=jfKfPfyJRdk': (YouTubeChatDownloader, '_get_chat_by_video_id', 'jfKfPfyJRdk'),
+            'https://youtu.be/jfKfPfyJRdk': (YouTubeChatDownloader, '_get_chat_by_video_id', 'jfKfPfyJRdk'),
+            'jfKfPfyJRdk': (YouTubeChatDownloader, '_get_chat_by_video_id', 'jfKfPfyJRdk'),
+            'https://www.youtube.com/clip/UgkxABC': (YouTubeChatDownloader, '_get_chat_by_clip_id', 'UgkxABC'),
+            'https://www.youtube.com/@LofiGirl': (YouTubeChatDownloader, '_get_chat_by_user', 'LofiGirl'),
+            'https://www.twitch.tv/videos/123456789': (TwitchChatDownloader, '_get_chat_by_vod_id', '123456789'),
+            'https://clips.twitch.tv/FaintLightGullWholeWheat': (TwitchChatDownloader, '_get_chat_by_clip_id', 'FaintLightGullWholeWheat'),
+            'https://us02web.zoom.us/rec/play/abc': (ZoomChatDownloader, '_get_chat_by_video_id', 'abc'),
+        }
+
+        for url, (site, function_name, match_id) in tests.items():
+            result = resolve(url)
+            self.assertIsNotNone(result, url)
+            self.assertEqual(result[:2], (site, function_name))
+            self.assertEqual(result[2].group('id'), match_id)
+
+        self.assertIsNone(resolve('https://www.example.com'))
+        self.assertIsNone(resolve('#'))
+
+    def test_page_lookahead(self):
+        # Pages are requested using the cursor of the previous page
+        num_pages, page_size = 5, 3
+
+        def download_gql(query):
+            variables = query[0]['variables']
+            page = int(variables.get('cursor', 0))
+            edges = [{
+                'cursor': str(page + 1),
+                'node': {'id': str(page * page_size + i), 'contentOffsetSeconds': page}
+            } for i in range(page_size)]
+
+            return [{'data': {'video': {'comments': {
+                'edges': edges,
+                'pageInfo': {'hasNextPage': page + 1 < num_pages}
+            }}}}]
+
+        downloader = TwitchChatDownloader()
+        downloader._download_gql = download_gql
+
+        for page_lookahead in (0, 1, 2):
+            params = {'page_lookahead': page_lookahead,
+                      'message_groups': ['all'], 'max_attempts': 1}
+            messages = downloader._get_chat_messages_by_vod_id('1', params, 100)
+            self.assertEqual([message['message_id'] for message in messages],
+                             [str(i) for i in range(num_pages * page_size)])
+
+    def test_sharded_replay(self):
+        # Two messages per second, 10 messages per page
+        num_messages, page_size = 200, 10
+
+        def download_gql(query):
+            variables = query[0]['variables']
+            index = int(variables.get('cursor') or 2 * variables['contentOffsetSeconds'])
+
+            edges = [{
+                'cursor': str(i + 1),
+                'node': {'id': str(i), 'contentOffsetSeconds': i // 2}
+            } for i in range(index, min(index + page_size, num_messages))]
+
+            return [{'data': {'video': {'comments': {
+                'edges': edges,
+                'pageInfo': {'hasNextPage': index + page_size < num_messages}
+            }}}}]
+
+        downloader = TwitchChatDownloader()
+        downloader._download_gql = download_gql
+
+        def get_message_ids(**params):
+            def get_shard(start_time, end_time):
+                return downloader._get_chat_messages_by_vod_id('1', {
+                    **params, 'start_time': start_time, 'end_time': end_time}, 100)
+
+            messages = downloader._get_sharded_replay(
+                get_shard, params.get('start_time'), params.get('end_time'), 100, params)
+            return [message['message_id'] for message in messages]
+
+        base_params = {'message_groups': ['all'], 'max_attempts': 1}
+        for time_params in ({}, {'start_time': 12, 'end_time': 57}):
+            params = {**base_params, **time_params}
+            expected = get_message_ids(**params)
+            self.assertGreater(len(expected), 0)
+
+            for replay_workers, replay_shard_duration in ((2, 10), (4, 7.5), (3, 1000)):
+                self.assertEqual(get_message_ids(
+                    **params, replay_workers=replay_workers, replay_shard_duration=replay_shard_duration), expected)
+
+    def test_sharded_replay_before_start(self):
+        # Messages sent before a stream starts have negative times
+        messages = [{'message_id': str(i), 'time_in_seconds': i} for i in range(-5, 30)]
+        shard_calls = []
+
+        def get_shard(start_time, end_time):
+            shard_calls.append((start_time, end_time))
+            for message in messages:
+                if start_time is not None and message['time_in_seconds'] < start_time:
+                    continue
+                if end_time is not None and message['time_in_seconds'] > end_time:
+                    return
+                yield message
+
+        downloader = YouTubeChatDownloader()
+        params = {'replay_workers': 2, 'replay_shard_duration': 10}
+        sharded = list(downloader._get_sharded_replay(get_shard, None, None, 30, params))
+
+        self.assertEqual(sharded, messages)
+        self.assertEqual(shard_calls[0], (None, 10))
+
+    def test_thread_sessions(self):
+        downloader = TwitchChatDownloader(headers={'a': '1'})
+        sessions = {}
+
+        def get_session(name):
+            sessions[name] = downloader.session
+
+        threads = [threading.Thread(target=get_session, args=(i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Each thread has its own session, but shares headers and cookies
+        self.assertEqual(len({id(session) for session in sessions.values()}), 3)
+        self.assertIs(downloader.session, downloader.session)
+
+        downloader.update_session_headers({'b': '2'})
+        self.assertEqual(downloader.session.headers, {'a': '1', 'b': '2'})
+        self.assertEqual(downloader.get_session_headers('b'), '2')
+
+        downloader.set_cookie_value('.example.com', 'name', 'value')
+        self.assertIs(sessions[0].cookies, downloader.session.cookies)
+        downloader.close()
+
+    def test_initial_info_streaming(self):
+        initial_data = {'contents': {'text': 'a\\u003c/script>b'}}
+        ytcfg = {'INNERTUBE_API_KEY': 'key'}
+        page = ''.join((
+            f'<html><script>ytcfg.set({json.dumps(ytcfg)});</script>',
+            '<script>var ytInitialPlayerResponse = {"videoDetails": {}};var meta = 1;</script>',
+            f'<script>var ytInitialData = {json.dumps(initial_data)};</script>',
+            '<script>' + 'x' * 1000000 + '</script></html>'
+        )).encode()
+
+        class Page(io.BytesIO):
+            read_size = 0
+
+            def read(self, size=-1):
+                data = super().read(size)
+                Page.read_size += len(data)
+                return data
+
+        def get(url, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response.encoding = 'utf-8'
+            response.raw = Page(page)
+            return response
+
+        downloader = YouTubeChatDownloader()
+        with mock.patch.object(downloader, '_session_get', get):
+            self.assertEqual(downloader._get_initial_info('url'),
+                             (initial_data, ytcfg, {'videoDetails': {}}))
+            self.assertLess(Page.read_size, len(page) // 2)  # The rest of the page is not read
+
+            Page.read_size = 0
+            self.assertEqual(downloader._get_initial_info('url', names=('initial_data',)),
+                             (initial_data, {}, {}))
+
+    def test_innertube_bootstrap(self):
+        sub_menu_items = [{'title': 'Live chat', 'continuation': {'reloadContinuationData': {'continuation': 'token'}}}]
+        initial_data = {'contents': {'twoColumnWatchNextResults': {'conversationBar': {'liveChatRenderer': {
+            'header': {'liveChatHeaderRenderer': {'viewSelector': {'sortFilterSubMenuRenderer': {
+                'subMenuItems': sub_menu_items}}}}}}}}}
+        player_response = {'videoDetails': {'videoId': 'id', 'title': 'Title', 'isLive': True,
+                                            'isLiveContent': True, 'lengthSeconds': '0'}}
+        ytcfg = {'INNERTUBE_API_KEY': 'key', 'INNERTUBE_CONTEXT': {'client': {}}, 'DATASYNC_ID': '||'}
+
+        downloader = YouTubeChatDownloader()
+        urls = []
+        api_error = False
+
+        def get_initial_info(url, params=None, headers=None, names=None):
+            urls.append(url)
+            return initial_data, ytcfg, player_response
+
+        def get_continuation_info(url, params, json=None, headers=None):
+            urls.append(url)
+            self.assertEqual(json, {'context': ytcfg['INNERTUBE_CONTEXT'], 'videoId': 'id'})
+            if api_error:
+                return {'error': {'code': 400}}
+            return initial_data if '/next' in url else player_response
+
+        with mock.patch.object(downloader, '_get_initial_info', get_initial_info), \
+                mock.patch.object(downloader, '_get_continuation_info', get_continuation_info):
+            # The first video uses the watch page, after which the API is used
+            expected = downloader._parse_video_data('id')
+            self.assertEqual(expected[0]['continuation_info'], {'Live chat': 'token'})
+            self.assertEqual(downloader._parse_video_data('id'), expected)
+            self.assertEqual([url.split('?')[0] for url in urls], [
+                'https://www.youtube.com/watch',
+                'https://www.youtube.com/youtubei/v1/next',
+                'https://www.youtube.com/youtubei/v1/player'
+            ])
+
+            # Otherwise, the watch page is used
+            del urls[:]
+            api_error = True
+            self.assertEqual(downloader._parse_video_data('id'), expected)
+            self.assertEqual(urls[-1], 'https://www.youtube.com/watch?v=id')
+
+            del urls[:]
+            downloader._parse_video_data('id', video_type='clip')
+            self.assertEqual(urls, ['https://www.youtube.com/clip/id'])
+
+    def test_client_cache(self):
+        ytcfg = {'INNERTUBE_API_KEY': 'key', 'INNERTUBE_CONTEXT': {'client': {'visitorData': 'a'}},
+                 'DATASYNC_ID': '||', 'OTHER': 'value'}
+
+        def get_initial_info(url, params=None, headers=None, names=None):
+            return {}, ytcfg, {}
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            downloader = YouTubeChatDownloader(cache_dir=cache_dir)
+            self.assertIsNone(downloader._client_ytcfg)
+            downloader.set_cookie_value('.youtube.com', 'VISITOR_INFO1_LIVE', 'visitor')
+            with mock.patch.object(downloader, '_get_initial_info', get_initial_info):
+                downloader._get_html_video_info('id')
+
+            # New sessions use the stored client context and cookies
+            downloader = YouTubeChatDownloader(cache_dir=cache_dir)
+            self.assertEqual(downloader._client_ytcfg, {
+                key: value for key, value in ytcfg.items() if key != 'OTHER'})
+            self.assertEqual(downloader.get_cookie_value('VISITOR_INFO1_LIVE'), 'visitor')
+
+            # ... unless it has expired
+            path = downloader._client_cache_path
+            with open(path) as f:
+                cache = json.load(f)
+            cache['time'] -= YouTubeChatDownloader._CLIENT_CACHE_TTL + 1
+            with open(path, 'w') as f:
+                json.dump(cache, f)
+            self.assertIsNone(YouTubeChatDownloader(cache_dir=cache_dir)._client_ytcfg)
+
+            # Each cookie file has its own cache
+            self.assertNotEqual(YouTubeChatDownloader._get_client_cache_path(cache_dir, 'cookies.txt'), path)
+
+    def test_live_poll_scheduler(self):
+        scheduler = LivePollScheduler()
+        now = 0
+
+        # Busy chat (200 messages/s): responses are full, so requests are made more often
+        for i in range(5):
+            ids = range(int(now * 200) - 100, int(now * 200))
+            interval = scheduler.update(100, ids, 5, now, timestamps=[j / 200 for j in ids])
+            now += interval
+        self.assertEqual(interval, LivePollScheduler.MIN_INTERVAL)
+        self.assertGreater(scheduler.request_rate, 1 / 5)
+
+        # Messages between responses were missed (around 0.5 seconds of
+        # chat between each pair of responses)
+        self.assertGreater(scheduler.estimated_gap, 1.5)
+
+        # Overlapping responses have not missed any messages
+        gap = scheduler.estimated_gap
+        overlapping = range(ids.start + 50, ids.stop + 50)
+        scheduler.update(100, overlapping, 5, now + 1, timestamps=[j / 200 for j in overlapping])
+        self.assertEqual(scheduler.estimated_gap, gap)
+
+        # Idle chat: back off, up to the maximum
+        intervals = [scheduler.update(0, (), 5, now + i) for i in range(2, 10)]
+        self.assertEqual(intervals, sorted(intervals))
+        self.assertEqual(intervals[-1], LivePollScheduler.MAX_INTERVAL)
+
+        # Quiet chat: wait as long as the server suggests
+        self.assertEqual(scheduler.update(2, ['a', 'b'], 5, now + 20), 5)
+
+        # Shorter waits suggested by the server are respected
+        self.assertEqual(LivePollScheduler().update(1, server_timeout=0.001), 0.001)
+
+        # Without a suggestion from the server, start with the minimum wait
+        # until the message rate is known
+        scheduler = LivePollScheduler()
+        self.assertEqual(scheduler.update(1, ['a'], now=0), LivePollScheduler.MIN_INTERVAL)
+        self.assertEqual(LivePollScheduler().update(0, now=0), LivePollScheduler.MIN_INTERVAL * LivePollScheduler.IDLE_BACKOFF)
+
+        # Once it is known, wait until responses are filled to the target
+        self.assertEqual(scheduler.update(10, ['b'], now=1), 5)
+
+        self.assertRaises(InvalidParameter, LivePollScheduler, 0)
+
+    def test_staggered_sessions(self):
+        downloader = YouTubeChatDownloader()
+        self.assertIsNone(downloader._get_session_merger({}))
+        self.assertRaises(InvalidParameter, downloader._get_session_merger, {'poll_sessions': 0})
+
+        merger = downloader._get_session_merger({'poll_sessions': 2})
+        schedulers = [session['poll_scheduler'] for session in merger.sessions]
+
+        # Each session misses some of the messages, but not the same ones
+        messages = [{'message_id': str(i), 'message': f'Message {i}'} for i in range(10)]
+        received = {
+            schedulers[0]: messages[:4] + messages[6:],
+            schedulers[1]: messages[2:8],
+        }
+
+        def get_chat_messages(initial_info, ytcfg, params, poll_scheduler):
+            yield from received[poll_scheduler]
+
+        with mock.patch.object(downloader, '_get_chat_messages', get_chat_messages):
+            merged = list(downloader._get_staggered_chat({}, {}, {}, merger))
+
+        self.assertCountEqual(merged, messages)
+        self.assertEqual(merger.messages, 10)
+
+        coverage = merger.get_coverage()
+        self.assertEqual([session['messages'] for session in coverage], [8, 6])
+        self.assertEqual(sum(session['first_received'] for session in coverage), 10)
+        self.assertEqual(coverage[0]['coverage'], 0.8)
+
+        # Messages without IDs are identified by their timestamp, author and text
+        merger = LiveSessionMerger([LivePollScheduler()] * 2)
+        message = {'timestamp': 1, 'author': {'id': 'a'}, 'message': 'Hello'}
+        self.assertTrue(merger.add(0, dict(message), now=0))
+        self.assertFalse(merger.add(1, dict(message), now=30))
+        self.assertTrue(merger.add(1, {**message, 'timestamp': 2}, now=60))
+        self.assertEqual(merger.get_coverage(now=60)[1]['messages_per_minute'], 2)
+
+    def test_upcoming_wait(self):
+        get_wait = YouTubeChatDownloader._get_upcoming_wait
+
+        # Sleep until shortly before the scheduled start (up to an hour)
+        self.assertEqual(get_wait(1000), 1000 - YouTubeChatDownloader._UPCOMING_LEAD_TIME)
+        self.assertEqual(get_wait(86400), YouTubeChatDownloader._UPCOMING_MAX_WAIT)
+
+        # Check more often around the scheduled start
+        waits = [get_wait(seconds) for seconds in (120, 60, 20, 0, -20, -60, -600)]
+        self.assertEqual(waits, [30, 30, 10, 5, 10, 30, 30])
+
+        downloader = YouTubeChatDownloader()
+        now = 1000000
+        video = {'video_id': 'upcoming', 'title': 'Upcoming', 'video_type': 'UPCOMING',
+                 'scheduled_start_time': now + 600}
+        checks = []
+        lookups = []
+        waits = []
+        live_chat = {'contents': {'twoColumnWatchNextResults': {'conversationBar': {'liveChatRenderer': {'header': {}}}}}}
+
+        def get_innertube_initial_data(video_id, params=None):
+            checks.append(now)
+            if now < video['scheduled_start_time'] + 10:
+                return {'contents': {}}
+            return live_chat
+
+        def get_chat_by_video_id(video_id, params, yt_initial_data=None):
+            lookups.append(yt_initial_data)
+            if now < video['scheduled_start_time'] + 10:
+                raise ChatDisabled('Not started')
+            return Chat(iter([{'message': 'Hello'}]), title=video['title'], status='live')
+
+        def sleep(seconds):
+            nonlocal now
+            waits.append(seconds)
+            now += seconds
+
+        with mock.patch.object(downloader, 'get_user_videos', return_value=iter([video])) as get_user_videos, \
+                mock.patch.object(downloader, 'get_chat_by_video_id', get_chat_by_video_id), \
+                mock.patch.object(downloader, '_get_innertube_initial_data', get_innertube_initial_data), \
+                mock.patch('chat_downloader.sites.youtube.interruptible_sleep', sleep), \
+                mock.patch('chat_downloader.sites.youtube.time.time', lambda: now):
+            chat_item = Chat()
+            messages = downloader._get_chat_messages_by_user_args({'channel_id': 'channel'}, chat_item, {})
+            self.assertEqual(next(messages), {'message': 'Hello'})
+
+        # The channel's livestreams are only requested once, and the
+        # livestream is checked more often around its scheduled start
+        self.assertEqual(get_user_videos.call_count, 1)
+        self.assertEqual(waits[0], 480)
+        self.assertEqual(waits[1:], sorted(waits[1:], reverse=True))
+        self.assertEqual(waits[-1], YouTubeChatDownloader._UPCOMING_MIN_WAIT)
+        self.assertLessEqual(len(checks), 12)
+        self.assertEqual(chat_item.status, 'live')
+
+        # While waiting, only the initial data is requested, which is then
+        # used to get the chat (rather than requesting it again)
+        self.assertEqual(lookups, [None, live_chat])
+
+    def test_continuation_body_encoder(self):
+        context = {'client': {'clientName': 'WEB', 'hl': 'en'}, 'user': {}}
+        encoder = ContinuationBodyEncoder(context)
+
+        # Same as encoding the whole body
+        self.assertEqual(encoder.encode('abc"def'), json.dumps(
+            {'context': context, 'continuation': 'abc"def'}).encode())
+        self.assertEqual(encoder.encode('abc', 'tracking', 1000), json.dumps({
+            'context': {**context, 'clickTracking': {'clickTrackingParams': 'tracking'}},
+            'continuation': 'abc',
+            'currentPlayerState': {'playerOffsetMs': 1000}
+        }).encode())
+
+        # Click tracking of the context is replaced by that of the previous response
+        context['clickTracking'] = {'clickTrackingParams': 'initial'}
+        encoder = ContinuationBodyEncoder(context)
+        self.assertEqual(json.loads(encoder.encode('abc')), {'context': context, 'continuation': 'abc'})
+        self.assertEqual(json.loads(encoder.encode('abc', 'tracking'))['context']['clickTracking'],
+                         {'clickTrackingParams': 'tracking'})
+
+        self.assertEqual(json.loads(ContinuationBodyEncoder({}).encode('abc', 'tracking')), {
+            'context': {'clickTracking': {'clickTrackingParams': 'tracking'}}, 'continuation': 'abc'})
+
+        def encode_body(context, continuation, click_tracking_params=None, player_offset_ms=None):
+            # Previous construction of the body (encoded by `requests`)
+            body = {'context': context, 'continuation': continuation}
+            if player_offset_ms is not None:
+                body['currentPlayerState'] = {'playerOffsetMs': player_offset_ms}
+            if click_tracking_params:
+                body['context'] = {**context, 'clickTracking': {'clickTrackingParams': click_tracking_params}}
+            return requests.models.complexjson.dumps(body).encode()
+
+        # Byte-for-byte the same, wherever the click tracking is in the context
+        contexts = [
+            {},
+            {'client': {'hl': 'en'}},
+            {'clickTracking': {'clickTrackingParams': 'initial'}},
+            {'clickTracking': {'clickTrackingParams': 'initial'}, 'user': {}},
+            {'client': {'hl': 'en'}, 'clickTracking': {'clickTrackingParams': 'initial'}, 'user': {}},
+            {'client': {'hl': 'en'}, 'user': {}, 'clickTracking': None},
+        ]
+        for context in contexts:
+            encoder = ContinuationBodyEncoder(context)
+            for args in itertools.product(('abc',), (None, 'tracking'), (None, 1000)):
+                self.assertEqual(encoder.encode(*args), encode_body(context, *args), (context, args))
+
+    def test_sapisidhash_header(self):
+        downloader = YouTubeChatDownloader()
+        downloader.set_cookie_value('.youtube.com', 'SAPISID', 'sapisid')
+
+        now = 1000000.1
+        with mock.patch('chat_downloader.sites.youtube.time.time', lambda: now), \
+                mock.patch.object(downloader, 'get_cookie_value', wraps=downloader.get_cookie_value) as get_cookie_value:
+            header = downloader._generate_sapisidhash_header()
+            self.assertTrue(header.startswith('SAPISIDHASH 1000000_'))
+            calls = get_cookie_value.call_count
+
+            # Reused (without reading cookies) until the timestamp changes
+            now += 0.3
+            self.assertEqual(downloader._generate_sapisidhash_header(), header)
+            self.assertEqual(get_cookie_value.call_count, calls)
+
+            now += 1
+            self.assertNotEqual(downloader._generate_sapisidhash_header(), header)
+
+    def test_badge_info_threads(self):
+        def download_gql(query):
+            channel = query[0]['variables']['channelLogin']
+            badge_id = base64.b64encode(f'subscriber;1;{channel}'.encode()).decode()
+            badge = {'id': badge_id, 'title': channel, 'image1x': '//1', 'image2x': '//2', 'image4x': '//4'}
+            return [{'data': {'badges': [badge]}}]
+
+        downloader = TwitchChatDownloader()
+        downloader._download_gql = download_gql
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(downloader._update_badge_info,
+                              [f'c{i}' for i in range(100)]))
+
+        for i in range(100):
+            badge = downloader._parse_badge_info('subscriber', '1', f'c{i}')
+            self.assertEqual(badge['title'], f'c{i}')
+
+    def test_compiled_remapping(self):
+        remapping = {
+            'a': 'x',
+            'b': Remapper('y', int),
+            'c': Remapper(remap_function=lambda v: {'z': v, 'x': 0}, to_unpack=True),
+            'ignored': None
+        }
+        item = {'a': 1, 'b': '2', 'c': 3, 'ignored': 4, 'some-key': 5}
+
+        for keep_unknown_keys, replace_char in itertools.product((False, True), (None, '-')):
+            expected = {}
+            for key in item:
+                Remapper.remap(expected, remapping, key, item[key],
+                               keep_unknown_keys, replace_char)
+
+            remap_dictionary = Remapper.compile(remapping, keep_unknown_keys, replace_char)
+            self.assertIs(remap_dictionary, Remapper.compile(remapping, keep_unknown_keys, replace_char))
+
+            info = remap_dictionary(item)
+            self.assertEqual(info, expected)
+            self.assertEqual(list(info), list(expected))
+
+        with self.assertRaises(ValueError):
+            Remapper.compile({'a': 1})
+
+        with self.assertRaises(ValueError):
+            unpack_string = {'c': Remapper(remap_function=str, to_unpack=True)}
+            Remapper.compile(unpack_string)({'c': 1})
+
+    def test_compiled_remapping_bounded(self):
+        # Functions compiled for many projections do not accumulate
+        remapping = {'a': 'x', 'b': 'y'}
+        with mock.patch.object(Remapper, '_COMPILED', LRUCache(4)):
+            for index in range(10):
+                projection = Projection([f'field{index}'])
+                Remapper.compile(remapping, projection=projection)
+            self.assertEqual(len(Remapper._COMPILED), 4)
+
+            # Discarded functions are compiled again when needed
+            self.assertEqual(Remapper.compile(remapping)({'a': 1}), {'x': 1})
+
+    def test_youtube_class_attributes(self):
+        # Loops in the class body do not leave their variables behind
+        self.assertIn('addChatItemAction', YouTubeChatDownloader._ACTION_HANDLERS)
+        self.assertIn('message', YouTubeChatDownloader._REMAPPING_WITHOUT_EMOTES)
+        for name in ('_action_type', '_key', '_remap'):
+            self.assertNotIn(name, vars(YouTubeChatDownloader))
+
+    def test_message_filter(self):
+        groups = YouTubeChatDownloader._MESSAGE_GROUPS
+        get_filter = YouTubeChatDownloader._get_message_filter
+
+        self.assertIsNone(get_filter(groups, ['all'], []))
+        self.assertIsNone(get_filter(groups, ['messages'], ['all']))
+        self.assertEqual(get_filter(groups, ['messages'], None), {'text_message'})
+        self.assertEqual(get_filter(groups, ['messages', 'superchat'], []),
+                         frozenset(groups['messages'] + groups['superchat']))
+
+        # Message types take priority over message groups
+        self.assertEqual(get_filter(groups, ['superchat'], ['ticker_paid_message_item']),
+                         {'ticker_paid_message_item'})
+
+    def test_filter_pushdown(self):
+        path = os.path.join(os.path.dirname(__file__), 'youtube_actions.json')
+        with open(path) as f:
+            actions = json.load(f)
+
+        downloader = YouTubeChatDownloader()
+        parsed = [downloader._parse_chat_action(action) for action in actions]
+        message_types = {data['message_type'] for data in parsed if data}
+
+        irc_lines = [
+            '@badges=;color=#FF0000;display-name=User;id=1;tmi-sent-ts=1600000000000 '
+            ':user!user@user.tmi.twitch.tv PRIVMSG #channel :Hello',
+            '@badges=;msg-id=resub;msg-param-cumulative-months=3;tmi-sent-ts=1600000000000 '
+            ':tmi.twitch.tv USERNOTICE #channel :Message',
+            '@msg-id=some-new-type;tmi-sent-ts=1600000000000 :tmi.twitch.tv USERNOTICE #channel',
+            '@ban-duration=60;room-id=1;tmi-sent-ts=1600000000000 :tmi.twitch.tv CLEARCHAT #channel :user',
+            '@room-id=1;tmi-sent-ts=1600000000000 :tmi.twitch.tv CLEARCHAT #channel',
+        ]
+        matches = [re.match(TwitchChatDownloader._MESSAGE_REGEX, line) for line in irc_lines]
+
+        # Unknown message types are logged for debugging, which raises an
+        # error if another test module has enabled testing mode
+        with mock.patch('chat_downloader.debugging.TESTING_MODE', TestingModes.NONE):
+            irc_parsed = [TwitchChatDownloader._parse_irc_item(match) for match in matches]
+            message_types.update(data['message_type'] for data in irc_parsed)
+
+            for message_type in message_types:
+                message_filter = frozenset((message_type,))
+
+                expected = [data for data in parsed if data and data['message_type'] == message_type]
+                self.assertEqual([data for data in (downloader._parse_chat_action(action, message_filter=message_filter)
+                                                    for action in actions) if data], expected)
+
+                expected = [data for data in irc_parsed if data['message_type'] == message_type]
+                self.assertEqual([data for data in (TwitchChatDownloader._parse_irc_item(match, message_filter)
+                                                    for match in matches) if data], expected)
+
+    def test_parse_cache(self):
+        path = os.path.join(os.path.dirname(__file__), 'youtube_actions.json')
+        with open(path) as f:
+            actions = json.load(f)
+
+        emoji = {
+            'emojiId': 'UCchannel/emote', 'shortcuts': [':emote:'], 'searchTerms': ['emote'],
+            'image': {'thumbnails': [{'url': 'https://yt3.ggpht.com/emote=w24-h24', 'width': 24, 'height': 24}]},
+            'isCustomEmoji': True
+        }
+        for _ in range(2):
+            action = json.loads(json.dumps(actions[0]))
+            renderer = action['addChatItemAction']['item']['liveChatTextMessageRenderer']
+            renderer['message']['runs'].append({'emoji': emoji})
+            actions.append(action)
+
+        downloader = YouTubeChatDownloader()
+        expected = [downloader._parse_chat_action(action) for action in actions]
+
+        cache = LRUCache()
+        for _ in range(2):
+            self.assertEqual([downloader._parse_chat_action(action, cache=cache)
+                              for action in actions], expected)
+        self.assertGreater(cache.hits, cache.misses)
+
+        # Messages do not share the cached emotes and images
+        parsed = downloader._parse_chat_action(actions[-2], cache=cache)
+        parsed['emotes'][0]['images'][0]['url'] = None
+        parsed['emotes'][0]['shortcuts'].append(':other:')
+        parsed['author']['images'][0]['url'] = None
+        self.assertEqual(downloader._parse_chat_action(actions[-1], cache=cache), expected[-1])
+
+        # The cache is only used while parsing the chat's actions
+        self.assertIsNone(YouTubeChatDownloader._get_parse_cache())
+
+    def test_projection(self):
+        projection = Projection('timestamp, author.id, in_reply_to.author')
+        item = {
+            'timestamp': 1,
+            'message': 'Hello',
+            'author': {'id': 'a', 'name': 'b'},
+            'in_reply_to': {'author': {'id': 'c'}, 'message': 'Hi'},
+            'emotes': [{'id': 'd'}]
+        }
+        self.assertEqual(projection.project(item), {
+            'timestamp': 1,
+            'author': {'id': 'a'},
+            'in_reply_to': {'author': {'id': 'c'}}
+        })
+
+        # Keys before moving to nested dictionaries
+        for key in ('author_id', 'in_reply_to_author_name', 'time_text'):
+            self.assertIn(key, projection)
+        for key in ('author_name', 'message', 'emotes'):
+            self.assertNotIn(key, projection)
+
+        path = os.path.join(os.path.dirname(__file__), 'youtube_actions.json')
+        with open(path) as f:
+            actions = json.load(f)
+
+        downloader = YouTubeChatDownloader()
+        parsed = [downloader._parse_chat_action(action) for action in actions]
+
+        for fields in (['timestamp', 'author.id', 'message'], ['author.name', 'money'], ['emotes.id']):
+            projection = Projection(fields, YouTubeChatDownloader._FIELD_DEPENDENCIES)
+            projected = [downloader._parse_chat_action(action, projection=projection) for action in actions]
+            self.assertEqual([projection.project(x) for x in projected if x],
+                             [projection.project(x) for x in parsed if x])
+
+    def test_facebook_projection(self):
+        node = {'id': '1', 'created_time': 1600000000, 'body': {'text': 'Hello'},
+                'author': {'id': 'a', 'name': 'b', '__typename': 'User'}}
+        message_filter = FacebookChatDownloader._get_message_filter(
+            FacebookChatDownloader._MESSAGE_GROUPS, ['messages'], None)
+
+        projection = FacebookChatDownloader._get_projection({'fields': ['timestamp', 'author.id']})
+        item = FacebookChatDownloader._parse_node(dict(node), projection=projection)
+
+        # The message type is still known, so the item is not filtered out
+        self.assertIn(item.get('message_type'), message_filter)
+        self.assertEqual(projection.project(item), {'timestamp': 1600000000000000, 'author': {'id': 'a'}})
+
+    def test_lazy_loading(self):
+        # Site modules are only imported when a URL for that site is resolved
+        code = '; '.join((
+            'import sys',
+            'import chat_downloader.cli',
+            'from chat_downloader.sites import resolve',
+            'loaded = lambda name: f"chat_downloader.sites.{name}" in sys.modules',
+            'assert not any(map(loaded, ("youtube", "twitch", "zoom")))',
+            'resolve("https://www.twitch.tv/videos/123456789")',
+            'assert loaded("twitch") and not loaded("youtube")',
+        ))
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, '-c', code], cwd=root, check=True)
+
     def test_youtube(self):
 
         max_videos = 50
@@ -1,6 +1,11 @@
 import os
+import json
 import sys
+import time
+import queue
+import threading
 import unittest
+from unittest import mock
 
 # Allow direct execution
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # noqa
@@ -8,9 +13,26 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from chat_downloader.utils.core import (
     safe_print,
-    get_title_of_webpage
+    get_title_of_webpage,
+    get_snake_case_name,
+    LRUCache,
+    ScriptJSONExtractor
+)
+from chat_downloader.utils.timed_utils import (
+    timed_input,
+    interruptible_sleep,
+    TimedGenerator,
+    CancellationToken,
+    CancellableGenerator,
+    on_cancel,
+    check_for_timeout
+)
+from chat_downloader.utils.threaded_utils import (
+    wait_for_entry,
+    PrefetchGenerator,
+    ordered_parallel_generator,
+    merged_parallel_generator
 )
-from chat_downloader.utils.timed_utils import timed_input
 
 
 class TestUtils(unittest.TestCase):
@@ -29,6 +51,307 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(get_title_of_webpage(
             'a <title>title</title> b'), 'title')
 
+    def test_get_snake_case_name(self):
+        self.assertEqual(get_snake_case_name(
+            'liveChatTextMessageRenderer', 'liveChat', 'Renderer'), 'text_message')
+        self.assertEqual(get_snake_case_name(
+            'markChatItemAsDeletedAction', suffixes=('Action', 'Command')), 'mark_chat_item_as_deleted')
+
+        # Results are memoized
+        hits = get_snake_case_name.cache_info().hits
+        get_snake_case_name('liveChatTextMessageRenderer', 'liveChat', 'Renderer')
+        self.assertEqual(get_snake_case_name.cache_info().hits, hits + 1)
+
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)  # 'b' is now the least recently used
+        cache.set('c', 3)
+
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.get('b', 0), 0)
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+        self.assertEqual(cache.hit_rate, 0.75)
+
+    def test_script_json_extractor(self):
+        patterns = {
+            'data': r'var data\s*=\s*(?=\{)',
+            'config': r'config\.set\(\s*(?=\{)',
+        }
+        data = {'text': 'a\\u003c/script>b', 'nested': {'list': [1, 2, {'c': '{'}]}}
+        page = ''.join((
+            '<html><script>config.set({"invalid"});</script>',
+            f'<script>var data = {json.dumps(data)};</script>',
+            '<script>config.set({"key": "value"});</script>',
+            '<script>var data = {"second": true};</script></html>'
+        ))
+        expected = {'data': data, 'config': {'key': 'value'}}
+
+        for chunk_size in (1, 7, len(page)):
+            extractor = ScriptJSONExtractor(patterns)
+            chunks = [page[i:i + chunk_size] for i in range(0, len(page), chunk_size)]
+            fed = 0
+            for chunk in chunks:
+                fed += 1
+                if extractor.feed(chunk):
+                    break
+            self.assertEqual(extractor.close(), expected)
+
+            # Reading stops once all values have been found
+            if chunk_size < len(page):
+                self.assertLess(fed, len(chunks))
+
+        # Values which are not found are missing
+        extractor = ScriptJSONExtractor(patterns)
+        self.assertFalse(extractor.feed('<script>var data = {"a": 1'))
+        self.assertEqual(extractor.close(), {})
+
     def test_timed_input(self):
         if os.name == 'nt':  # only test on windows
             self.assertEqual(timed_input(5, 'Enter:'), None)
+
+    def test_timed_generator(self):
+        def slow_generator(num_fast_items, sleep_time):
+            yield from range(num_fast_items)
+            while True:
+                interruptible_sleep(sleep_time)
+                yield None
+
+        # Inactivity timeout
+        timeouts = []
+        generator = TimedGenerator(slow_generator(3, 10), inactivity_timeout=0.2,
+                                   on_inactivity_timeout=lambda: timeouts.append('inactivity'))
+        start = time.monotonic()
+        self.assertEqual(list(generator), [0, 1, 2])
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(timeouts, ['inactivity'])
+
+        # Overall timeout, running outside of the main thread
+        results = []
+
+        def run():
+            generator = TimedGenerator(slow_generator(0, 0.05), timeout=0.3,
+                                       on_timeout=lambda: results.append('timeout'))
+            results.append(len(list(generator)))
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results[0], 'timeout')
+        self.assertGreater(results[1], 0)
+
+    def test_interruptible_sleep(self):
+        # A single wait is made, rather than waking up regularly
+        token = CancellationToken()
+        with token.activate(), mock.patch.object(threading.Event, 'wait', autospec=True,
+                                                 side_effect=threading.Event.wait) as wait:
+            start = time.monotonic()
+            interruptible_sleep(0.3)
+            self.assertGreaterEqual(time.monotonic() - start, 0.3)
+        self.assertEqual(wait.call_count, 1)
+
+        # Sleeping stops at a timed generator's deadline
+        def sleeping_generator():
+            interruptible_sleep(10)
+            yield None
+
+        start = time.monotonic()
+        self.assertEqual(list(TimedGenerator(sleeping_generator(), timeout=0.2)), [])
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_cancellable_generator(self):
+        # Sleeping is interrupted as soon as the token is cancelled
+        def sleeping_generator():
+            while True:
+                interruptible_sleep(10)
+                yield None
+
+        token = CancellationToken()
+        threading.Timer(0.1, token.cancel).start()
+
+        start = time.monotonic()
+        self.assertEqual(list(CancellableGenerator(sleeping_generator(), token)), [])
+        self.assertLess(time.monotonic() - start, 1)
+
+        # Cancellation also applies to producer threads, and blocking
+        # operations are interrupted using callbacks
+        interrupted = threading.Event()
+
+        def blocking_generator():
+            yield 1
+            with on_cancel(interrupted.set):
+                interrupted.wait()
+            yield 2
+
+        token = CancellationToken()
+        generator = CancellableGenerator(
+            PrefetchGenerator(CancellableGenerator(blocking_generator(), token)), token)
+        self.assertEqual(next(generator), 1)
+        token.cancel()
+        self.assertTrue(interrupted.wait(1))
+        self.assertRaises(StopIteration, next, generator)
+
+        # Callbacks are called immediately if already cancelled
+        called = []
+        token.add_callback(lambda: called.append(True))
+        self.assertEqual(called, [True])
+
+    def test_prefetch_generator(self):
+        # Items are yielded in order
+        self.assertEqual(list(PrefetchGenerator(iter(range(100)), 4)),
+                         list(range(100)))
+
+        # Errors are raised in the consumer's thread
+        def failing_generator():
+            yield 1
+            raise ValueError('failed')
+
+        generator = PrefetchGenerator(failing_generator())
+        self.assertEqual(next(generator), 1)
+        self.assertRaises(ValueError, next, generator)
+
+        # The queue is bounded
+        produced = []
+
+        def counting_generator():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        generator = PrefetchGenerator(counting_generator(), 5)
+        next(generator)
+        time.sleep(0.3)
+        self.assertLessEqual(len(produced), 1 + 5 + 1)
+        self.assertEqual(generator.get_stats()['size'], 5)
+
+        generator.close()
+        self.assertRaises(StopIteration, next, generator)
+
+        # Timeouts are checked while waiting for the producer
+        def slow_generator():
+            while True:
+                time.sleep(0.05)
+                yield None
+
+        start = time.monotonic()
+        items = list(TimedGenerator(PrefetchGenerator(slow_generator()), timeout=0.3))
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertGreater(len(items), 0)
+
+    def test_prefetch_generator_close(self):
+        # Closing (e.g. after a timeout) stops the producer of an idle
+        # generator, rather than waiting for its next item
+        polls = []
+
+        def idle_generator():
+            while True:
+                polls.append(time.monotonic())
+                interruptible_sleep(0.1)  # e.g. waiting between requests
+            yield
+
+        generator = PrefetchGenerator(idle_generator(), 4)
+        self.assertEqual(list(TimedGenerator(generator, timeout=0.3)), [])  # Closes the generator
+
+        generator._thread.join(1)
+        self.assertFalse(generator._thread.is_alive())
+        poll_count = len(polls)
+        time.sleep(0.3)
+        self.assertEqual(len(polls), poll_count)
+
+    def test_wait_for_entry(self):
+        entries = queue.Queue()
+        entries.put(1)
+        self.assertEqual(wait_for_entry(entries), 1)
+
+        def waiting_generator():
+            while True:
+                yield wait_for_entry(entries)
+
+        # A single wait is made until the deadline, rather than waking up regularly
+        with mock.patch('chat_downloader.utils.threaded_utils.check_for_timeout',
+                        wraps=check_for_timeout) as check:
+            start = time.monotonic()
+            self.assertEqual(list(TimedGenerator(waiting_generator(), timeout=0.5)), [])
+            self.assertGreaterEqual(time.monotonic() - start, 0.5)
+            self.assertLessEqual(check.call_count, 3)
+
+        # Waiting stops as soon as the token is cancelled
+        token = CancellationToken()
+        threading.Timer(0.1, token.cancel).start()
+
+        start = time.monotonic()
+        self.assertEqual(list(CancellableGenerator(waiting_generator(), token)), [])
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_ordered_parallel_generator(self):
+        def create_factory(index):
+            def factory():
+                for i in range(10):
+                    time.sleep(0.001 * (5 - index))  # Later generators finish first
+                    yield (index, i)
+            return factory
+
+        factories = [create_factory(index) for index in range(5)]
+        self.assertEqual(list(ordered_parallel_generator(factories, 3)),
+                         [(index, i) for index in range(5) for i in range(10)])
+
+        # Errors are raised in order
+        def failing_factory():
+            raise ValueError('failed')
+            yield
+
+        generator = ordered_parallel_generator(
+            [create_factory(0), failing_factory, create_factory(2)], 2)
+        self.assertEqual(len([next(generator) for _ in range(10)]), 10)
+        self.assertRaises(ValueError, next, generator)
+
+        # Timeouts interrupt waiting for the next item
+        def slow_factory():
+            for i in range(10):
+                time.sleep(0.1)
+                yield i
+
+        start = time.monotonic()
+        items = list(TimedGenerator(ordered_parallel_generator([slow_factory], 1), timeout=0.25))
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(items, list(range(len(items))))
+        self.assertLess(len(items), 10)
+
+    def test_merged_parallel_generator(self):
+        def create_factory(index):
+            def factory():
+                for i in range(10):
+                    time.sleep(0.001 * (index + 1))
+                    yield i
+            return factory
+
+        items = list(merged_parallel_generator([create_factory(index) for index in range(3)]))
+        self.assertCountEqual(items, [(index, i) for index in range(3) for i in range(10)])
+
+        # Items of each generator are in order
+        for index in range(3):
+            self.assertEqual([i for j, i in items if j == index], list(range(10)))
+
+        def failing_factory():
+            raise ValueError('failed')
+            yield
+
+        generator = merged_parallel_generator([create_factory(0), failing_factory])
+        self.assertRaises(ValueError, list, generator)
+
+        # Cancellation interrupts waiting for the next item
+        def idle_factory():
+            interruptible_sleep(10)
+            yield
+
+        token = CancellationToken()
+        threading.Timer(0.1, token.cancel).start()
+
+        start = time.monotonic()
+        self.assertEqual(list(CancellableGenerator(merged_parallel_generator([idle_factory]), token)), [])
+        self.assertLess(time.monotonic() - start, 1)